@@ -0,0 +1,68 @@
+"""
+FaithLoop API - 인증 의존성
+Authorization: Bearer <Supabase access token>을 검증하고 사용자 ID를 토큰에서 가져온다
+(클라이언트가 보낸 user_id는 신뢰하지 않음)
+"""
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+
+@dataclass
+class AuthenticatedUser:
+    """검증된 요청 사용자"""
+    user_id: str
+    access_token: str
+
+
+def _verify_token(access_token: str) -> Optional[str]:
+    """Supabase Auth로 토큰 검증 → 사용자 ID (무효면 None)"""
+    from supabase import create_client
+    from lib.config import get_supabase_url, get_supabase_key
+    
+    url = get_supabase_url()
+    key = get_supabase_key()
+    if not url or not key:
+        raise RuntimeError("Supabase 설정이 없습니다.")
+    
+    try:
+        response = create_client(url, key).auth.get_user(access_token)
+    except Exception:
+        return None
+    user = getattr(response, "user", None)
+    return getattr(user, "id", None)
+
+
+def user_client(user: AuthenticatedUser) -> Any:
+    """요청 사용자의 토큰을 적용한 Supabase 클라이언트 (RLS가 토큰 기준으로 적용됨)"""
+    from supabase import create_client
+    from lib.config import get_supabase_url, get_supabase_key
+    
+    client = create_client(get_supabase_url(), get_supabase_key())
+    client.postgrest.auth(user.access_token)
+    return client
+
+
+async def get_current_user(authorization: Optional[str] = Header(default=None)) -> AuthenticatedUser:
+    """
+    FastAPI 의존성: Bearer 토큰 검증
+    
+    Raises:
+        HTTPException(401): 토큰 없음/무효
+        HTTPException(503): Supabase 설정 없음
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise HTTPException(status_code=401, detail="Bearer 토큰이 필요합니다.", headers={"WWW-Authenticate": "Bearer"})
+    
+    token = token.strip()
+    try:
+        user_id = await run_in_threadpool(_verify_token, token)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if not user_id:
+        raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다.", headers={"WWW-Authenticate": "Bearer"})
+    return AuthenticatedUser(user_id=user_id, access_token=token)
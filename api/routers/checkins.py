@@ -3,11 +3,13 @@ FaithLoop API - Checkins Router
 """
 import uuid
 from datetime import datetime, timezone
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
-from api.schemas import CheckinCreate, CheckinOut
+from api.auth import AuthenticatedUser, get_current_user, user_client
+from api.schemas import CheckinCreate, CheckinOut, CheckinPage
 
 router = APIRouter(prefix="/checkins", tags=["checkins"])
 
@@ -29,11 +31,49 @@ async def create_checkin(payload: CheckinCreate):
     )
 
 
-@router.get("", response_model=List[CheckinOut])
-async def list_checkins():
+@router.get("", response_model=CheckinPage)
+async def list_checkins(
+    cursor: Optional[str] = Query(default=None, description="이전 응답의 next_cursor (미입력 시 첫 페이지)"),
+    limit: int = Query(default=20, ge=1, le=100, description="페이지 크기"),
+    exclude_demo: bool = Query(default=True, description="데모 데이터 제외"),
+    user: AuthenticatedUser = Depends(get_current_user)
+):
     """
-    체크인 목록 조회 (stub)
-    TODO: Supabase select 연결
+    체크인 목록 조회 (최신순, (created_at, id) 키셋 페이지네이션)
+    next_cursor를 다음 요청의 cursor로 넘기면 이어서 조회 (깊은 페이지도 일정한 비용)
+    
+    인증: Authorization: Bearer <Supabase access token> (사용자 ID는 토큰에서)
     """
-    return []
-
+    from lib.supabase_db import _query_checkins_page, decode_checkin_cursor
+    
+    if cursor:
+        try:
+            decode_checkin_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Supabase 조회는 블로킹 호출이므로 스레드풀에서 실행 (오류는 빈 페이지가 아니라 5xx로 응답)
+    try:
+        page = await run_in_threadpool(
+            _query_checkins_page,
+            user_client(user),
+            user.user_id,
+            limit,
+            cursor,
+            exclude_demo
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"체크인 조회 실패: {e}")
+    
+    return CheckinPage(
+        items=[
+            CheckinOut(
+                id=row["id"],
+                text=row.get("content") or "",
+                created_at=row["created_at"],
+                source=(row.get("metadata") or {}).get("source")
+            )
+            for row in page["items"]
+        ],
+        next_cursor=page["next_cursor"]
+    )
@@ -1,9 +1,14 @@
 """
 FaithLoop API - Memory (RAG) Router
 """
-from fastapi import APIRouter
+import json
 
-from api.schemas import MemorySearchRequest, MemorySearchResponse, MemorySearchHit
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from api.auth import AuthenticatedUser, get_current_user
+from api.schemas import MemorySearchRequest, MemorySearchResponse, MemorySearchHit, MemoryAnswerRequest
 
 router = APIRouter(prefix="/memory", tags=["memory"])
 
@@ -27,3 +32,46 @@ async def search_memory(payload: MemorySearchRequest):
         hits=[stub_hit]
     )
 
+
+def _sse(data: dict, event: str = None) -> str:
+    """Server-Sent Events 한 건 직렬화"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/answer/stream")
+async def stream_memory_answer(payload: MemoryAnswerRequest, user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    RAG 답변 스트리밍 (SSE)
+    
+    이벤트 순서:
+        event: sources → {"sources": [...], "memories_count": n}
+        data: {"delta": "..."} (반복)
+        event: done → {}
+    
+    인증: Authorization: Bearer <Supabase access token> (사용자 ID는 토큰에서)
+    """
+    from lib.rag import stream_rag_answer
+    
+    # 검색(임베딩 + DB)은 블로킹 호출이므로 스레드풀에서 실행
+    result = await run_in_threadpool(
+        stream_rag_answer,
+        payload.query,
+        top_k=payload.top_k,
+        threshold=payload.threshold,
+        exclude_demo=payload.exclude_demo,
+        user_id=user.user_id
+    )
+    
+    def event_source():
+        yield _sse({"sources": result["sources"], "memories_count": result["memories_count"]}, event="sources")
+        for delta in result["stream"]:
+            yield _sse({"delta": delta})
+        yield _sse({}, event="done")
+    
+    # 동기 제너레이터는 Starlette가 스레드풀에서 순회
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -24,6 +24,12 @@ class CheckinOut(BaseModel):
     source: Optional[str] = Field(default=None, description="체크인 소스")
 
 
+class CheckinPage(BaseModel):
+    """체크인 목록 페이지 응답 (키셋 페이지네이션)"""
+    items: List[CheckinOut] = Field(default_factory=list, description="체크인 목록 (최신순)")
+    next_cursor: Optional[str] = Field(default=None, description="다음 페이지 커서 (마지막 페이지면 null)")
+
+
 # ============================================================
 # Memory (RAG) 관련 스키마
 # ============================================================
@@ -34,6 +40,14 @@ class MemorySearchRequest(BaseModel):
     top_k: int = Field(default=8, ge=1, le=50, description="반환할 결과 수")
 
 
+class MemoryAnswerRequest(BaseModel):
+    """RAG 답변 스트리밍 요청"""
+    query: str = Field(..., min_length=1, description="질문")
+    top_k: int = Field(default=5, ge=1, le=50, description="참조할 기억 수")
+    threshold: float = Field(default=0.6, ge=0.0, le=1.0, description="최소 유사도")
+    exclude_demo: bool = Field(default=True, description="데모 데이터 제외")
+
+
 class MemorySearchHit(BaseModel):
     """메모리 검색 결과 항목"""
     id: str = Field(..., description="청크 ID")
@@ -74,6 +74,7 @@ pages.append(st.Page("pages/2_Checkin.py", title="Check-in", icon="✍️"))
 pages.append(st.Page("pages/3_Report.py", title="Report", icon="📊"))
 pages.append(st.Page("pages/4_Planner.py", title="Planner", icon="📅"))
 pages.append(st.Page("pages/5_Memory.py", title="Memory", icon="🧠"))
+pages.append(st.Page("pages/7_History.py", title="History", icon="📜"))
 
 # 모듈 그룹 (활성화된 것만 표시)
 # Streamlit Cloud에서는 파일 존재 여부 체크가 부정확할 수 있으므로
@@ -0,0 +1,642 @@
+"""
+ReflectOS - 과거 체크인 배치 보강
+LLM 추출이 없는 체크인을 찾아 OpenAI Batch 형식 요청 파일로 묶고,
+전송 방식(OpenAI Batch API / 로컬 대체)을 통해 처리한 뒤 결과를 일괄 저장
+
+작업 상태는 로컬 디렉토리에 체크포인트로 남아 중단 후 이어서 실행할 수 있다.
+    <state_dir>/<job_id>/state.json      작업 상태 (단계, 배치 ID, 저장 완료한 custom_id)
+    <state_dir>/<job_id>/requests_NNN.jsonl  Batch 입력 파일
+    <state_dir>/<job_id>/results_NNN.jsonl   Batch 출력 파일
+"""
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Iterator
+from lib.config import get_supabase_client, get_cache_config
+from lib.supabase_db import EXTRACTION_ID_CHUNK_SIZE
+from lib.utils import has_demo_tag
+
+
+# ============================================
+# 설정
+# ============================================
+
+# 체크인에 이미 LLM 추출이 있다고 보는 extraction_type
+LLM_EXTRACTION_TYPES = ["llm_extractor", "llm_fused"]
+
+# 배치 결과로 저장할 extraction_type (대화형 저장과 동일하게 취급)
+BATCH_EXTRACTION_TYPE = "llm_extractor"
+
+# Batch API 입력 파일당 최대 요청 수 (API 한도 50,000)
+BATCH_MAX_REQUESTS = 50_000
+
+CHAT_ENDPOINT = "/v1/chat/completions"
+
+# Batch 상태 중 더 이상 바뀌지 않는 상태
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def default_state_dir() -> str:
+    """작업 체크포인트 디렉토리 (로컬 캐시 디렉토리 아래)"""
+    return os.path.join(get_cache_config().get("dir", ".cache"), "batch_enrich")
+
+
+# ============================================
+# 대상 체크인 조회
+# ============================================
+
+def find_unenriched_checkins(
+    user_id: str,
+    limit: Optional[int] = None,
+    include_demo: bool = False,
+    page_size: int = 500
+) -> List[Dict]:
+    """
+    LLM 추출(llm_extractor / llm_fused)이 없는 체크인 조회 (오래된 순)
+
+    Args:
+        user_id: 사용자 ID
+        limit: 최대 개수 (None이면 전체)
+        include_demo: 데모 체크인 포함 여부
+        page_size: 체크인 페이지 크기
+
+    Returns:
+        [{"id", "user_id", "content", "tags", "created_at"}, ...]
+    """
+    client = get_supabase_client()
+    if not client:
+        return []
+
+    found: List[Dict] = []
+    offset = 0
+
+    while True:
+        page = (
+            client.table("checkins")
+            .select("id, user_id, content, tags, created_at")
+            .eq("user_id", user_id)
+            .order("created_at")
+            .range(offset, offset + page_size - 1)
+            .execute()
+        ).data or []
+        if not page:
+            break
+
+        candidates = [
+            c for c in page
+            if (c.get("content") or "").strip() and (include_demo or not has_demo_tag(c.get("tags")))
+        ]
+        if candidates:
+            candidate_ids = [c["id"] for c in candidates]
+            enriched_ids = set()
+            # in_ 목록은 URL에 실리므로 get_extractions_for_sources와 같은 크기로 나눠 조회
+            for start in range(0, len(candidate_ids), EXTRACTION_ID_CHUNK_SIZE):
+                enriched = (
+                    client.table("extractions")
+                    .select("source_id")
+                    .eq("user_id", user_id)
+                    .eq("source_type", "checkin")
+                    .in_("extraction_type", LLM_EXTRACTION_TYPES)
+                    .in_("source_id", candidate_ids[start:start + EXTRACTION_ID_CHUNK_SIZE])
+                    .execute()
+                ).data or []
+                enriched_ids.update(row["source_id"] for row in enriched)
+            found.extend(c for c in candidates if c["id"] not in enriched_ids)
+
+        if limit is not None and len(found) >= limit:
+            return found[:limit]
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    return found
+
+
+# ============================================
+# 요청 파일 구성
+# ============================================
+
+def checkin_custom_id(checkin_id: str) -> str:
+    return f"checkin:{checkin_id}"
+
+
+def build_extraction_requests(checkins: List[Dict], model: str = "gpt-4o-mini") -> List[Dict]:
+    """
+    체크인 → Batch API 요청 (extract_structured_data와 같은 프롬프트/스키마)
+
+    Returns:
+        [{"custom_id", "method", "url", "body"}, ...]
+    """
+    from lib.openai_client import _extractor_messages
+    from lib.prompts import EXTRACTOR_JSON_SCHEMA
+
+    return [
+        {
+            "custom_id": checkin_custom_id(c["id"]),
+            "method": "POST",
+            "url": CHAT_ENDPOINT,
+            "body": {
+                "model": model,
+                "messages": _extractor_messages(c["content"]),
+                "temperature": 0.2,
+                "response_format": {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "extraction_result",
+                        "strict": True,
+                        "schema": EXTRACTOR_JSON_SCHEMA
+                    }
+                }
+            }
+        }
+        for c in checkins
+    ]
+
+
+def _write_jsonl(path: str, rows: List[Dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def _read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+# ============================================
+# 전송 방식 (transport)
+# ============================================
+
+class BatchTransport:
+    """
+    Batch 요청 파일 전송 인터페이스
+
+    submit: 입력 JSONL 업로드 + 배치 생성 → 배치 ID
+    status: {"status", "completed", "failed", "total"}
+    download: 종료된 배치의 출력(+ 오류 파일)을 output_path에 저장, 둘 다 없으면 False
+    """
+
+    name = "base"
+
+    def submit(self, requests_path: str, endpoint: str) -> str:
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def download(self, batch_id: str, output_path: str) -> bool:
+        raise NotImplementedError
+
+
+class OpenAIBatchTransport(BatchTransport):
+    """OpenAI Batch API (24시간 완료 창, 대화형 호출 대비 할인 가격)"""
+
+    name = "openai"
+
+    def __init__(self, client: Any = None, completion_window: str = "24h"):
+        from lib.openai_client import get_openai_client
+
+        self.client = client or get_openai_client()
+        if self.client is None:
+            raise RuntimeError("OpenAI API 키가 설정되지 않았습니다.")
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str, endpoint: str) -> str:
+        with open(requests_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=endpoint,
+            completion_window=self.completion_window,
+            metadata={"job": "reflectos_batch_enrich"}
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": batch.status,
+            "completed": getattr(counts, "completed", 0) if counts else 0,
+            "failed": getattr(counts, "failed", 0) if counts else 0,
+            "total": getattr(counts, "total", 0) if counts else 0,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id
+        }
+
+    def download(self, batch_id: str, output_path: str) -> bool:
+        # 실패/만료 요청은 error_file_id 쪽에 같은 형식(custom_id + error)으로 기록됨 → 함께 저장
+        info = self.status(batch_id)
+        file_ids = [file_id for file_id in (info["output_file_id"], info["error_file_id"]) if file_id]
+        if not file_ids:
+            return False
+        with open(output_path, "wb") as f:
+            for file_id in file_ids:
+                content = self.client.files.content(file_id).read()
+                f.write(content)
+                if content and not content.endswith(b"\n"):
+                    f.write(b"\n")
+        return True
+
+
+def local_chat_handler(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    로컬 대체 응답: offline provider의 스키마 템플릿 응답 (네트워크 호출 없음, 결정적)
+    테스트/리허설에서 요청 파일 구성과 결과 저장 경로를 검증하는 용도
+    """
+    from lib.llm_providers import OfflineProvider
+
+    return OfflineProvider().chat_completion_body(**body)
+
+
+class LocalBatchTransport(BatchTransport):
+    """
+    로컬 대체 전송: 제출 즉시 handler로 각 요청을 처리해 Batch 출력 형식으로 저장
+
+    Args:
+        handler: 요청 body → 응답 body (기본: 스키마 템플릿 응답)
+        work_dir: 출력 보관 디렉토리
+    """
+
+    name = "local"
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Dict[str, Any]] = None, work_dir: str = None):
+        self.handler = handler or local_chat_handler
+        self.work_dir = work_dir or os.path.join(default_state_dir(), "_local")
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def _output_path(self, batch_id: str) -> str:
+        return os.path.join(self.work_dir, f"{batch_id}.jsonl")
+
+    def submit(self, requests_path: str, endpoint: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        rows = []
+        for request in _read_jsonl(requests_path):
+            try:
+                response = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": self.handler(request["body"])}
+                error = None
+            except Exception as e:
+                response = None
+                error = {"code": "local_handler_error", "message": str(e)}
+            rows.append({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": response,
+                "error": error
+            })
+        _write_jsonl(self._output_path(batch_id), rows)
+        return batch_id
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        path = self._output_path(batch_id)
+        if not os.path.exists(path):
+            return {"status": "failed", "completed": 0, "failed": 0, "total": 0}
+        rows = list(_read_jsonl(path))
+        failed = sum(1 for r in rows if r.get("error"))
+        return {"status": "completed", "completed": len(rows) - failed, "failed": failed, "total": len(rows)}
+
+    def download(self, batch_id: str, output_path: str) -> bool:
+        path = self._output_path(batch_id)
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as src, open(output_path, "wb") as dst:
+            dst.write(src.read())
+        return True
+
+
+TRANSPORTS = {
+    "openai": OpenAIBatchTransport,
+    "local": LocalBatchTransport,
+}
+
+
+def get_transport(name: str) -> BatchTransport:
+    """이름으로 전송 방식 생성 ("openai" | "local")"""
+    if name not in TRANSPORTS:
+        raise ValueError(f"알 수 없는 transport: {name} (가능: {', '.join(TRANSPORTS)})")
+    return TRANSPORTS[name]()
+
+
+# ============================================
+# 작업 상태 (체크포인트)
+# ============================================
+
+def _job_dir(job_id: str, state_dir: str = None) -> str:
+    return os.path.join(state_dir or default_state_dir(), job_id)
+
+
+def save_job(job: Dict[str, Any]):
+    """state.json 원자적 저장 (임시 파일 → rename)"""
+    job["updated_at"] = datetime.utcnow().isoformat()
+    path = os.path.join(job["dir"], "state.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_job(job_id: str, state_dir: str = None) -> Dict[str, Any]:
+    """저장된 작업 상태 불러오기"""
+    path = os.path.join(_job_dir(job_id, state_dir), "state.json")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"작업을 찾을 수 없습니다: {job_id}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_jobs(state_dir: str = None) -> List[Dict[str, Any]]:
+    """저장된 작업 요약 목록 (최근 순)"""
+    root = state_dir or default_state_dir()
+    if not os.path.isdir(root):
+        return []
+    jobs = []
+    for name in os.listdir(root):
+        if os.path.exists(os.path.join(root, name, "state.json")):
+            job = load_job(name, root)
+            jobs.append({
+                "job_id": job["job_id"],
+                "stage": job["stage"],
+                "user_id": job["user_id"],
+                "requests": job["total"],
+                "written": len(job["written"]),
+                "created_at": job["created_at"]
+            })
+    return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+
+def create_job(
+    user_id: str,
+    checkins: List[Dict],
+    model: str = "gpt-4o-mini",
+    transport: str = "openai",
+    state_dir: str = None
+) -> Dict[str, Any]:
+    """
+    새 작업 생성: 요청 파일(BATCH_MAX_REQUESTS 단위) + state.json 기록
+
+    Returns:
+        작업 상태 dict (stage = "prepared")
+    """
+    job_id = datetime.utcnow().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    job_dir = _job_dir(job_id, state_dir)
+    os.makedirs(job_dir, exist_ok=True)
+
+    requests = build_extraction_requests(checkins, model)
+    batches = []
+    for i, start in enumerate(range(0, len(requests), BATCH_MAX_REQUESTS)):
+        input_path = os.path.join(job_dir, f"requests_{i:03d}.jsonl")
+        _write_jsonl(input_path, requests[start:start + BATCH_MAX_REQUESTS])
+        batches.append({
+            "input_path": input_path,
+            "output_path": os.path.join(job_dir, f"results_{i:03d}.jsonl"),
+            "batch_id": None,
+            "status": "prepared",
+            "downloaded": False
+        })
+
+    job = {
+        "job_id": job_id,
+        "dir": job_dir,
+        "user_id": user_id,
+        "model": model,
+        "transport": transport,
+        "stage": "prepared",
+        "total": len(requests),
+        # 결과 저장 시 created_at/tags를 원본 체크인에 맞추기 위한 최소 정보
+        "checkins": {
+            c["id"]: {"created_at": c.get("created_at"), "tags": c.get("tags") or []}
+            for c in checkins
+        },
+        "batches": batches,
+        "written": [],
+        "errors": [],
+        "created_at": datetime.utcnow().isoformat()
+    }
+    save_job(job)
+    return job
+
+
+# ============================================
+# 단계 실행
+# ============================================
+
+def submit_job(job: Dict[str, Any], transport: BatchTransport):
+    """아직 제출하지 않은 배치 파일 제출 (재실행 시 이미 제출한 배치는 건너뜀)"""
+    for batch in job["batches"]:
+        if batch["batch_id"]:
+            continue
+        batch["batch_id"] = transport.submit(batch["input_path"], CHAT_ENDPOINT)
+        batch["status"] = "submitted"
+        save_job(job)  # 배치마다 체크포인트 (중복 제출 방지)
+    job["stage"] = "submitted"
+    save_job(job)
+
+
+def refresh_job(job: Dict[str, Any], transport: BatchTransport) -> bool:
+    """
+    배치 상태 갱신, 종료된 배치 출력 다운로드
+
+    - 출력/오류 파일 없이 종료된 배치(failed, expired 등)도 처리 완료로 표시해 다시 조회하지 않음
+      (해당 요청은 write_job_results에서 실패로 집계)
+
+    Returns:
+        모든 배치가 종료 상태인지
+    """
+    for batch in job["batches"]:
+        if not batch["batch_id"] or batch["downloaded"]:
+            continue
+        info = transport.status(batch["batch_id"])
+        batch["status"] = info["status"]
+        batch["counts"] = {k: info.get(k, 0) for k in ("completed", "failed", "total")}
+        if info["status"] in TERMINAL_STATUSES:
+            if not transport.download(batch["batch_id"], batch["output_path"]):
+                job["errors"].append(f"{batch['batch_id']}: 출력 없음 (status={info['status']})")
+            batch["downloaded"] = True
+    save_job(job)
+    return all(b["batch_id"] and b["status"] in TERMINAL_STATUSES for b in job["batches"])
+
+
+def _parse_result_line(row: Dict[str, Any]) -> Optional[Dict]:
+    """Batch 출력 한 줄 → 추출 데이터 (실패/파싱 불가면 None)"""
+    response = row.get("response") or {}
+    if row.get("error") or response.get("status_code") != 200:
+        return None
+    try:
+        content = response["body"]["choices"][0]["message"]["content"]
+        data = json.loads(content)
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _existing_extraction_ids(user_id: str, checkin_ids: List[str]) -> set:
+    """이미 BATCH_EXTRACTION_TYPE 추출이 저장된 체크인 ID (저장 직후 중단된 묶음의 재저장 방지)"""
+    client = get_supabase_client()
+    existing = set()
+    for start in range(0, len(checkin_ids), EXTRACTION_ID_CHUNK_SIZE):
+        rows = (
+            client.table("extractions")
+            .select("source_id")
+            .eq("user_id", user_id)
+            .eq("source_type", "checkin")
+            .eq("extraction_type", BATCH_EXTRACTION_TYPE)
+            .in_("source_id", checkin_ids[start:start + EXTRACTION_ID_CHUNK_SIZE])
+            .execute()
+        ).data or []
+        existing.update(row["source_id"] for row in rows)
+    return existing
+
+
+def write_job_results(
+    job: Dict[str, Any],
+    chunk_size: int = 100,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, int]:
+    """
+    다운로드한 결과를 extractions / memory_embeddings에 일괄 저장
+
+    - chunk_size 단위로 저장하고 저장한 custom_id를 state.json에 기록 → 중단 후 재실행 시 이어서 저장
+    - 저장 전에 이미 추출이 있는 체크인은 건너뜀 (저장 후 체크포인트 전에 중단된 경우 중복 방지)
+    - 출력에 없는 요청(출력 없이 종료된 배치 등)은 실패로 집계
+    - 추출 결과 임베딩은 index_extractions_bulk로 묶어서 생성
+
+    Returns:
+        {"written", "failed", "indexed"}
+    """
+    from lib.supabase_db import insert_extractions_bulk
+    from lib.rag import index_extractions_bulk
+
+    written = set(job["written"])
+    pending = []
+    failed = 0
+
+    for batch in job["batches"]:
+        if not batch["downloaded"]:
+            continue
+        seen = set()
+        if os.path.exists(batch["output_path"]):
+            for row in _read_jsonl(batch["output_path"]):
+                custom_id = row.get("custom_id", "")
+                if custom_id in seen:
+                    continue
+                seen.add(custom_id)
+                if custom_id in written or not custom_id.startswith("checkin:"):
+                    continue
+                data = _parse_result_line(row)
+                if data is None:
+                    failed += 1
+                    continue
+                pending.append((custom_id, custom_id.split(":", 1)[1], data))
+        # 결과 줄이 없는 요청 (출력 없이 종료되었거나 오류 파일에도 없음)
+        failed += sum(
+            1 for request in _read_jsonl(batch["input_path"])
+            if request["custom_id"] not in seen and request["custom_id"] not in written
+        )
+
+    result = {"written": 0, "failed": failed, "indexed": 0}
+    total = len(pending)
+
+    for start in range(0, total, chunk_size):
+        chunk = pending[start:start + chunk_size]
+        records = []
+        items = []
+        for _, checkin_id, data in chunk:
+            meta = job["checkins"].get(checkin_id, {})
+            records.append({
+                "user_id": job["user_id"],
+                "source_type": "checkin",
+                "source_id": checkin_id,
+                "extraction_type": BATCH_EXTRACTION_TYPE,
+                "data": data,
+                "created_at": meta.get("created_at")
+            })
+            items.append({
+                "checkin_id": checkin_id,
+                "data": data,
+                "tags": meta.get("tags"),
+                "created_at": meta.get("created_at")
+            })
+
+        try:
+            existing = _existing_extraction_ids(job["user_id"], [r["source_id"] for r in records])
+        except Exception as e:
+            job["errors"].append(f"기존 extractions 확인 실패 ({start}~{start + len(chunk)}): {e}")
+            save_job(job)
+            break
+        records = [r for r in records if r["source_id"] not in existing]
+
+        saved = insert_extractions_bulk(records)
+        if saved != len(records):
+            # 부분 저장 여부를 알 수 없으므로 이 묶음은 다음 실행에서 다시 시도
+            job["errors"].append(f"extractions 저장 실패 ({start}~{start + len(chunk)})")
+            save_job(job)
+            break
+
+        # 인덱싱은 content_hash 충돌을 건너뛰므로 이미 있던 추출도 함께 넘김 (인덱싱 전 중단 대비)
+        indexed = index_extractions_bulk(items, user_id=job["user_id"])
+        result["indexed"] += indexed["indexed"]
+        result["written"] += len(chunk)
+
+        job["written"].extend(custom_id for custom_id, _, _ in chunk)
+        save_job(job)
+
+        if progress_callback:
+            progress_callback(min(start + chunk_size, total), total)
+
+    if len(job["written"]) + failed >= job["total"]:
+        job["stage"] = "written"
+        save_job(job)
+
+    return result
+
+
+def run_job(
+    job: Dict[str, Any],
+    transport: BatchTransport,
+    wait: bool = True,
+    poll_seconds: float = 60.0,
+    progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    남은 단계를 이어서 실행: 제출 → (대기) → 다운로드 → 저장
+
+    Args:
+        job: create_job / load_job 결과
+        transport: 전송 방식
+        wait: True면 모든 배치가 끝날 때까지 poll_seconds 간격으로 대기
+        poll_seconds: 상태 확인 간격
+        progress_callback: (단계 이름, 작업 상태) 콜백
+
+    Returns:
+        작업 상태 dict
+    """
+    if job["stage"] == "written":
+        return job
+
+    if job["stage"] == "prepared":
+        submit_job(job, transport)
+        if progress_callback:
+            progress_callback("submitted", job)
+
+    while True:
+        done = refresh_job(job, transport)
+        if progress_callback:
+            progress_callback("polled", job)
+        if done or not wait:
+            break
+        time.sleep(poll_seconds)
+
+    if any(b["downloaded"] for b in job["batches"]):
+        job["stage"] = "collected"
+        job["last_write"] = write_job_results(job)
+        save_job(job)
+        if progress_callback:
+            progress_callback("written", job)
+
+    return job
@@ -0,0 +1,498 @@
+"""
+ReflectOS - 로컬 캐시
+프로세스 내 LRU + 디스크(SQLite) 영속 캐시, 임베딩 캐시, LLM 응답 캐시, 미디어 분석 캐시
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import numpy as np
+import streamlit as st
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any
+from lib.config import get_cache_config, get_llm_provider_config
+
+
+# ============================================
+# 캐시 기본 구성요소
+# ============================================
+
+class LRUCache:
+    """스레드 안전한 크기 제한 LRU 캐시"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = max(int(maxsize), 1)
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SqliteStore:
+    """
+    key → BLOB 디스크 저장소 (Streamlit 재시작 후에도 유지)
+
+    Args:
+        path: SQLite 파일 경로
+        ttl_seconds: 만료 시간 (None이면 만료 없음)
+        max_entries: 최대 항목 수 (초과 시 오래 사용하지 않은 항목부터 삭제)
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def put(self, key: str, value: bytes):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), now, now)
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (int(self.max_entries),)
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class CacheStats:
+    """캐시 적중/미스 카운터"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def record(self, outcome: str):
+        with self._lock:
+            if outcome == "memory":
+                self.memory_hits += 1
+            elif outcome == "disk":
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / total) if total else 0.0
+            }
+
+
+def _cache_path(filename: str) -> str:
+    """캐시 디렉토리 내 파일 경로"""
+    return os.path.join(get_cache_config().get("dir", ".cache"), filename)
+
+
+def provider_namespace() -> str:
+    """
+    캐시 키의 provider 구분자 ("openai" / "offline-<seed>")
+    offline provider의 결정적 가짜 결과가 같은 입력의 OpenAI 결과로 재사용되지 않도록 모든 키에 포함
+    """
+    config = get_llm_provider_config()
+    provider = config.get("provider", "openai")
+    if provider == "offline":
+        return f"offline-{config.get('offline_seed', '')}"
+    return provider
+
+
+# ============================================
+# 임베딩 캐시 (model, sha256(정규화 텍스트)) → float32 벡터
+# ============================================
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (유니코드 NFC, 줄바꿈 통일, 앞뒤 공백 제거)"""
+    text = unicodedata.normalize("NFC", text or "")
+    return text.replace("\r\n", "\n").strip()
+
+
+def embedding_cache_key(text: str, model: str) -> str:
+    """임베딩 캐시 키: provider + model + 정규화 텍스트의 sha256"""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{provider_namespace()}:{model}:{digest}"
+
+
+@st.cache_resource
+def _get_embedding_cache() -> Dict[str, Any]:
+    """임베딩 캐시 구성요소 싱글톤 (LRU, 디스크 저장소, 카운터)"""
+    config = get_cache_config()
+    store = None
+    try:
+        store = SqliteStore(_cache_path("embeddings.sqlite3"))
+    except Exception:
+        # 디스크를 쓸 수 없는 환경이면 메모리 계층만 사용
+        store = None
+    return {
+        "lru": LRUCache(config.get("embedding_lru_size", 2048)),
+        "store": store,
+        "stats": CacheStats()
+    }
+
+
+def _embedding_cache_enabled() -> bool:
+    return bool(get_cache_config().get("enabled", True))
+
+
+def get_cached_embedding(text: str, model: str) -> Optional[List[float]]:
+    """캐시된 임베딩 조회 (LRU → 디스크 순, 없으면 None)"""
+    if not _embedding_cache_enabled():
+        return None
+
+    cache = _get_embedding_cache()
+    key = embedding_cache_key(text, model)
+
+    vector = cache["lru"].get(key)
+    if vector is not None:
+        cache["stats"].record("memory")
+        return vector
+
+    if cache["store"] is not None:
+        blob = cache["store"].get(key)
+        if blob is not None:
+            vector = np.frombuffer(blob, dtype=np.float32).tolist()
+            cache["lru"].put(key, vector)
+            cache["stats"].record("disk")
+            return vector
+
+    cache["stats"].record("miss")
+    return None
+
+
+def put_cached_embedding(text: str, model: str, embedding: List[float]):
+    """임베딩을 두 계층 모두에 저장"""
+    if not _embedding_cache_enabled() or not embedding:
+        return
+
+    cache = _get_embedding_cache()
+    key = embedding_cache_key(text, model)
+    cache["lru"].put(key, list(embedding))
+
+    if cache["store"] is not None:
+        try:
+            cache["store"].put(key, np.asarray(embedding, dtype=np.float32).tobytes())
+        except Exception:
+            pass  # 디스크 캐시 실패는 무시 (메모리 캐시는 유지)
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """임베딩 캐시 적중/미스 통계 및 항목 수"""
+    cache = _get_embedding_cache()
+    stats = cache["stats"].as_dict()
+    stats["memory_entries"] = len(cache["lru"])
+    stats["disk_entries"] = cache["store"].count() if cache["store"] is not None else 0
+    return stats
+
+
+def clear_embedding_cache():
+    """임베딩 캐시 전체 삭제 (카운터 포함)"""
+    cache = _get_embedding_cache()
+    cache["lru"].clear()
+    if cache["store"] is not None:
+        cache["store"].clear()
+    cache["stats"].reset()
+
+
+# ============================================
+# LLM 응답 캐시 (model, messages, schema, temperature, max_tokens) → 응답
+# ============================================
+
+def llm_cache_key(
+    model: str,
+    messages: List[Dict],
+    schema: Optional[Dict] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None
+) -> str:
+    """provider + 요청 파라미터를 정규화한 JSON의 sha256"""
+    payload = json.dumps(
+        {
+            "provider": provider_namespace(),
+            "model": model,
+            "messages": messages,
+            "schema": schema,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def _get_llm_cache() -> Dict[str, Any]:
+    """LLM 응답 캐시 구성요소 싱글톤 (디스크 저장소, 호출 지점별 카운터)"""
+    config = get_cache_config()
+    store = None
+    try:
+        store = SqliteStore(
+            _cache_path("llm_responses.sqlite3"),
+            ttl_seconds=float(config.get("llm_ttl_hours", 168)) * 3600,
+            max_entries=int(config.get("llm_max_entries", 5000))
+        )
+    except Exception:
+        store = None  # 디스크를 쓸 수 없는 환경이면 캐시 비활성
+    return {
+        "store": store,
+        "sites": {},
+        "lock": threading.Lock()
+    }
+
+
+def _llm_site_stats(cache: Dict[str, Any], site: str) -> CacheStats:
+    with cache["lock"]:
+        stats = cache["sites"].get(site)
+        if stats is None:
+            stats = cache["sites"][site] = CacheStats()
+        return stats
+
+
+def llm_cache_enabled() -> bool:
+    config = get_cache_config()
+    return bool(config.get("enabled", True)) and bool(config.get("llm_enabled", True))
+
+
+def get_cached_llm_response(key: str, site: str = "default") -> Optional[Any]:
+    """캐시된 LLM 응답 조회 (없거나 만료면 None), 호출 지점별 적중/미스 기록"""
+    if not llm_cache_enabled():
+        return None
+
+    cache = _get_llm_cache()
+    stats = _llm_site_stats(cache, site)
+    if cache["store"] is None:
+        stats.record("miss")
+        return None
+
+    blob = cache["store"].get(key)
+    if blob is None:
+        stats.record("miss")
+        return None
+
+    stats.record("disk")
+    return json.loads(blob.decode("utf-8"))
+
+
+def put_cached_llm_response(key: str, value: Any):
+    """LLM 응답 저장 (문자열 또는 JSON 직렬화 가능한 값, None은 저장하지 않음)"""
+    if value is None or not llm_cache_enabled():
+        return
+
+    cache = _get_llm_cache()
+    if cache["store"] is None:
+        return
+    try:
+        cache["store"].put(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except Exception:
+        pass  # 캐시 저장 실패는 무시
+
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """호출 지점별 적중/미스 통계 및 저장된 항목 수"""
+    cache = _get_llm_cache()
+    with cache["lock"]:
+        sites = {site: stats.as_dict() for site, stats in cache["sites"].items()}
+    return {
+        "sites": sites,
+        "entries": cache["store"].count() if cache["store"] is not None else 0
+    }
+
+
+def clear_llm_cache():
+    """LLM 응답 캐시 전체 삭제 (카운터 포함)"""
+    cache = _get_llm_cache()
+    if cache["store"] is not None:
+        cache["store"].clear()
+    with cache["lock"]:
+        cache["sites"].clear()
+
+
+# ============================================
+# 미디어 분석 캐시 (전사 / 이미지 분석)
+# (종류, sha256(원본 바이트), 파라미터) → 결과 텍스트
+# ============================================
+
+def media_digest(data: bytes) -> str:
+    """미디어 원본 바이트의 sha256"""
+    return hashlib.sha256(data or b"").hexdigest()
+
+
+def media_cache_key(kind: str, data: bytes, **params: Any) -> str:
+    """
+    미디어 캐시 키: provider + 종류 + 원본 sha256 + 파라미터(모델, 언어, 프롬프트 등) 해시
+
+    Args:
+        kind: "transcribe" / "vision" 등
+        data: 원본 바이트
+        params: 결과에 영향을 주는 파라미터
+    """
+    params_digest = hashlib.sha256(
+        json.dumps(params, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{provider_namespace()}:{kind}:{media_digest(data)}:{params_digest}"
+
+
+@st.cache_resource
+def _get_media_cache() -> Dict[str, Any]:
+    """미디어 분석 캐시 구성요소 싱글톤 (디스크 저장소, 종류별 카운터)"""
+    config = get_cache_config()
+    store = None
+    try:
+        store = SqliteStore(
+            _cache_path("media_results.sqlite3"),
+            max_entries=int(config.get("media_max_entries", 2000))
+        )
+    except Exception:
+        store = None  # 디스크를 쓸 수 없는 환경이면 캐시 비활성
+    return {
+        "store": store,
+        "kinds": {},
+        "lock": threading.Lock()
+    }
+
+
+def media_cache_enabled() -> bool:
+    config = get_cache_config()
+    return bool(config.get("enabled", True)) and bool(config.get("media_enabled", True))
+
+
+def _media_kind_stats(cache: Dict[str, Any], key: str) -> CacheStats:
+    kind = key.split(":", 1)[0]
+    with cache["lock"]:
+        stats = cache["kinds"].get(kind)
+        if stats is None:
+            stats = cache["kinds"][kind] = CacheStats()
+        return stats
+
+
+def get_cached_media_result(key: str) -> Optional[Any]:
+    """캐시된 전사/분석 결과 조회 (없으면 None)"""
+    if not media_cache_enabled():
+        return None
+
+    cache = _get_media_cache()
+    stats = _media_kind_stats(cache, key)
+    blob = cache["store"].get(key) if cache["store"] is not None else None
+    if blob is None:
+        stats.record("miss")
+        return None
+
+    stats.record("disk")
+    return json.loads(blob.decode("utf-8"))
+
+
+def put_cached_media_result(key: str, value: Any):
+    """전사/분석 결과 저장 (None/빈 값은 저장하지 않음)"""
+    if not value or not media_cache_enabled():
+        return
+
+    cache = _get_media_cache()
+    if cache["store"] is None:
+        return
+    try:
+        cache["store"].put(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except Exception:
+        pass  # 캐시 저장 실패는 무시
+
+
+def get_media_cache_stats() -> Dict[str, Any]:
+    """종류별 적중/미스 통계 및 저장된 항목 수"""
+    cache = _get_media_cache()
+    with cache["lock"]:
+        kinds = {kind: stats.as_dict() for kind, stats in cache["kinds"].items()}
+    return {
+        "kinds": kinds,
+        "entries": cache["store"].count() if cache["store"] is not None else 0
+    }
+
+
+def clear_media_cache():
+    """미디어 분석 캐시 전체 삭제 (카운터 포함)"""
+    cache = _get_media_cache()
+    if cache["store"] is not None:
+        cache["store"].clear()
+    with cache["lock"]:
+        cache["kinds"].clear()
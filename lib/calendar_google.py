@@ -71,43 +71,24 @@ def _get_credentials_from_session() -> Optional[Credentials]:
 
 
 def _save_token_to_db(token_info: Dict) -> bool:
-    """토큰을 Supabase에 저장 (profiles 테이블의 settings 필드 활용)"""
+    """토큰을 Supabase에 저장 (profiles 테이블의 settings 필드 활용, 프로필 캐시 경유)"""
+    from lib.supabase_db import update_profile_settings
+    
     try:
-        client = get_supabase_client()
-        user_id = get_current_user_id()
-        
-        if not client:
-            return False
-        
-        # profiles 테이블의 settings에 토큰 저장
-        response = client.table("profiles").select("settings").eq("user_id", user_id).single().execute()
-        
-        current_settings = response.data.get("settings", {}) if response.data else {}
-        current_settings["google_token"] = token_info
-        
-        client.table("profiles").update({
-            "settings": current_settings
-        }).eq("user_id", user_id).execute()
-        
-        return True
+        return update_profile_settings({"google_token": token_info}, create_missing=True) is not None
     except Exception as e:
         st.error(f"토큰 저장 실패: {e}")
         return False
 
 
 def _load_token_from_db() -> Optional[Dict]:
-    """Supabase에서 토큰 로드"""
+    """Supabase에서 토큰 로드 (프로필 캐시 경유 — 매 인증 확인마다 DB 조회하지 않음)"""
+    from lib.supabase_db import get_profile
+    
     try:
-        client = get_supabase_client()
-        user_id = get_current_user_id()
-        
-        if not client:
-            return None
-        
-        response = client.table("profiles").select("settings").eq("user_id", user_id).single().execute()
-        
-        if response.data:
-            settings = response.data.get("settings", {})
+        profile = get_profile()
+        if profile:
+            settings = profile.get("settings") or {}
             return settings.get("google_token")
         
         return None
@@ -202,16 +183,10 @@ def logout():
     
     # DB에서도 토큰 삭제
     try:
-        client = get_supabase_client()
-        user_id = get_current_user_id()
+        from lib.supabase_db import update_profile_settings
         
-        if client:
-            response = client.table("profiles").select("settings").eq("user_id", user_id).single().execute()
-            if response.data:
-                settings = response.data.get("settings", {})
-                if "google_token" in settings:
-                    del settings["google_token"]
-                    client.table("profiles").update({"settings": settings}).eq("user_id", user_id).execute()
+        # 최신 프로필 기준으로 google_token만 제거 (키가 없으면 쓰기 생략)
+        update_profile_settings(remove_keys=["google_token"])
     except:
         pass
 
@@ -70,6 +70,58 @@ def get_openai_api_key() -> str:
         return None
 
 
+def get_openai_limits_config() -> dict:
+    """
+    OpenAI 호출 제한 설정 반환 ([openai] 섹션, 프로세스 전역으로 적용)
+
+    rpm / tpm: 분당 요청 수 / 토큰 수 한도 (0이면 제한 없음)
+    max_concurrency: 동시에 진행 중인 호출 최대 수
+    max_retries: 429·5xx·연결 오류 재시도 횟수
+    backoff_base_seconds / backoff_max_seconds: 지수 백오프 기본값 / 상한 (Retry-After 헤더 우선)
+    """
+    defaults = {
+        "rpm": 500,
+        "tpm": 200000,
+        "max_concurrency": 8,
+        "max_retries": 4,
+        "backoff_base_seconds": 0.5,
+        "backoff_max_seconds": 20.0
+    }
+    try:
+        section = st.secrets["openai"]
+        return {key: section.get(key, value) for key, value in defaults.items()}
+    except KeyError:
+        return defaults
+
+
+def get_llm_provider_config() -> dict:
+    """
+    LLM/임베딩 provider 설정 반환 ([llm] 섹션)
+
+    provider: "openai" (기본) 또는 "offline" (네트워크 없이 결정적 응답 — 벤치마크/부하 테스트용)
+    offline_latency_ms / offline_jitter_ms: offline 호출마다 주입할 지연 (jitter는 입력 해시로 결정)
+    offline_stream_chunk_ms: offline 스트리밍 청크 사이 지연
+    offline_seed: 임베딩/응답 해시 시드 (바꾸면 다른 결정적 결과)
+    """
+    defaults = {
+        "provider": "openai",
+        "offline_latency_ms": 0.0,
+        "offline_jitter_ms": 0.0,
+        "offline_stream_chunk_ms": 0.0,
+        "offline_seed": "reflectos"
+    }
+    try:
+        section = st.secrets["llm"]
+        return {key: section.get(key, value) for key, value in defaults.items()}
+    except KeyError:
+        return defaults
+
+
+def is_llm_configured() -> bool:
+    """LLM 호출 가능 여부 (offline provider이거나 OpenAI API 키가 있을 때)"""
+    return get_llm_provider_config()["provider"] == "offline" or bool(get_openai_api_key())
+
+
 def get_google_credentials() -> dict:
     """Google OAuth 설정 반환"""
     try:
@@ -96,6 +148,149 @@ def get_app_config() -> dict:
         }
 
 
+def get_cache_config() -> dict:
+    """
+    로컬 캐시 설정 반환
+
+    dir: 디스크 캐시(SQLite) 저장 디렉토리
+    embedding_lru_size: 프로세스 내 임베딩 LRU 최대 항목 수
+    llm_enabled: LLM 응답 캐시 사용 여부
+    llm_ttl_hours: LLM 응답 캐시 만료 시간
+    llm_max_entries: LLM 응답 캐시 최대 항목 수 (초과 시 오래 안 쓴 항목부터 삭제)
+    media_enabled: 전사/이미지 분석 결과 캐시 사용 여부 (원본 바이트 sha256 기준)
+    media_max_entries: 미디어 분석 캐시 최대 항목 수
+    media_mirror_artifacts: 로컬 캐시에 없으면 artifacts.metadata에 저장된 같은 이미지 분석 결과를 재사용 (전사는 로컬 캐시만)
+    profile_ttl_seconds: 세션 프로필 캐시를 DB 확인 없이 쓰는 시간 (지나면 version만 조회해 재검증, 0이면 캐시 안 함)
+    """
+    defaults = {
+        "enabled": True,
+        "dir": ".cache",
+        "embedding_lru_size": 2048,
+        "llm_enabled": True,
+        "llm_ttl_hours": 168,
+        "llm_max_entries": 5000,
+        "media_enabled": True,
+        "media_max_entries": 2000,
+        "media_mirror_artifacts": True,
+        "profile_ttl_seconds": 30
+    }
+    try:
+        section = st.secrets["cache"]
+        return {key: section.get(key, value) for key, value in defaults.items()}
+    except KeyError:
+        return defaults
+
+
+def get_stt_config() -> dict:
+    """
+    음성 전사(STT) 설정 반환
+
+    long_audio_threshold_mb: 이 크기를 넘는 파일은 자동으로 구간 분할 모드 사용 (Whisper 한도 25MB)
+    segment_seconds: 구간 목표 길이 (무음 지점 기준으로 조정)
+    overlap_seconds: 이웃 구간과 겹치는 길이 (경계 단어 잘림 방지, 겹친 단어는 이어붙일 때 제거)
+    max_workers: 동시에 전사할 구간 수
+    silence_db / min_silence_seconds: 무음으로 판단할 음량 / 최소 길이 (FFmpeg silencedetect)
+    upload_format: 변환이 필요할 때 업로드 형식 ("opus" | "wav" | "original" — original은 압축 안 함)
+    opus_bitrate: Opus 비트레이트 (음성 24k 권장)
+    compress_min_kb: upload_format="opus"일 때 이 크기 이상의 WAV/FLAC은 Opus로 압축해 업로드
+    """
+    defaults = {
+        "long_audio_threshold_mb": 20,
+        "segment_seconds": 120,
+        "overlap_seconds": 1.5,
+        "max_workers": 4,
+        "silence_db": -35,
+        "min_silence_seconds": 0.4,
+        "upload_format": "opus",
+        "opus_bitrate": "24k",
+        "compress_min_kb": 512
+    }
+    try:
+        section = st.secrets["stt"]
+        return {key: section.get(key, value) for key, value in defaults.items()}
+    except KeyError:
+        return defaults
+
+
+def get_telemetry_config() -> dict:
+    """
+    LLM 호출 계측 설정 반환
+
+    enabled: 계측 사용 여부
+    buffer_size: 메모리 링 버퍼에 보관할 최근 호출 수 (설정 페이지 집계 기준)
+    jsonl_path: 호출 기록을 한 줄씩 추가할 JSONL 파일 (빈 문자열이면 파일 기록 안 함)
+    """
+    defaults = {
+        "enabled": True,
+        "buffer_size": 2000,
+        "jsonl_path": ".cache/telemetry/llm_calls.jsonl"
+    }
+    try:
+        section = st.secrets["telemetry"]
+        return {key: section.get(key, value) for key, value in defaults.items()}
+    except KeyError:
+        return defaults
+
+
+def get_routing_config() -> dict:
+    """
+    체크인 AI 처리 라우팅 설정 반환 ([routing] 섹션)
+
+    enabled: 로컬 신호(길이, 토큰 추정, 규칙 추출 커버리지, 정리 여부)로 호출 단계를 줄일지 여부
+    rules_max_tokens: 이 토큰 수 이하면 LLM 추출 없이 규칙 기반 추출만 사용
+    rules_min_coverage: 규칙 추출이 이 비율 이상의 줄을 설명하면 규칙 기반 추출만 사용
+    skip_ingest_max_tokens: 이 토큰 수 이하면 Ingestor(정리) 생략
+    ingest_token_ratio / ingest_min_tokens / ingest_max_tokens: Ingestor max_tokens = 입력 토큰 × ratio (min~max)
+    """
+    defaults = {
+        "enabled": True,
+        "rules_max_tokens": 12,
+        "rules_min_coverage": 1.0,
+        "skip_ingest_max_tokens": 60,
+        "ingest_token_ratio": 1.5,
+        "ingest_min_tokens": 256,
+        "ingest_max_tokens": 2000
+    }
+    try:
+        section = st.secrets["routing"]
+        return {key: section.get(key, value) for key, value in defaults.items()}
+    except KeyError:
+        return defaults
+
+
+def get_rag_config() -> dict:
+    """
+    RAG 설정 반환
+
+    vector_backend:
+        - "pgvector": Supabase search_memories RPC (기본값)
+        - "memory": 프로세스 내 사용자별 NumPy 인덱스 (정확한 top-k)
+    hnsw_ef_search:
+        - HNSW 검색 후보 수 (sql/memory_embeddings_hnsw.sql 적용 후 사용, None이면 DB 기본값)
+    embedding_profile:
+        - "1536_f32" (기본값) / "768_f16" / "512_f16" (sql/memory_embeddings_halfvec.sql 필요)
+    rescore / rescore_factor:
+        - 축소 프로필에서 상위 top_k × rescore_factor 후보를 1536차원 원본으로 재점수
+    """
+    try:
+        rag = st.secrets["rag"]
+        return {
+            "vector_backend": rag.get("vector_backend", "pgvector"),
+            "hnsw_ef_search": rag.get("hnsw_ef_search"),
+            "embedding_profile": rag.get("embedding_profile", "1536_f32"),
+            "rescore": rag.get("rescore", False),
+            "rescore_factor": rag.get("rescore_factor", 4)
+        }
+    except KeyError:
+        return {
+            "vector_backend": "pgvector",
+            "hnsw_ef_search": None,
+            "embedding_profile": "1536_f32",
+            "rescore": False,
+            "rescore_factor": 4
+        }
+
+
 # === 현재 사용자 ID (인증 기반) ===
 def get_current_user_id() -> str:
     """
@@ -106,4 +301,3 @@ def get_current_user_id() -> str:
         return st.session_state["user_id"]
     
     return None
-
@@ -2,78 +2,15 @@
 ReflectOS - 데모 데이터 생성
 Settings 페이지에서 테스트용 데이터를 생성/삭제
 """
-import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import streamlit as st
+from lib.rule_extraction import extract_by_rules_batch
 
 # 데모 데이터 구분 태그
 DEMO_TAG = "__demo__"
 
 
-# ============================================
-# (1) 규칙 기반 Extraction (Checkin.py 로직 복사)
-# ============================================
-
-def extract_by_rules(content: str) -> Dict[str, List[str]]:
-    """
-    규칙 기반으로 텍스트에서 구조화된 정보 추출
-    (pages/2_Checkin.py의 로직과 동일)
-    
-    Args:
-        content: 체크인 내용 텍스트
-    
-    Returns:
-        추출된 정보 딕셔너리
-    """
-    lines = content.strip().split('\n')
-    
-    tasks = []
-    obstacles = []
-    projects = []
-    insights = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # task: '-' 또는 '•'로 시작하는 줄
-        if line.startswith('-') or line.startswith('•') or line.startswith('*'):
-            task_text = line.lstrip('-•* ').strip()
-            if task_text:
-                tasks.append(task_text)
-        
-        # obstacle: '!' 시작 또는 부정적 키워드 포함
-        obstacle_keywords = ['문제', '어려움', '힘들', '막혀', '안됨', '실패', '오류', '버그']
-        if line.startswith('!') or any(kw in line for kw in obstacle_keywords):
-            obstacle_text = line.lstrip('! ').strip()
-            if obstacle_text and obstacle_text not in obstacles:
-                obstacles.append(obstacle_text)
-        
-        # project: '#프로젝트명' 형태
-        project_matches = re.findall(r'#(\w+)', line)
-        for proj in project_matches:
-            if proj not in projects:
-                projects.append(proj)
-        
-        # insight: 인사이트 키워드 포함
-        insight_keywords = ['💡', '인사이트', '배움', '깨달음', '발견', '아이디어']
-        if any(kw in line for kw in insight_keywords):
-            insight_text = line.strip()
-            if insight_text and insight_text not in insights:
-                insights.append(insight_text)
-    
-    return {
-        "tasks": tasks,
-        "obstacles": obstacles,
-        "projects": projects,
-        "insights": insights,
-        "people": [],
-        "emotions": []
-    }
-
-
 # ============================================
 # (2) 데모 데이터 항목 생성
 # ============================================
@@ -259,6 +196,10 @@ def delete_demo_data() -> Dict[str, Any]:
             except Exception as e:
                 result["errors"].append(f"embedding 삭제 오류: {e}")
         
+        # 인메모리 벡터 인덱스 폐기 (memory 백엔드 사용 시)
+        from lib.vector_store import invalidate_memory_index
+        invalidate_memory_index(user_id)
+        
         # 4. 관련 memory_chunks 삭제
         for checkin_id in demo_ids:
             try:
@@ -327,11 +268,12 @@ def seed_demo_data(
             result["deleted_demo_checkins"] = delete_result.get("deleted_checkins", 0)
             result["errors"].extend(delete_result.get("errors", []))
         
-        # B) 데모 항목 생성
+        # B) 데모 항목 생성 + 규칙 기반 추출 (한 번에)
         items = build_demo_items(days)
+        all_extractions = extract_by_rules_batch(item["content"] for item in items)
         
         # C) 각 항목 저장
-        for item in items:
+        for item, extractions in zip(items, all_extractions):
             try:
                 # 1) 체크인 저장
                 checkin_data = insert_checkin(
@@ -349,10 +291,7 @@ def seed_demo_data(
                 result["inserted_checkins"] += 1
                 checkin_id = checkin_data.get("id")
                 
-                # 2) 규칙 기반 추출
-                extractions = extract_by_rules(item["content"])
-                
-                # 3) extraction 저장
+                # 2) extraction 저장 (규칙 기반 추출은 B에서 완료)
                 extraction_result = insert_extraction(
                     source_type="checkin",
                     source_id=checkin_id,
@@ -364,15 +303,21 @@ def seed_demo_data(
                 if extraction_result:
                     result["inserted_extractions"] += 1
                 
-                # 4) RAG 인덱싱 (also_index=True인 경우)
+                # 3) RAG 인덱싱 (also_index=True인 경우)
                 if also_index:
                     try:
                         # 체크인 인덱싱
-                        if index_checkin(checkin_id, item["content"], extractions):
+                        if index_checkin(
+                            checkin_id, item["content"], extractions,
+                            is_demo=True, created_at=item["created_at"]
+                        ):
                             result["indexed"] += 1
                         
                         # extraction 인덱싱
-                        index_extraction(checkin_id, "demo_rule", extractions)
+                        index_extraction(
+                            checkin_id, "demo_rule", extractions,
+                            is_demo=True, created_at=item["created_at"]
+                        )
                         
                     except Exception as e:
                         result["errors"].append(f"인덱싱 오류: {e}")
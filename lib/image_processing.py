@@ -0,0 +1,92 @@
+"""
+ReflectOS - 이미지 전처리
+Vision 분석 전 EXIF 회전 보정, 메타데이터 제거, 해상도 축소, WebP/JPEG 재인코딩
+"""
+import base64
+from io import BytesIO
+from typing import Dict, Any
+from PIL import Image, ImageOps
+
+
+# ============================================
+# Vision 모델 해상도 기준
+# ============================================
+
+# detail=high 처리 방식: 2048×2048 안에 맞춘 뒤 짧은 변을 768로 축소
+# → 이보다 큰 이미지는 업로드해도 분석 품질이 같으므로 미리 줄여서 전송
+VISION_MAX_SIDE = 2048
+VISION_SHORT_SIDE = 768
+
+# 재인코딩 품질
+WEBP_QUALITY = 85
+JPEG_QUALITY = 85
+
+
+def vision_target_size(width: int, height: int) -> tuple:
+    """Vision 모델이 실제로 사용하는 해상도로 축소한 (width, height) — 확대는 하지 않음"""
+    scale = min(
+        1.0,
+        VISION_MAX_SIDE / max(width, height),
+        VISION_SHORT_SIDE / min(width, height)
+    )
+    return max(int(round(width * scale)), 1), max(int(round(height * scale)), 1)
+
+
+def prepare_image_for_vision(image_bytes: bytes, image_format: str = "webp") -> Dict[str, Any]:
+    """
+    Vision 분석용 이미지 전처리
+
+    - EXIF Orientation 반영 (휴대폰 세로 사진이 눕지 않도록)
+    - 재인코딩으로 EXIF/GPS 등 메타데이터 제거
+    - Vision 모델 유효 해상도로 축소
+    - WebP(기본) 또는 JPEG로 재인코딩
+
+    Args:
+        image_bytes: 원본 이미지 바이트
+        image_format: "webp" 또는 "jpeg"
+
+    Returns:
+        {"bytes", "mime_type", "width", "height", "original_size", "original_width", "original_height"}
+
+    Raises:
+        ValueError: 이미지로 읽을 수 없을 때
+    """
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {e}")
+
+    original_width, original_height = image.size
+    image = ImageOps.exif_transpose(image)
+
+    target = vision_target_size(*image.size)
+    if target != image.size:
+        image = image.resize(target, Image.Resampling.LANCZOS)
+
+    buf = BytesIO()
+    if image_format == "jpeg":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        mime_type = "image/jpeg"
+    else:
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.save(buf, format="WEBP", quality=WEBP_QUALITY, method=4)
+        mime_type = "image/webp"
+
+    return {
+        "bytes": buf.getvalue(),
+        "mime_type": mime_type,
+        "width": image.size[0],
+        "height": image.size[1],
+        "original_size": len(image_bytes),
+        "original_width": original_width,
+        "original_height": original_height
+    }
+
+
+def to_data_url(data: bytes, mime_type: str) -> str:
+    """바이트 → base64 data URL (Vision API image_url용)"""
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
@@ -0,0 +1,313 @@
+"""
+ReflectOS - LLM provider
+openai_client의 모든 호출(채팅, JSON 채팅, 스트리밍, 임베딩, STT, Vision)이 사용하는 provider 선택
+
+provider 인터페이스는 OpenAI SDK 1.x 중 이 앱이 쓰는 부분과 같다.
+    chat.completions.create(model, messages, temperature, max_tokens, response_format, stream, stream_options)
+    embeddings.create(model, input, dimensions)
+    audio.transcriptions.create(model, file, language, prompt)
+→ openai_client의 호출 코드, 제한기(LimitedOpenAI), 계측, 캐시는 provider와 무관하게 그대로 동작
+
+provider:
+    openai  : OpenAI SDK 클라이언트 (기본)
+    offline : 네트워크 없이 결정적 응답 — 해시 시드 임베딩, 스키마 템플릿 JSON, 지연 주입
+              API 키 없는 환경에서 RAG/체크인/리포트 경로의 앱 자체 오버헤드를 재현 가능하게 측정하는 용도
+"""
+import hashlib
+import json
+import re
+import time
+import numpy as np
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Any, Iterator
+from lib.utils import estimate_tokens
+
+
+# ============================================
+# JSON Schema 템플릿
+# ============================================
+
+def template_from_schema(schema: Dict[str, Any], name: str = "") -> Any:
+    """
+    JSON Schema → 형식이 맞는 결정적 예시 값
+
+    - object: 모든 properties 채움 (strict 스키마의 required 충족)
+    - array: items 템플릿 1개
+    - string: enum 첫 값, "HH:MM" 설명이면 시각, 그 외 "<필드명> (offline)"
+    """
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        return {key: template_from_schema(sub, key) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [template_from_schema(schema.get("items", {}), name)]
+    if kind == "string":
+        if "HH:MM" in schema.get("description", ""):
+            return "10:00" if "end" in name else "09:00"
+        return f"{name or 'text'} (offline)"
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return False
+    return None
+
+
+# ============================================
+# offline provider
+# ============================================
+
+# 모델별 기본 임베딩 차원 (dimensions 파라미터가 없을 때)
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+_WORD_PATTERN = re.compile(r"[가-힣]+|[a-zA-Z]+|\d+")
+
+
+def _digest(*parts: str) -> bytes:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).digest()
+
+
+@lru_cache(maxsize=50_000)
+def _token_vector(seed: str, model: str, token: str, dims: int) -> np.ndarray:
+    """토큰별 해시 시드 난수 벡터 (feature hashing)"""
+    rng = np.random.default_rng(int.from_bytes(_digest(seed, model, token)[:8], "little"))
+    return rng.standard_normal(dims).astype(np.float32)
+
+
+def offline_embedding(text: str, model: str, dims: int, seed: str) -> List[float]:
+    """
+    결정적 임베딩: 단어(와 한글 2-gram) 해시 벡터의 합을 L2 정규화
+
+    같은 텍스트는 항상 같은 벡터, 단어를 공유하는 텍스트는 코사인 유사도가 높다
+    → 검색 결과가 의미 있게 나와 RAG 경로 전체(임계값, 재정렬)를 실제와 비슷하게 통과
+    """
+    tokens = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and re.match(r"[가-힣]", word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+
+    if not tokens:
+        tokens = [text or "<empty>"]
+
+    vector = np.zeros(dims, dtype=np.float32)
+    for token in tokens:
+        vector += _token_vector(seed, model, token, dims)
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector.tolist()
+
+
+def _to_namespace(value: Any) -> Any:
+    """dict/list → 속성 접근 가능한 SDK 응답 모양 (response.choices[0].message.content)"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def _message_text(content: Any) -> str:
+    """메시지 content (문자열 또는 Vision 파트 목록) → 텍스트"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+class OfflineProvider:
+    """
+    네트워크 없이 동작하는 결정적 provider
+
+    Args:
+        latency_ms: 호출마다 주입할 고정 지연
+        jitter_ms: 추가 지연 상한 (입력 해시로 결정 → 같은 입력은 같은 지연)
+        stream_chunk_ms: 스트리밍 청크 사이 지연
+        seed: 해시 시드
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        stream_chunk_ms: float = 0.0,
+        seed: str = "reflectos"
+    ):
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.stream_chunk_ms = float(stream_chunk_ms)
+        self.seed = str(seed)
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_chat_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._create_transcription))
+
+    # --- 공통 ---
+
+    def _sleep(self, key: str):
+        delay = self.latency_ms
+        if self.jitter_ms > 0:
+            fraction = int.from_bytes(_digest(self.seed, "jitter", key)[:4], "little") / 2**32
+            delay += self.jitter_ms * fraction
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    # --- chat.completions ---
+
+    def chat_completion_body(
+        self,
+        model: str,
+        messages: List[dict],
+        response_format: Optional[Dict[str, Any]] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """chat.completions 응답 본문 (dict, Batch 출력 형식과 같음) — 지연 주입 없음"""
+        prompt = "\n".join(_message_text(m.get("content")) for m in messages)
+        key = _digest(self.seed, model, prompt).hex()
+
+        if response_format and response_format.get("type") == "json_schema":
+            schema = response_format.get("json_schema", {}).get("schema", {})
+            content = json.dumps(template_from_schema(schema), ensure_ascii=False)
+        elif response_format and response_format.get("type") == "json_object":
+            content = "{}"
+        else:
+            last_user = next(
+                (_message_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), ""
+            )
+            content = f"[offline {key[:8]}] {last_user[:400]}".strip()
+            if max_tokens:
+                # 한국어 기준 대략 1.5토큰/글자 → 글자 수 상한으로 근사
+                content = content[:max(int(max_tokens / 1.5), 1)]
+
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = estimate_tokens(content)
+        return {
+            "id": f"chatcmpl-offline-{key[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    def _create_chat_completion(self, stream: bool = False, stream_options: Optional[dict] = None, **kwargs: Any):
+        body = self.chat_completion_body(**kwargs)
+        self._sleep(body["id"])
+        if stream:
+            return self._stream_chunks(body, bool((stream_options or {}).get("include_usage")))
+        return _to_namespace(body)
+
+    def _stream_chunks(self, body: Dict[str, Any], include_usage: bool) -> Iterator[Any]:
+        content = body["choices"][0]["message"]["content"]
+        pieces = re.findall(r"\S+\s*|\s+", content) or [""]
+        for piece in pieces:
+            if self.stream_chunk_ms > 0:
+                time.sleep(self.stream_chunk_ms / 1000.0)
+            yield _to_namespace({
+                "id": body["id"],
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                "usage": None
+            })
+        yield _to_namespace({
+            "id": body["id"],
+            "choices": [{"index": 0, "delta": {"content": None}, "finish_reason": "stop"}],
+            "usage": None
+        })
+        if include_usage:
+            yield _to_namespace({"id": body["id"], "choices": [], "usage": body["usage"]})
+
+    # --- embeddings ---
+
+    def _create_embeddings(
+        self,
+        model: str,
+        input: Any,
+        dimensions: Optional[int] = None,
+        **kwargs: Any
+    ):
+        texts = [input] if isinstance(input, str) else list(input)
+        dims = dimensions or EMBEDDING_DIMENSIONS.get(model, 1536)
+        self._sleep(_digest(self.seed, model, *texts).hex())
+        tokens = sum(estimate_tokens(t) for t in texts)
+        return _to_namespace({
+            "object": "list",
+            "model": model,
+            "data": [
+                {"object": "embedding", "index": i, "embedding": offline_embedding(text, model, dims, self.seed)}
+                for i, text in enumerate(texts)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    # --- audio.transcriptions ---
+
+    def _create_transcription(self, model: str, file: Any, **kwargs: Any):
+        if isinstance(file, tuple):
+            data = file[1]
+        elif hasattr(file, "read"):
+            data = file.read()
+        else:
+            data = bytes(file)
+        key = hashlib.sha256(data).hexdigest()
+        self._sleep(key)
+        # 길이는 24kbps 음성 기준으로 근사 (전사 비용 계측용)
+        seconds = round(len(data) / 3000.0, 2)
+        return _to_namespace({
+            "text": f"[offline transcript {key[:8]}]",
+            "usage": {"type": "duration", "seconds": seconds}
+        })
+
+
+# ============================================
+# provider 생성
+# ============================================
+
+def create_provider(config: Dict[str, Any], api_key: Optional[str] = None) -> Optional[Any]:
+    """
+    설정에 맞는 provider 생성
+
+    Args:
+        config: get_llm_provider_config() 결과
+        api_key: OpenAI API 키 (openai provider)
+
+    Returns:
+        OpenAI SDK 호환 클라이언트 (openai provider인데 키가 없으면 None)
+
+    Raises:
+        ValueError: 알 수 없는 provider 이름
+    """
+    name = config.get("provider", "openai")
+
+    if name == "offline":
+        return OfflineProvider(
+            latency_ms=config.get("offline_latency_ms", 0.0),
+            jitter_ms=config.get("offline_jitter_ms", 0.0),
+            stream_chunk_ms=config.get("offline_stream_chunk_ms", 0.0),
+            seed=config.get("offline_seed", "reflectos")
+        )
+
+    if name == "openai":
+        if not api_key:
+            return None
+        from openai import OpenAI
+        # 재시도는 제한기가 담당하므로 SDK 자체 재시도는 끈다
+        return OpenAI(api_key=api_key, max_retries=0)
+
+    raise ValueError(f"알 수 없는 LLM provider: {name} (가능: openai, offline)")
@@ -5,7 +5,7 @@ import streamlit as st
 from typing import List
 import logging
 from lib.config import get_supabase_client
-from lib.supabase_db import get_profile, upsert_profile
+from lib.supabase_db import get_profile, update_profile_settings
 
 # 로깅 설정 (Streamlit Cloud 로그에 출력)
 logger = logging.getLogger(__name__)
@@ -108,20 +108,8 @@ def set_active_modules(user_id: str, active: List[str]) -> tuple[bool, str]:
         
         logger.info(f"[MODULE] set_active_modules 시작: user_id={user_id}, selected={active}, valid={valid_modules}")
         
-        # 프로필 조회 또는 생성
-        profile = get_profile(user_id=user_id)
-        current_settings = (profile or {}).get("settings", {})
-        
-        # settings가 dict가 아니면 빈 dict로 초기화
-        if not isinstance(current_settings, dict):
-            logger.warning(f"[MODULE] set_active_modules: current_settings가 dict가 아님: {type(current_settings)}. 빈 dict로 초기화.")
-            current_settings = {}
-        
-        # active_modules 업데이트
-        current_settings["active_modules"] = valid_modules
-        
-        # 프로필 저장
-        result = upsert_profile({"settings": current_settings}, user_id=user_id)
+        # active_modules만 업데이트 (DB 최신 settings 기준 병합 → 다른 세션에서 저장한 키 유지, 프로필 없으면 생성)
+        result = update_profile_settings({"active_modules": valid_modules}, user_id=user_id, create_missing=True)
         
         if result is None:
             error_msg = "프로필 저장 실패 (result=None)"
@@ -3,64 +3,186 @@ ReflectOS - OpenAI 클라이언트
 GPT, Embeddings, Whisper(STT), Structured Outputs 통합
 """
 import json
+import threading
+import time
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from openai import OpenAI
-from lib.config import get_openai_api_key
-from typing import Optional, List, Dict, Any
+from lib.config import get_openai_api_key, get_llm_provider_config, get_stt_config
+from lib.telemetry import track_llm_call, record_llm_call
+from typing import Optional, List, Dict, Any, Iterator, Callable, Sequence, Tuple
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # Streamlit 내부 경로 변경 대비
+    add_script_run_ctx = None
+    get_script_run_ctx = None
 
 
 @st.cache_resource
 def get_openai_client() -> Optional[OpenAI]:
-    """OpenAI 클라이언트 싱글톤"""
-    api_key = get_openai_api_key()
-    if not api_key:
+    """
+    LLM 클라이언트 싱글톤 ([llm] provider 설정: openai 또는 offline)
+    모든 호출이 프로세스 전역 제한기(요청/토큰 버킷, 동시 호출 상한, 백오프 재시도)를 거치도록 감싼다
+    (재시도는 제한기가 담당하므로 SDK 자체 재시도는 끈다)
+    """
+    from lib.rate_limit import LimitedOpenAI, get_rate_limiter
+    from lib.llm_providers import create_provider
+    
+    provider = create_provider(get_llm_provider_config(), get_openai_api_key())
+    if provider is None:
         return None
-    return OpenAI(api_key=api_key)
+    return LimitedOpenAI(provider, get_rate_limiter())
 
 
 def chat_completion(
     messages: List[dict],
     model: str = "gpt-4o-mini",
     temperature: float = 0.7,
-    max_tokens: int = 1000
+    max_tokens: int = 1000,
+    use_cache: bool = True,
+    cache_site: str = "chat"
 ) -> Optional[str]:
     """
     ChatGPT 응답 생성
+    같은 (model, messages, temperature, max_tokens) 요청은 LLM 응답 캐시에서 반환
     
     Args:
         messages: [{"role": "system/user/assistant", "content": "..."}]
         model: 모델명
         temperature: 창의성 (0.0 ~ 1.0)
         max_tokens: 최대 토큰 수
+        use_cache: False면 캐시를 건너뛰고 항상 API 호출 (다시 생성 등)
+        cache_site: 캐시 적중률 집계용 호출 지점 이름
     
     Returns:
         응답 텍스트
     """
+    from lib.cache import llm_cache_key, get_cached_llm_response, put_cached_llm_response
+    
+    cache_key = llm_cache_key(model, messages, None, temperature, max_tokens)
+    
     try:
+        if use_cache:
+            lookup_started = time.perf_counter()
+            cached = get_cached_llm_response(cache_key, cache_site)
+            if cached is not None:
+                record_llm_call(cache_site, model, (time.perf_counter() - lookup_started) * 1000, cache_hit=True)
+                return cached
+        
         client = get_openai_client()
         if not client:
             st.warning("OpenAI API 키가 설정되지 않았습니다.")
             return None
         
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
+        with track_llm_call(cache_site, model) as call:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            call["usage"] = response.usage
+        
+        content = response.choices[0].message.content
+        if use_cache:
+            put_cached_llm_response(cache_key, content)
         
-        return response.choices[0].message.content
+        return content
         
     except Exception as e:
         st.error(f"ChatGPT 호출 실패: {e}")
         return None
 
 
+def chat_completion_stream(
+    messages: List[dict],
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    use_cache: bool = True,
+    cache_site: str = "chat"
+) -> Iterator[str]:
+    """
+    ChatGPT 응답 스트리밍 (st.write_stream / SSE용)
+    캐시 적중 시 전체 응답을 한 번에 yield, 미스면 스트림 완료 후 캐시에 저장
+    (chat_completion과 같은 캐시 키를 사용)
+    
+    Args:
+        messages: [{"role": "system/user/assistant", "content": "..."}]
+        model: 모델명
+        temperature: 창의성 (0.0 ~ 1.0)
+        max_tokens: 최대 토큰 수
+        use_cache: False면 캐시를 건너뛰고 항상 API 호출
+        cache_site: 캐시 적중률 집계용 호출 지점 이름
+    
+    Yields:
+        응답 텍스트 조각 (delta)
+    """
+    from lib.cache import llm_cache_key, get_cached_llm_response, put_cached_llm_response
+    
+    cache_key = llm_cache_key(model, messages, None, temperature, max_tokens)
+    
+    try:
+        if use_cache:
+            lookup_started = time.perf_counter()
+            cached = get_cached_llm_response(cache_key, cache_site)
+            if cached is not None:
+                record_llm_call(cache_site, model, (time.perf_counter() - lookup_started) * 1000, cache_hit=True)
+                yield cached
+                return
+        
+        client = get_openai_client()
+        if not client:
+            st.warning("OpenAI API 키가 설정되지 않았습니다.")
+            return
+        
+        parts = []
+        finished = False
+        with track_llm_call(cache_site, model) as call:
+            started = time.perf_counter()
+            stream = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            for chunk in stream:
+                # include_usage: 마지막 청크는 choices 없이 usage만 포함
+                if getattr(chunk, "usage", None):
+                    call["usage"] = chunk.usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta.content
+                if delta:
+                    if not parts:
+                        call["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    parts.append(delta)
+                    yield delta
+                if choice.finish_reason:
+                    finished = True
+        
+        # 끝까지 받은 응답만 캐시 (중간에 끊긴 응답은 저장하지 않음)
+        if use_cache and finished and parts:
+            put_cached_llm_response(cache_key, "".join(parts))
+        
+    except Exception as e:
+        st.error(f"ChatGPT 스트리밍 실패: {e}")
+        return
+
+
 def chat_completion_json(
     messages: List[dict],
     json_schema: Dict[str, Any],
     model: str = "gpt-4o-mini",
-    temperature: float = 0.3
+    temperature: float = 0.3,
+    schema_name: str = "extraction_result",
+    use_cache: bool = True,
+    cache_site: str = "chat_json"
 ) -> Optional[Dict]:
     """
     Structured Outputs를 사용한 JSON 응답 생성
@@ -70,33 +192,53 @@ def chat_completion_json(
         json_schema: JSON Schema 정의 (response_format에 사용)
         model: 모델명 (gpt-4o-mini 권장)
         temperature: 낮은 값 권장 (구조화된 출력용)
+        schema_name: response_format에 표시할 스키마 이름
+        use_cache: False면 캐시를 건너뛰고 항상 API 호출
+        cache_site: 캐시 적중률 집계용 호출 지점 이름
     
     Returns:
         파싱된 JSON 딕셔너리
     """
+    from lib.cache import llm_cache_key, get_cached_llm_response, put_cached_llm_response
+    
+    cache_key = llm_cache_key(model, messages, {"name": schema_name, "schema": json_schema}, temperature, None)
+    
     try:
+        if use_cache:
+            lookup_started = time.perf_counter()
+            cached = get_cached_llm_response(cache_key, cache_site)
+            if cached is not None:
+                record_llm_call(cache_site, model, (time.perf_counter() - lookup_started) * 1000, cache_hit=True)
+                return cached
+        
         client = get_openai_client()
         if not client:
             st.warning("OpenAI API 키가 설정되지 않았습니다.")
             return None
         
         # Structured Outputs 사용 (response_format)
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "extraction_result",
-                    "strict": True,
-                    "schema": json_schema
+        with track_llm_call(cache_site, model) as call:
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": schema_name,
+                        "strict": True,
+                        "schema": json_schema
+                    }
                 }
-            }
-        )
+            )
+            call["usage"] = response.usage
         
         content = response.choices[0].message.content
-        return json.loads(content)
+        data = json.loads(content)
+        if use_cache:
+            put_cached_llm_response(cache_key, data)
+        
+        return data
         
     except json.JSONDecodeError as e:
         st.error(f"JSON 파싱 실패: {e}")
@@ -106,12 +248,13 @@ def chat_completion_json(
         return None
 
 
-def ingest_text(raw_text: str) -> Optional[str]:
+def ingest_text(raw_text: str, max_tokens: int = 2000) -> Optional[str]:
     """
     Ingestor: 원본 텍스트를 정리/정규화
     
     Args:
         raw_text: 사용자가 입력한 원본 텍스트
+        max_tokens: 출력 토큰 상한 (라우팅에서 입력 길이에 맞춰 축소)
     
     Returns:
         정리된 clean_text
@@ -123,7 +266,7 @@ def ingest_text(raw_text: str) -> Optional[str]:
         {"role": "user", "content": raw_text}
     ]
     
-    return chat_completion(messages, temperature=0.3, max_tokens=2000)
+    return chat_completion(messages, temperature=0.3, max_tokens=max_tokens, cache_site="ingest")
 
 
 def extract_structured_data(text: str) -> Optional[Dict]:
@@ -144,14 +287,20 @@ def extract_structured_data(text: str) -> Optional[Dict]:
             "emotions": [...]
         }
     """
-    from lib.prompts import EXTRACTOR_SYSTEM_PROMPT, EXTRACTOR_JSON_SCHEMA
+    from lib.prompts import EXTRACTOR_JSON_SCHEMA
     
-    messages = [
+    messages = _extractor_messages(text)
+    return chat_completion_json(messages, EXTRACTOR_JSON_SCHEMA, temperature=0.2, cache_site="extract")
+
+
+def _extractor_messages(text: str) -> List[dict]:
+    """Extractor 메시지 구성 (배치 보강 작업에서도 같은 프롬프트 사용)"""
+    from lib.prompts import EXTRACTOR_SYSTEM_PROMPT
+    
+    return [
         {"role": "system", "content": EXTRACTOR_SYSTEM_PROMPT},
         {"role": "user", "content": f"다음 체크인에서 정보를 추출해주세요:\n\n{text}"}
     ]
-    
-    return chat_completion_json(messages, EXTRACTOR_JSON_SCHEMA, temperature=0.2)
 
 
 def generate_reflection(
@@ -170,6 +319,21 @@ def generate_reflection(
     Returns:
         회고 텍스트
     """
+    messages = _reflection_messages(checkin_text, context)
+    return chat_completion(messages, temperature=0.7, max_tokens=500, cache_site="reflect")
+
+
+def generate_reflection_stream(
+    checkin_text: str,
+    context: str = None
+) -> Iterator[str]:
+    """generate_reflection의 스트리밍 버전 (st.write_stream용)"""
+    messages = _reflection_messages(checkin_text, context)
+    return chat_completion_stream(messages, temperature=0.7, max_tokens=500, cache_site="reflect")
+
+
+def _reflection_messages(checkin_text: str, context: str = None) -> List[dict]:
+    """Reflector 메시지 구성"""
     from lib.prompts import REFLECTOR_SYSTEM_PROMPT
     
     user_message = f"체크인 내용:\n{checkin_text}"
@@ -177,12 +341,10 @@ def generate_reflection(
     if context:
         user_message += f"\n\n관련 과거 기록:\n{context}"
     
-    messages = [
+    return [
         {"role": "system", "content": REFLECTOR_SYSTEM_PROMPT},
         {"role": "user", "content": user_message}
     ]
-    
-    return chat_completion(messages, temperature=0.7, max_tokens=500)
 
 
 def generate_weekly_report(checkins: List[Dict]) -> Optional[str]:
@@ -195,6 +357,18 @@ def generate_weekly_report(checkins: List[Dict]) -> Optional[str]:
     Returns:
         주간 리포트 텍스트
     """
+    messages = _weekly_report_messages(checkins)
+    return chat_completion(messages, temperature=0.7, max_tokens=1000, cache_site="weekly_report")
+
+
+def generate_weekly_report_stream(checkins: List[Dict]) -> Iterator[str]:
+    """generate_weekly_report의 스트리밍 버전 (st.write_stream용)"""
+    messages = _weekly_report_messages(checkins)
+    return chat_completion_stream(messages, temperature=0.7, max_tokens=1000, cache_site="weekly_report")
+
+
+def _weekly_report_messages(checkins: List[Dict]) -> List[dict]:
+    """주간 회고 메시지 구성"""
     from lib.prompts import WEEKLY_REFLECTOR_PROMPT
     
     # 체크인 요약 텍스트 생성
@@ -207,12 +381,10 @@ def generate_weekly_report(checkins: List[Dict]) -> Optional[str]:
     
     combined_text = "\n---\n".join(checkin_summary)
     
-    messages = [
+    return [
         {"role": "system", "content": WEEKLY_REFLECTOR_PROMPT},
         {"role": "user", "content": f"이번 주 체크인 기록:\n\n{combined_text}"}
     ]
-    
-    return chat_completion(messages, temperature=0.7, max_tokens=1000)
 
 
 def suggest_time_blocks(
@@ -248,37 +420,189 @@ def suggest_time_blocks(
 """}
     ]
     
-    return chat_completion_json(messages, PLANNER_JSON_SCHEMA, temperature=0.5)
+    return chat_completion_json(messages, PLANNER_JSON_SCHEMA, temperature=0.5, cache_site="planner")
 
 
-def create_embedding(text: str, model: str = "text-embedding-3-small") -> Optional[List[float]]:
+def _embedding_cache_model(model: str, dimensions: Optional[int]) -> str:
+    """차원 축소 요청은 캐시 키를 분리 (model@dims)"""
+    return f"{model}@{dimensions}" if dimensions else model
+
+
+def create_embedding(
+    text: str,
+    model: str = "text-embedding-3-small",
+    use_cache: bool = True,
+    dimensions: Optional[int] = None
+) -> Optional[List[float]]:
     """
     텍스트 임베딩 생성 (RAG용)
+    동일 텍스트는 임베딩 캐시(LRU → 디스크)에서 바로 반환
     
     Args:
         text: 임베딩할 텍스트
         model: 임베딩 모델
+        use_cache: False면 캐시를 건너뛰고 항상 API 호출
+        dimensions: 출력 차원 (text-embedding-3 계열, None이면 모델 기본 1536)
     
     Returns:
         벡터 (float 리스트)
     """
+    from lib.cache import get_cached_embedding, put_cached_embedding
+    
+    cache_model = _embedding_cache_model(model, dimensions)
+    
     try:
+        if use_cache:
+            lookup_started = time.perf_counter()
+            cached = get_cached_embedding(text, cache_model)
+            if cached is not None:
+                record_llm_call("embedding", model, (time.perf_counter() - lookup_started) * 1000, cache_hit=True)
+                return cached
+        
         client = get_openai_client()
         if not client:
             return None
         
-        response = client.embeddings.create(
-            model=model,
-            input=text
-        )
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        with track_llm_call("embedding", model) as call:
+            response = client.embeddings.create(
+                model=model,
+                input=text,
+                **kwargs
+            )
+            call["usage"] = response.usage
         
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        if use_cache:
+            put_cached_embedding(text, cache_model, embedding)
+        
+        return embedding
         
     except Exception as e:
         st.error(f"임베딩 생성 실패: {e}")
         return None
 
 
+# 임베딩 API 요청당 한도 (입력 개수 / 전체 토큰)
+EMBEDDING_MAX_INPUTS_PER_REQUEST = 2048
+EMBEDDING_MAX_TOKENS_PER_REQUEST = 250_000  # API 한도 300k 대비 여유분
+
+
+def _pack_embedding_requests(texts: List[str]) -> List[List[int]]:
+    """
+    임베딩 요청 묶음 구성: 요청당 입력 개수/추정 토큰 한도를 넘지 않게 인덱스를 나눔
+    
+    Returns:
+        [[texts의 인덱스, ...], ...]
+    """
+    from lib.utils import estimate_tokens
+    
+    batches = []
+    current = []
+    current_tokens = 0
+    
+    for i, text in enumerate(texts):
+        tokens = max(estimate_tokens(text), 1)
+        if current and (
+            len(current) >= EMBEDDING_MAX_INPUTS_PER_REQUEST
+            or current_tokens + tokens > EMBEDDING_MAX_TOKENS_PER_REQUEST
+        ):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+
+def create_embeddings_batch(
+    texts: List[str],
+    model: str = "text-embedding-3-small",
+    use_cache: bool = True,
+    dimensions: Optional[int] = None
+) -> List[Optional[List[float]]]:
+    """
+    여러 텍스트 임베딩을 한 번에 생성 (백필/대량 인덱싱용)
+    
+    - 캐시에 있는 텍스트와 중복 텍스트는 API로 보내지 않음
+    - 나머지는 요청당 입력 한도까지 묶어서 호출
+    
+    Args:
+        texts: 임베딩할 텍스트 리스트
+        model: 임베딩 모델
+        use_cache: False면 캐시를 건너뛰고 항상 API 호출
+        dimensions: 출력 차원 (None이면 모델 기본 1536)
+    
+    Returns:
+        texts와 같은 순서의 벡터 리스트 (실패한 항목은 None)
+    """
+    from lib.cache import get_cached_embedding, put_cached_embedding
+    
+    cache_model = _embedding_cache_model(model, dimensions)
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    
+    # 캐시 조회 + 중복 제거 (같은 텍스트는 한 번만 요청)
+    pending: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            continue  # 빈 입력은 API가 거부함
+        if use_cache:
+            cached = get_cached_embedding(text, cache_model)
+            if cached is not None:
+                results[i] = cached
+                continue
+        pending.setdefault(text, []).append(i)
+    
+    if not pending:
+        return results
+    
+    client = get_openai_client()
+    if not client:
+        return results
+    
+    unique_texts = list(pending.keys())
+    kwargs = {"dimensions": dimensions} if dimensions else {}
+    
+    for batch in _pack_embedding_requests(unique_texts):
+        batch_texts = [unique_texts[i] for i in batch]
+        try:
+            with track_llm_call("embedding_batch", model) as call:
+                call["inputs"] = len(batch_texts)
+                response = client.embeddings.create(
+                    model=model,
+                    input=batch_texts,
+                    **kwargs
+                )
+                call["usage"] = response.usage
+        except Exception as e:
+            st.error(f"임베딩 배치 생성 실패 ({len(batch_texts)}건): {e}")
+            continue
+        
+        # response.data는 입력 순서의 index를 포함
+        for item in response.data:
+            text = batch_texts[item.index]
+            embedding = item.embedding
+            for i in pending[text]:
+                results[i] = embedding
+            if use_cache:
+                put_cached_embedding(text, cache_model, embedding)
+    
+    return results
+
+
+def _transcription_seconds(response: Any) -> Optional[float]:
+    """전사 응답의 음성 길이(초) — usage(type=duration) 또는 verbose 응답의 duration"""
+    usage = getattr(response, "usage", None)
+    seconds = getattr(usage, "seconds", None) if usage is not None else None
+    if seconds is None:
+        seconds = getattr(response, "duration", None)
+    return float(seconds) if seconds is not None else None
+
+
 def transcribe_audio(
     audio_file,
     language: str = "ko"
@@ -298,11 +622,13 @@ def transcribe_audio(
         if not client:
             return None
         
-        response = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            language=language
-        )
+        with track_llm_call("transcribe", "whisper-1") as call:
+            response = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_file,
+                language=language
+            )
+            call["audio_seconds"] = _transcription_seconds(response)
         
         return response.text
         
@@ -319,6 +645,8 @@ import os
 import shutil
 import subprocess
 import tempfile
+import wave
+from io import BytesIO
 
 # OpenAI Whisper가 지원하는 확장자 목록
 ALLOWED_EXTENSIONS = {"flac", "m4a", "mp3", "mp4", "mpeg", "mpga", "oga", "ogg", "wav", "webm"}
@@ -337,6 +665,16 @@ EXT_TO_MIME = {
     "webm": "audio/webm",
 }
 
+# 같은 포맷의 다른 확장자 (매직넘버 판별 결과와 비교용)
+_AUDIO_FAMILY = {
+    "m4a": "mp4", "mp4": "mp4",
+    "mp3": "mp3", "mpeg": "mp3", "mpga": "mp3",
+    "ogg": "ogg", "oga": "ogg",
+}
+
+# Opus로 압축하면 업로드 크기가 크게 줄어드는 포맷 (비압축/무손실)
+COMPRESSIBLE_EXTENSIONS = {"wav", "flac"}
+
 # MIME 타입 → 확장자 매핑
 MIME_TO_EXT = {
     "audio/flac": "flac",
@@ -361,13 +699,108 @@ def _has_ffmpeg() -> bool:
     return shutil.which("ffmpeg") is not None
 
 
+FFMPEG_INSTALL_HINT = (
+    "FFmpeg가 설치되어 있지 않습니다. 오디오 변환을 위해 설치가 필요합니다.\n"
+    "설치 방법:\n"
+    "  - Ubuntu/Debian: sudo apt-get update && sudo apt-get install -y ffmpeg\n"
+    "  - macOS: brew install ffmpeg\n"
+    "  - Windows: https://ffmpeg.org/download.html 에서 다운로드"
+)
+
+# 변환 출력 / 무음 탐지 입력으로 쓰는 raw PCM 형식 (16kHz, mono, 16bit LE)
+WAV_SAMPLE_RATE = 16000
+WAV_BYTES_PER_SAMPLE = 2
+RAW_PCM_ARGS = ["-f", "s16le", "-ar", str(WAV_SAMPLE_RATE), "-ac", "1"]
+
+# 파이프(비탐색) 입력으로 읽을 수 없는 컨테이너 — moov 박스가 파일 끝에 있는 MP4/M4A
+SEEKABLE_INPUT_EXTS = {"m4a", "mp4"}
+
+
+def _run_ffmpeg(
+    data: bytes,
+    in_ext: str,
+    output_args: List[str],
+    input_args: Optional[List[str]] = None,
+    timeout: int = 120
+) -> bytes:
+    """
+    FFmpeg를 stdin → stdout 파이프로 실행 (임시 파일 없이 메모리에서 변환)
+    
+    - MP4/M4A는 파이프로 읽을 수 없어 입력만 임시 파일로 전달 (출력은 항상 stdout)
+    
+    Args:
+        data: 입력 바이트
+        in_ext: 입력 확장자 (raw PCM이면 "pcm")
+        output_args: 출력 옵션 (-f 포함, 출력 대상은 자동으로 pipe:1)
+        input_args: 입력 앞에 붙일 옵션 (raw PCM 형식 지정 등)
+        timeout: 초
+    
+    Returns:
+        FFmpeg stdout 바이트
+    
+    Raises:
+        RuntimeError: FFmpeg 미설치 또는 변환 실패
+    """
+    if not _has_ffmpeg():
+        raise RuntimeError(FFMPEG_INSTALL_HINT)
+    
+    if in_ext == "pcm":
+        input_args = list(input_args or []) + RAW_PCM_ARGS
+    
+    tmpdir = None
+    stdin_data = data
+    input_target = "pipe:0"
+    if in_ext in SEEKABLE_INPUT_EXTS:
+        tmpdir = tempfile.TemporaryDirectory()
+        input_target = os.path.join(tmpdir.name, f"input.{in_ext}")
+        with open(input_target, "wb") as f:
+            f.write(data)
+        stdin_data = None
+    
+    cmd = ["ffmpeg", "-hide_banner"]
+    if stdin_data is None:
+        cmd.append("-nostdin")
+    cmd += [*(input_args or []), "-i", input_target, *output_args, "pipe:1"]
+    
+    try:
+        result = subprocess.run(
+            cmd,
+            input=stdin_data,
+            capture_output=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"FFmpeg 변환 시간 초과 ({timeout}초)")
+    except Exception as e:
+        raise RuntimeError(f"FFmpeg 실행 실패: {e}")
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    
+    if result.returncode != 0:
+        # stderr 마지막 800자
+        stderr_tail = result.stderr.decode("utf-8", errors="replace")[-800:]
+        raise RuntimeError(f"FFmpeg 변환 실패 (exit={result.returncode}):\n{stderr_tail}")
+    
+    if not result.stdout:
+        raise RuntimeError("FFmpeg 출력이 비어 있음")
+    
+    return result.stdout
+
+
+def _to_pcm_16k_mono(audio_bytes: bytes, in_ext: str) -> bytes:
+    """오디오 → raw PCM(16kHz, mono, 16bit LE) 바이트"""
+    return _run_ffmpeg(audio_bytes, in_ext, ["-vn", "-ac", "1", "-ar", str(WAV_SAMPLE_RATE), "-f", "s16le"])
+
+
 def _to_wav_16k_mono(audio_bytes: bytes, in_ext: str) -> bytes:
     """
     FFmpeg를 사용하여 오디오를 WAV(16kHz, mono, PCM) 포맷으로 변환
+    (파이프로 받은 raw PCM에 헤더를 직접 붙임 — 파이프 출력 WAV는 길이 필드가 비어 있음)
     
     Args:
         audio_bytes: 원본 오디오 바이트
-        in_ext: 입력 파일 확장자 (m4a, mp3 등)
+        in_ext: 입력 파일 확장자 (m4a, mp3 등, raw PCM이면 "pcm")
     
     Returns:
         WAV 포맷 바이트
@@ -375,56 +808,51 @@ def _to_wav_16k_mono(audio_bytes: bytes, in_ext: str) -> bytes:
     Raises:
         RuntimeError: FFmpeg 미설치 또는 변환 실패
     """
-    if not _has_ffmpeg():
-        raise RuntimeError(
-            "FFmpeg가 설치되어 있지 않습니다. WAV 변환을 위해 설치가 필요합니다.\n"
-            "설치 방법:\n"
-            "  - Ubuntu/Debian: sudo apt-get update && sudo apt-get install -y ffmpeg\n"
-            "  - macOS: brew install ffmpeg\n"
-            "  - Windows: https://ffmpeg.org/download.html 에서 다운로드"
-        )
+    pcm = audio_bytes if in_ext == "pcm" else _to_pcm_16k_mono(audio_bytes, in_ext)
+    return _pcm_to_wav(pcm)
+
+
+def _to_opus_ogg(audio_bytes: bytes, in_ext: str, bitrate: str = "24k") -> bytes:
+    """
+    오디오 → Opus/OGG (16kHz mono, 음성용 저비트레이트)
+    24kbps 기준 16kHz WAV(256kbps) 대비 약 1/10 크기
     
-    # 임시 디렉토리에서 변환 수행
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = os.path.join(tmpdir, f"input.{in_ext}")
-        output_path = os.path.join(tmpdir, "output.wav")
-        
-        # 입력 파일 저장
-        with open(input_path, "wb") as f:
-            f.write(audio_bytes)
-        
-        # FFmpeg 명령 실행: 16kHz, mono, PCM WAV
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", input_path,
-            "-ac", "1",          # mono
-            "-ar", "16000",      # 16kHz
-            "-f", "wav",         # WAV 포맷
-            output_path
-        ]
-        
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                timeout=60  # 60초 타임아웃
-            )
-        except subprocess.TimeoutExpired:
-            raise RuntimeError("FFmpeg 변환 시간 초과 (60초)")
-        except Exception as e:
-            raise RuntimeError(f"FFmpeg 실행 실패: {e}")
-        
-        if result.returncode != 0:
-            # stderr 마지막 800자
-            stderr_tail = result.stderr.decode("utf-8", errors="replace")[-800:]
-            raise RuntimeError(f"FFmpeg 변환 실패 (exit={result.returncode}):\n{stderr_tail}")
-        
-        # 출력 파일 읽기
-        if not os.path.exists(output_path):
-            raise RuntimeError("FFmpeg 출력 파일이 생성되지 않음")
-        
-        with open(output_path, "rb") as f:
-            return f.read()
+    Args:
+        audio_bytes: 원본 오디오 바이트
+        in_ext: 입력 확장자 (raw PCM이면 "pcm")
+        bitrate: Opus 비트레이트
+    
+    Returns:
+        OGG 바이트
+    """
+    return _run_ffmpeg(audio_bytes, in_ext, [
+        "-vn", "-ac", "1", "-ar", str(WAV_SAMPLE_RATE),
+        "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+        "-f", "ogg"
+    ])
+
+
+def _pcm_to_wav(pcm: bytes) -> bytes:
+    """16kHz mono 16bit PCM → WAV 바이트"""
+    buf = BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(WAV_BYTES_PER_SAMPLE)
+        wf.setframerate(WAV_SAMPLE_RATE)
+        wf.writeframes(pcm)
+    return buf.getvalue()
+
+
+def _encode_for_upload(audio_bytes: bytes, in_ext: str, stem: str, upload_format: str) -> Tuple[bytes, str, str]:
+    """
+    STT 업로드용 인코딩 ([stt] upload_format: "opus"면 Opus/OGG, 그 외는 WAV)
+    
+    Returns:
+        (바이트, 파일명, MIME 타입)
+    """
+    if upload_format == "opus":
+        return _to_opus_ogg(audio_bytes, in_ext, get_stt_config()["opus_bitrate"]), f"{stem}.ogg", "audio/ogg"
+    return _to_wav_16k_mono(audio_bytes, in_ext), f"{stem}.wav", "audio/wav"
 
 
 def _sanitize_filename(name: str) -> str:
@@ -554,18 +982,80 @@ def normalize_audio_meta(
     return (normalized_filename, normalized_mimetype, ext)
 
 
+# ============================================================
+# 미디어 분석 캐시 (같은 파일 재업로드 / Streamlit 재실행 시 재호출 방지)
+# ============================================================
+
+def _lookup_media_result(
+    key: str,
+    site: str,
+    model: str,
+    result_field: str,
+    use_mirror: bool = True
+) -> Optional[str]:
+    """
+    미디어 결과 조회: 로컬 디스크 캐시 → (설정 시) artifacts.metadata 미러
+    미러에서 찾으면 로컬 캐시에도 채워 둔다
+    
+    - 미러는 이미지 분석만 해당 (이미지 아티팩트 저장 시 media_cache_key/analysis를 함께 저장)
+    - 전사 결과는 아티팩트에 저장하지 않으므로 use_mirror=False로 로컬 캐시만 조회
+    """
+    from lib.cache import get_cached_media_result, put_cached_media_result
+    from lib.config import get_cache_config
+    
+    started = time.perf_counter()
+    cached = get_cached_media_result(key)
+    if cached is not None:
+        record_llm_call(site, model, (time.perf_counter() - started) * 1000, cache_hit=True, cache_source="local")
+        return cached
+    
+    if not use_mirror or not get_cache_config().get("media_mirror_artifacts", True):
+        return None
+    
+    try:
+        from lib.supabase_db import find_artifact_by_media_key
+        artifact = find_artifact_by_media_key(key)
+    except Exception:
+        artifact = None
+    
+    value = (artifact or {}).get("metadata", {}).get(result_field)
+    if value:
+        put_cached_media_result(key, value)
+        record_llm_call(site, model, (time.perf_counter() - started) * 1000, cache_hit=True, cache_source="artifacts")
+        return value
+    return None
+
+
+def transcription_cache_key(audio_bytes: bytes, language: str = "ko", prompt: Optional[str] = None) -> str:
+    """전사 결과 캐시 키 (로컬 미디어 캐시 전용)"""
+    from lib.cache import media_cache_key
+    return media_cache_key("transcribe", audio_bytes, model="whisper-1", language=language, prompt=prompt or "")
+
+
+def image_analysis_cache_key(image_bytes: bytes, prompt: str, model: str = "gpt-4o-mini") -> str:
+    """이미지 분석 결과 캐시 키 (artifacts.metadata.media_cache_key로도 저장)"""
+    from lib.cache import media_cache_key
+    return media_cache_key("vision", image_bytes, model=model, prompt=prompt)
+
+
 def transcribe_audio_bytes(
     audio_bytes: bytes,
     filename: Optional[str] = None,
     mimetype: Optional[str] = None,
     language: str = "ko",
-    prompt: Optional[str] = None
+    prompt: Optional[str] = None,
+    long_audio: Optional[bool] = None,
+    use_cache: bool = True
 ) -> str:
     """
     바이트 데이터로 음성을 텍스트로 변환 (Whisper) - 100% 안정화 버전
     
+    - 같은 파일(sha256)·언어·프롬프트면 미디어 캐시에서 바로 반환 (use_cache=False면 재전사)
     - STT_FORCE_WAV=1 환경변수 설정 시 항상 WAV 변환 후 STT
-    - 기본: 원본 시도 → Invalid file format 시 WAV fallback
+    - 업로드 전 매직넘버 확인: 확장자만 틀리면 이름 교정, 모르는 포맷이면 바로 변환
+    - [stt] upload_format = "opus"면 큰 WAV/FLAC은 Opus/OGG로 압축 후 업로드 (약 1/10 크기)
+    - 기본: 원본 시도 → Invalid file format 시 변환 fallback
+    - 긴 녹음: 무음 기준 구간 분할 후 병렬 변환 (transcribe_long_audio_bytes)
     
     Args:
         audio_bytes: 오디오 파일의 바이트 데이터
@@ -573,6 +1063,8 @@ def transcribe_audio_bytes(
         mimetype: MIME 타입 (optional)
         language: 언어 코드 (기본: ko)
         prompt: 전사 힌트 프롬프트 (optional)
+        long_audio: True면 구간 분할 모드, None이면 [stt] long_audio_threshold_mb 초과 시 자동
+        use_cache: False면 캐시를 건너뛰고 항상 전사
     
     Returns:
         변환된 텍스트
@@ -580,10 +1072,38 @@ def transcribe_audio_bytes(
     Raises:
         RuntimeError: STT 실패 시 상세 정보 포함
     """
+    from lib.cache import put_cached_media_result
+    
+    cache_key = transcription_cache_key(audio_bytes, language, prompt)
+    if use_cache:
+        cached = _lookup_media_result(cache_key, "transcribe", "whisper-1", "transcript", use_mirror=False)
+        if cached is not None:
+            return cached
+    
+    text = _transcribe_audio_bytes(audio_bytes, filename, mimetype, language, prompt, long_audio)
+    put_cached_media_result(cache_key, text)
+    return text
+
+
+def _transcribe_audio_bytes(
+    audio_bytes: bytes,
+    filename: Optional[str],
+    mimetype: Optional[str],
+    language: str,
+    prompt: Optional[str],
+    long_audio: Optional[bool]
+) -> str:
+    """transcribe_audio_bytes 본체 (캐시 미스 시)"""
     # 메타데이터 정규화
     norm_filename, norm_mimetype, ext = normalize_audio_meta(audio_bytes, filename, mimetype)
     bytes_len = len(audio_bytes)
     
+    # 긴 녹음: 구간 분할 병렬 변환 (Whisper 25MB 한도 회피)
+    if long_audio is None:
+        long_audio = bytes_len > get_stt_config()["long_audio_threshold_mb"] * 1024 * 1024
+    if long_audio:
+        return transcribe_long_audio_bytes(audio_bytes, filename, mimetype, language, prompt)
+    
     # OpenAI 클라이언트 확인
     client = get_openai_client()
     if not client:
@@ -593,24 +1113,17 @@ def transcribe_audio_bytes(
     
     # 내부 헬퍼: OpenAI STT 호출
     def _call_openai_stt(data: bytes, name: str, mt: str) -> str:
-        file_tuple = (name, data, mt)
-        params = {
-            "model": "whisper-1",
-            "file": file_tuple,
-            "language": language,
-        }
-        if prompt:
-            params["prompt"] = prompt
-        response = client.audio.transcriptions.create(**params)
-        return response.text
+        return _whisper_transcribe(client, data, name, mt, language, prompt)
     
-    # WAV 변환 헬퍼
-    def _convert_and_stt() -> str:
-        """WAV로 변환 후 STT 호출"""
+    # 변환 헬퍼 (FFmpeg 파이프, [stt] upload_format에 따라 Opus/OGG 또는 WAV)
+    def _convert_and_stt(upload_format: str) -> str:
+        """업로드 형식으로 변환 후 STT 호출"""
         from pathlib import Path
-        wav_bytes = _to_wav_16k_mono(audio_bytes, ext)
-        wav_name = Path(norm_filename).stem + ".wav"
-        return _call_openai_stt(wav_bytes, wav_name, "audio/wav")
+        data, name, mt = _encode_for_upload(audio_bytes, ext, Path(norm_filename).stem, upload_format)
+        return _call_openai_stt(data, name, mt)
+    
+    stt_config = get_stt_config()
+    upload_format = stt_config["upload_format"]
     
     # 환경변수: STT_FORCE_WAV=1 이면 항상 WAV 변환
     force_wav = os.environ.get("STT_FORCE_WAV", "0") == "1"
@@ -618,29 +1131,58 @@ def transcribe_audio_bytes(
     if force_wav and ext != "wav":
         # 강제 WAV 변환 모드
         try:
-            return _convert_and_stt()
+            return _convert_and_stt("wav")
         except Exception as e:
             raise RuntimeError(
                 f"STT 실패 (강제 WAV 변환 모드): {e} | "
                 f"filename={norm_filename}, mimetype={norm_mimetype}, bytes_len={bytes_len}"
             )
     
-    # 기본 흐름: 원본 시도 → 실패 시 WAV fallback
+    # 사전 판별: 매직넘버로 실제 포맷 확인 → 실패할 게 뻔한 원본 업로드 생략
+    sniffed = _sniff_ext_from_magic(audio_bytes)
+    if sniffed and _AUDIO_FAMILY.get(sniffed, sniffed) != _AUDIO_FAMILY.get(ext, ext):
+        # 확장자만 잘못된 경우: 실제 포맷 이름으로 바꿔 원본 그대로 업로드
+        from pathlib import Path
+        ext = sniffed
+        norm_filename = Path(norm_filename).stem + f".{ext}"
+        norm_mimetype = EXT_TO_MIME.get(ext, norm_mimetype)
+    
+    # Whisper가 모르는 포맷이면 바로 변환, 큰 비압축/무손실 파일은 Opus로 줄여서 업로드
+    must_convert = sniffed is None and _has_ffmpeg()
+    compress = (
+        upload_format == "opus"
+        and ext in COMPRESSIBLE_EXTENSIONS
+        and bytes_len >= int(stt_config["compress_min_kb"]) * 1024
+        and _has_ffmpeg()
+    )
+    
+    if must_convert or compress:
+        try:
+            return _convert_and_stt(upload_format if upload_format != "original" else "wav")
+        except Exception as convert_error:
+            if must_convert:
+                raise RuntimeError(
+                    f"STT 실패 (지원하지 않는 포맷 변환 실패): {convert_error} | "
+                    f"filename={norm_filename}, mimetype={norm_mimetype}, bytes_len={bytes_len}"
+                )
+            # 압축만 실패한 경우 원본 업로드로 진행
+    
+    # 기본 흐름: 원본 시도 → 실패 시 변환 fallback
     try:
         return _call_openai_stt(audio_bytes, norm_filename, norm_mimetype)
         
     except Exception as original_error:
         error_str = str(original_error).lower()
         
-        # "Invalid file format" 에러인 경우 WAV fallback 시도
+        # "Invalid file format" 에러인 경우 변환 fallback 시도
         if "invalid file format" in error_str and ext != "wav":
             try:
-                return _convert_and_stt()
+                return _convert_and_stt(upload_format if upload_format != "original" else "wav")
             except Exception as fallback_error:
                 raise RuntimeError(
-                    f"STT 실패 (원본 + WAV fallback 모두 실패)\n"
+                    f"STT 실패 (원본 + 변환 fallback 모두 실패)\n"
                     f"원본 에러: {original_error}\n"
-                    f"WAV 변환 에러: {fallback_error}\n"
+                    f"변환 에러: {fallback_error}\n"
                     f"| filename={norm_filename}, mimetype={norm_mimetype}, bytes_len={bytes_len}"
                 )
         
@@ -651,27 +1193,315 @@ def transcribe_audio_bytes(
         )
 
 
+def _whisper_transcribe(
+    client: Any,
+    data: bytes,
+    name: str,
+    mimetype: str,
+    language: str,
+    prompt: Optional[str] = None
+) -> str:
+    """Whisper 전사 1회 호출 (계측 포함)"""
+    params = {
+        "model": "whisper-1",
+        "file": (name, data, mimetype),
+        "language": language,
+    }
+    if prompt:
+        params["prompt"] = prompt
+    with track_llm_call("transcribe", "whisper-1") as call:
+        call["audio_bytes"] = len(data)
+        response = client.audio.transcriptions.create(**params)
+        call["audio_seconds"] = _transcription_seconds(response)
+    return response.text
+
+
+# ============================================================
+# 긴 녹음: 무음 기준 구간 분할 → 병렬 전사 → 겹침 제거 후 이어붙이기
+# ============================================================
+
+import re
+
+# 구간 경계에서 중복 제거할 최대 단어 수
+OVERLAP_MAX_WORDS = 30
+
+
+def _detect_silences(
+    pcm: bytes,
+    noise_db: float = -35.0,
+    min_silence: float = 0.4
+) -> List[Tuple[float, float]]:
+    """
+    FFmpeg silencedetect로 무음 구간 탐지 (raw PCM을 stdin 파이프로 전달)
+    
+    Returns:
+        [(시작 초, 끝 초), ...]
+    """
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        *RAW_PCM_ARGS,
+        "-i", "pipe:0",
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null", "-"
+    ]
+    try:
+        result = subprocess.run(cmd, input=pcm, capture_output=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError("FFmpeg 무음 탐지 시간 초과 (120초)")
+    
+    stderr = result.stderr.decode("utf-8", errors="replace")
+    starts = [float(x) for x in re.findall(r"silence_start: ([\d.]+)", stderr)]
+    ends = [float(x) for x in re.findall(r"silence_end: ([\d.]+)", stderr)]
+    return list(zip(starts, ends))
+
+
+def _plan_segments(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    segment_seconds: float,
+    overlap_seconds: float
+) -> List[Tuple[float, float]]:
+    """
+    구간 경계 결정: 목표 길이 근처의 무음 중간 지점에서 자르고,
+    목표 길이의 1.5배 안에 무음이 없으면 그 지점에서 강제로 자름
+    각 구간은 앞 구간과 overlap_seconds만큼 겹치게 시작 (경계 단어 잘림 방지)
+    
+    Returns:
+        [(시작 초, 끝 초), ...]
+    """
+    cut_candidates = [(start + end) / 2 for start, end in silences]
+    max_seconds = segment_seconds * 1.5
+    
+    cuts = []
+    position = 0.0
+    while duration - position > max_seconds:
+        window = [c for c in cut_candidates if position + segment_seconds * 0.5 <= c <= position + max_seconds]
+        if window:
+            target = position + segment_seconds
+            cut = min(window, key=lambda c: abs(c - target))
+        else:
+            cut = position + max_seconds
+        cuts.append(cut)
+        position = cut
+    
+    bounds = [0.0] + cuts + [duration]
+    return [
+        (max(bounds[i] - (overlap_seconds if i > 0 else 0.0), 0.0), bounds[i + 1])
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word).lower()
+
+
+def _merge_overlap(previous: str, current: str, max_words: int = OVERLAP_MAX_WORDS) -> str:
+    """
+    앞 구간 끝과 현재 구간 앞부분에서 겹치는 단어열을 찾아 현재 구간에서 제거
+    (구두점/대소문자 무시, 가장 긴 일치 우선)
+    """
+    prev_words = previous.split()
+    cur_words = current.split()
+    if not prev_words or not cur_words:
+        return current
+    
+    prev_norm = [_normalize_word(w) for w in prev_words[-max_words:]]
+    cur_norm = [_normalize_word(w) for w in cur_words[:max_words]]
+    
+    for size in range(min(len(prev_norm), len(cur_norm)), 0, -1):
+        if prev_norm[-size:] == cur_norm[:size] and any(prev_norm[-size:]):
+            return " ".join(cur_words[size:])
+    return current
+
+
+def stitch_transcripts(parts: List[str]) -> str:
+    """구간별 전사 결과를 순서대로 이어붙이며 경계 중복 단어 제거"""
+    merged = ""
+    for part in parts:
+        part = (part or "").strip()
+        if not part:
+            continue
+        if merged:
+            part = _merge_overlap(merged, part)
+            if part:
+                merged = f"{merged} {part}"
+        else:
+            merged = part
+    return merged
+
+
+def transcribe_long_audio_bytes(
+    audio_bytes: bytes,
+    filename: Optional[str] = None,
+    mimetype: Optional[str] = None,
+    language: str = "ko",
+    prompt: Optional[str] = None,
+    segment_seconds: Optional[float] = None,
+    overlap_seconds: Optional[float] = None,
+    max_workers: Optional[int] = None
+) -> str:
+    """
+    긴 녹음 전사: WAV 변환 → 무음 기준 구간 분할(겹침 포함) → 구간 병렬 전사 → 순서대로 이어붙이기
+    
+    - 변환은 raw PCM으로 한 번, 구간 자르기는 메모리에서 PCM 슬라이스
+    - 구간 하나는 약 segment_seconds초 ([stt] upload_format에 따라 Opus 2분 ≈ 0.4MB / WAV ≈ 3.8MB)
+    - 동시 전사 수는 max_workers, 전체 OpenAI 호출은 공용 제한기를 거침
+    
+    Args:
+        audio_bytes: 오디오 파일의 바이트 데이터
+        filename / mimetype: 원본 메타데이터 (확장자 판별용)
+        language: 언어 코드
+        prompt: 전사 힌트 프롬프트 (모든 구간에 동일 적용)
+        segment_seconds / overlap_seconds / max_workers: None이면 [stt] 설정값
+    
+    Returns:
+        전체 전사 텍스트
+    
+    Raises:
+        RuntimeError: FFmpeg 미설치, 변환 실패, 구간 전사 실패 시
+    """
+    from pathlib import Path
+    
+    config = get_stt_config()
+    segment_seconds = float(segment_seconds or config["segment_seconds"])
+    overlap_seconds = float(config["overlap_seconds"] if overlap_seconds is None else overlap_seconds)
+    max_workers = int(max_workers or config["max_workers"])
+    upload_format = config["upload_format"]
+    
+    norm_filename, norm_mimetype, ext = normalize_audio_meta(audio_bytes, filename, mimetype)
+    
+    client = get_openai_client()
+    if not client:
+        raise RuntimeError(f"OpenAI API 키 미설정 | filename={norm_filename}, bytes_len={len(audio_bytes)}")
+    
+    pcm = _to_pcm_16k_mono(audio_bytes, ext)
+    bytes_per_second = WAV_SAMPLE_RATE * WAV_BYTES_PER_SAMPLE
+    duration = len(pcm) / bytes_per_second
+    
+    silences = _detect_silences(pcm, config["silence_db"], config["min_silence_seconds"])
+    segments = _plan_segments(duration, silences, segment_seconds, overlap_seconds)
+    stem = Path(norm_filename).stem
+    
+    def _segment_stage(index: int, start: float, end: float) -> Callable[[Dict[str, Any]], str]:
+        def _transcribe(_):
+            # 샘플 경계(2바이트)에 맞춰 자르기
+            begin = int(start * WAV_SAMPLE_RATE) * WAV_BYTES_PER_SAMPLE
+            finish = int(end * WAV_SAMPLE_RATE) * WAV_BYTES_PER_SAMPLE
+            data, name, mt = _encode_for_upload(pcm[begin:finish], "pcm", f"{stem}_{index:03d}", upload_format)
+            return _whisper_transcribe(client, data, name, mt, language, prompt)
+        return _transcribe
+    
+    stages = {
+        f"segment_{i:03d}": (_segment_stage(i, start, end), [])
+        for i, (start, end) in enumerate(segments)
+    }
+    result = run_pipeline(stages, max_workers=max_workers)
+    
+    if result.errors:
+        failed = ", ".join(f"{name}: {error}" for name, error in sorted(result.errors.items()))
+        raise RuntimeError(
+            f"긴 녹음 STT 실패 ({len(result.errors)}/{len(segments)}개 구간) {failed} | "
+            f"filename={norm_filename}, duration={duration:.0f}s"
+        )
+    
+    return stitch_transcripts([result.get(name) for name in sorted(stages)])
+
+
 def analyze_image(
     image_url: str,
-    prompt: str = "이 이미지를 설명해주세요."
+    prompt: str = "이 이미지를 설명해주세요.",
+    use_cache: bool = True
 ) -> Optional[str]:
     """
     이미지 분석 (GPT-4 Vision)
+    data URL이면 디코딩한 이미지 바이트(sha256)·프롬프트 기준으로 미디어 캐시 사용
     
     Args:
-        image_url: 이미지 URL
+        image_url: 이미지 URL (https:// 또는 data:image/...;base64,...)
         prompt: 분석 프롬프트
+        use_cache: False면 캐시를 건너뛰고 항상 분석
     
     Returns:
         분석 결과 텍스트
     """
+    from lib.cache import put_cached_media_result
+    
+    cache_key = image_analysis_cache_key(_image_url_bytes(image_url), prompt)
+    
     try:
-        client = get_openai_client()
-        if not client:
-            return None
+        if use_cache:
+            cached = _lookup_media_result(cache_key, "vision", "gpt-4o-mini", "analysis")
+            if cached is not None:
+                return cached
+        
+        analysis = _vision_request(image_url, prompt)
+        put_cached_media_result(cache_key, analysis)
+        return analysis
         
+    except Exception as e:
+        st.error(f"이미지 분석 실패: {e}")
+        return None
+
+
+def analyze_image_bytes(
+    image_bytes: bytes,
+    prompt: str = "이 이미지를 설명해주세요.",
+    use_cache: bool = True
+) -> Optional[Dict]:
+    """
+    이미지 바이트 분석: 전처리(EXIF 회전, 메타데이터 제거, 축소, WebP) 후 data URL로 Vision 호출
+    Storage 공개 URL을 거치지 않아 OpenAI가 원본을 다시 내려받을 필요가 없음
+    
+    Args:
+        image_bytes: 원본 이미지 바이트
+        prompt: 분석 프롬프트
+        use_cache: False면 캐시를 건너뛰고 항상 분석
+    
+    Returns:
+        {"analysis", "cache_key", "sent_bytes", "original_bytes"} (실패 시 None)
+        캐시 키는 원본 바이트 기준 (적중 시 전처리도 생략)
+    """
+    from lib.cache import put_cached_media_result
+    from lib.image_processing import prepare_image_for_vision, to_data_url
+    
+    cache_key = image_analysis_cache_key(image_bytes, prompt)
+    
+    try:
+        if use_cache:
+            cached = _lookup_media_result(cache_key, "vision", "gpt-4o-mini", "analysis")
+            if cached is not None:
+                return {
+                    "analysis": cached,
+                    "cache_key": cache_key,
+                    "sent_bytes": 0,
+                    "original_bytes": len(image_bytes)
+                }
+        
+        prepared = prepare_image_for_vision(image_bytes)
+        analysis = _vision_request(to_data_url(prepared["bytes"], prepared["mime_type"]), prompt)
+        put_cached_media_result(cache_key, analysis)
+        
+        return {
+            "analysis": analysis,
+            "cache_key": cache_key,
+            "sent_bytes": len(prepared["bytes"]),
+            "original_bytes": len(image_bytes)
+        }
+        
+    except Exception as e:
+        st.error(f"이미지 분석 실패: {e}")
+        return None
+
+
+def _vision_request(image_url: str, prompt: str, model: str = "gpt-4o-mini") -> Optional[str]:
+    """Vision 호출 1회 (계측 포함, 실패 시 예외 전달)"""
+    client = get_openai_client()
+    if not client:
+        return None
+    
+    with track_llm_call("vision", model) as call:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=model,
             messages=[
                 {
                     "role": "user",
@@ -683,51 +1513,346 @@ def analyze_image(
             ],
             max_tokens=500
         )
-        
-        return response.choices[0].message.content
-        
-    except Exception as e:
-        st.error(f"이미지 분석 실패: {e}")
-        return None
+        call["usage"] = response.usage
+    
+    return response.choices[0].message.content
+
+
+def _image_url_bytes(image_url: str) -> bytes:
+    """캐시 키용 이미지 식별 바이트 (data URL이면 디코딩한 원본, 그 외는 URL 문자열)"""
+    import base64
+    
+    if image_url.startswith("data:") and ";base64," in image_url:
+        try:
+            return base64.b64decode(image_url.split(";base64,", 1)[1])
+        except (ValueError, TypeError):
+            pass
+    return image_url.encode("utf-8")
 
 
 # === 편의 함수: 체크인 전체 처리 파이프라인 ===
 
-def process_checkin_with_ai(raw_content: str, use_ingestor: bool = True) -> Dict[str, Any]:
+# ============================================
+# 파이프라인 실행기 (독립 단계 동시 실행)
+# ============================================
+
+PIPELINE_MAX_WORKERS = 4
+
+# 단계 정의: {이름: (함수, [의존 단계 이름])}, 함수는 완료된 단계 값 dict를 받음
+PipelineStages = Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Sequence[str]]]
+
+
+class PipelineResult:
+    """파이프라인 실행 결과 (단계별 값 / 소요 시간(ms) / 오류)"""
+    
+    def __init__(self):
+        self.values: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.total_ms: float = 0.0
+    
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default)
+    
+    def ok(self, name: str) -> bool:
+        return name in self.values and name not in self.errors
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "values": dict(self.values),
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+            "total_ms": self.total_ms
+        }
+
+
+def run_pipeline(
+    stages: PipelineStages,
+    max_workers: int = PIPELINE_MAX_WORKERS
+) -> PipelineResult:
+    """
+    의존 관계가 없는 단계를 스레드풀에서 동시에 실행
+    
+    - 의존 단계가 모두 끝나면 바로 시작 → 전체 소요 시간 ≈ 가장 긴 경로
+    - 단계에서 예외가 나면 errors에 기록하고, 그 단계에 의존하는 단계는 건너뜀
+    - Streamlit 스크립트 컨텍스트를 작업 스레드에 전달 (st.session_state / st.error 사용 가능)
+    
+    Args:
+        stages: {이름: (함수, [의존 단계 이름])}
+        max_workers: 동시 실행 스레드 수
+    
+    Returns:
+        PipelineResult
+    """
+    result = PipelineResult()
+    started = time.perf_counter()
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    timings_lock = threading.Lock()
+    
+    def _run(name: str, func: Callable, values: Dict[str, Any]) -> Any:
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        stage_started = time.perf_counter()
+        try:
+            return func(values)
+        finally:
+            with timings_lock:
+                result.timings[name] = (time.perf_counter() - stage_started) * 1000
+    
+    pending = dict(stages)
+    running = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            # 실행 가능한 단계 제출 (실패 전파는 변화가 없을 때까지 반복)
+            changed = True
+            while changed:
+                changed = False
+                for name in list(pending):
+                    func, deps = pending[name]
+                    unknown = [d for d in deps if d not in stages]
+                    failed = [d for d in deps if d in result.errors]
+                    if unknown or failed:
+                        result.errors[name] = f"건너뜀 (의존 단계 실패: {', '.join(unknown + failed)})"
+                        del pending[name]
+                        changed = True
+                    elif all(d in result.values for d in deps):
+                        future = pool.submit(_run, name, func, dict(result.values))
+                        running[future] = name
+                        del pending[name]
+            
+            if not running:
+                break
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result.values[name] = future.result()
+                except Exception as e:
+                    result.errors[name] = str(e)
+    
+    result.total_ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+# ============================================
+# 체크인 라우팅 (짧거나 이미 정리된 체크인은 호출 단계 축소)
+# ============================================
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 멀티모달 합친 텍스트의 음성 전사 구간 (말투 그대로라 정리가 필요)
+TRANSCRIPT_MARKER = "[🎤 음성 전사]"
+
+# 정리되지 않은 텍스트 신호: 반복 자모/문장부호, 연속 공백/빈 줄, 말버릇
+_UNNORMALIZED_PATTERNS = [
+    re.compile(r"[ㅋㅎㅠㅜ]{2,}|\.{3,}|~{2,}|[!?]{2,}"),
+    re.compile(r"[ \t]{2,}|\n{3,}"),
+    re.compile(r"(?:^|\s)(?:음+|어+|그+니까|뭐지|아니 근데)(?=\s|$)"),
+]
+
+
+def looks_normalized(text: str) -> bool:
+    """Ingestor가 할 일이 거의 없는 텍스트인지 (말버릇/반복 문자/불규칙 공백 없음, 음성 전사 없음)"""
+    if TRANSCRIPT_MARKER in text:
+        return False
+    return not any(pattern.search(text) for pattern in _UNNORMALIZED_PATTERNS)
+
+
+# 규칙 기반 추출이 그대로 해석하는 줄 머리 기호 (할 일 불릿, 어려움, 인사이트)
+_RULE_LINE_PREFIXES = ("-", "•", "*", "!", "💡")
+_HASHTAG_ONLY_LINE = re.compile(r"^(?:#\w+\s*)+$")
+
+
+def rule_coverage(text: str) -> float:
+    """
+    규칙 기반 추출이 구조적으로 설명하는 줄의 비율 (0.0 ~ 1.0)
+    불릿/!/💡로 시작하거나 #태그만 있는 줄만 센다 (키워드가 우연히 포함된 문장은 제외)
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 0.0
+    
+    covered = sum(
+        1 for line in lines
+        if line.startswith(_RULE_LINE_PREFIXES) or _HASHTAG_ONLY_LINE.match(line)
+    )
+    return covered / len(lines)
+
+
+def route_checkin(raw_content: str, use_ingestor: bool = True) -> Dict[str, Any]:
+    """
+    로컬 신호로 체크인 AI 처리 경로 결정 (네트워크 호출 없음)
+    
+    경로:
+        rules: 아주 짧거나 규칙 추출이 모든 줄을 설명 → LLM 추출 생략, 규칙 기반 추출 사용
+        light: 짧거나 이미 정리된 텍스트 → Ingestor 생략, 추출만
+        full : Ingestor(입력 길이에 맞춘 max_tokens) → 추출
+    
+    Args:
+        raw_content: 체크인 원본 텍스트 (멀티모달 합친 텍스트)
+        use_ingestor: 사용자가 Ingestor를 켰는지
+    
+    Returns:
+        {"route", "skip_ingest", "ingest_max_tokens", "reason", "signals"}
+    """
+    from lib.config import get_routing_config
+    from lib.utils import estimate_tokens
+    
+    config = get_routing_config()
+    text = raw_content.strip()
+    tokens = estimate_tokens(text)
+    coverage = rule_coverage(text)
+    normalized = looks_normalized(text)
+    
+    signals = {
+        "chars": len(text),
+        "tokens": tokens,
+        "lines": len([line for line in text.splitlines() if line.strip()]),
+        "rule_coverage": round(coverage, 2),
+        "normalized": normalized
+    }
+    ingest_max_tokens = int(min(
+        config["ingest_max_tokens"],
+        max(config["ingest_min_tokens"], tokens * config["ingest_token_ratio"])
+    ))
+    
+    if not config["enabled"]:
+        route, reason = "full", "routing disabled"
+    elif tokens <= config["rules_max_tokens"]:
+        route, reason = "rules", f"tokens {tokens} <= {config['rules_max_tokens']}"
+    elif coverage >= config["rules_min_coverage"] and TRANSCRIPT_MARKER not in text:
+        route, reason = "rules", f"rule coverage {coverage:.2f}"
+    elif not use_ingestor:
+        route, reason = "light", "ingestor off"
+    elif tokens <= config["skip_ingest_max_tokens"]:
+        route, reason = "light", f"tokens {tokens} <= {config['skip_ingest_max_tokens']}"
+    elif normalized:
+        route, reason = "light", "already normalized"
+    else:
+        route, reason = "full", f"ingest max_tokens {ingest_max_tokens}"
+    
+    decision = {
+        "route": route,
+        "skip_ingest": route != "full" or not use_ingestor,
+        "ingest_max_tokens": ingest_max_tokens,
+        "reason": reason,
+        "signals": signals
+    }
+    logger.info(f"[ROUTE] {route}: {reason} | {signals}")
+    return decision
+
+
+def process_checkin_with_ai(
+    raw_content: str,
+    use_ingestor: bool = True,
+    reflect: bool = True,
+    routing: bool = True
+) -> Dict[str, Any]:
     """
     체크인 텍스트 전체 AI 처리 파이프라인
+    ingest → (extract ∥ reflect): 추출과 회고는 clean_text만 필요하므로 동시에 실행
+    routing이면 route_checkin 결과에 따라 Ingestor / LLM 추출을 생략
     
     Args:
         raw_content: 사용자 입력 원본 텍스트
         use_ingestor: Ingestor로 정리할지 여부
+        reflect: 회고 코멘트 생성 여부 (화면에서 스트리밍하는 경우 False)
+        routing: 로컬 신호 기반 경로 선택 사용 여부 ([routing] enabled = false면 항상 full)
     
     Returns:
         {
             "clean_text": "정리된 텍스트",
-            "extractions": {...추출된 데이터...},
-            "reflection": "간단한 코멘트"
+            "extractions": {...추출된 데이터...} (rules 경로면 None → 규칙 기반 추출 사용),
+            "reflection": "간단한 코멘트",
+            "route": route_checkin 결과 (routing=False면 None),
+            "timings": {"ingest": ms, "extract": ms, "reflect": ms, "total": ms}
         }
     """
-    result = {
-        "clean_text": raw_content,
-        "extractions": None,
-        "reflection": None
+    decision = route_checkin(raw_content, use_ingestor) if routing else None
+    skip_ingest = not use_ingestor or (decision is not None and decision["skip_ingest"])
+    ingest_max_tokens = decision["ingest_max_tokens"] if decision else 2000
+    
+    def _ingest(_):
+        if skip_ingest:
+            return raw_content
+        return ingest_text(raw_content, max_tokens=ingest_max_tokens) or raw_content
+    
+    stages: PipelineStages = {
+        "ingest": (_ingest, []),
+    }
+    if decision is None or decision["route"] != "rules":
+        stages["extract"] = (lambda v: extract_structured_data(v["ingest"]), ["ingest"])
+    if reflect:
+        stages["reflect"] = (lambda v: generate_reflection(v["ingest"]), ["ingest"])
+    
+    pipeline = run_pipeline(stages)
+    
+    for name, error in pipeline.errors.items():
+        st.warning(f"⚠️ AI 처리 단계 실패 ({name}): {error}")
+    
+    return {
+        "clean_text": pipeline.get("ingest", raw_content),
+        "extractions": pipeline.get("extract"),
+        "reflection": pipeline.get("reflect"),
+        "route": decision,
+        "timings": {**pipeline.timings, "total": pipeline.total_ms}
     }
+
+
+def process_checkin_fused(
+    raw_content: str,
+    use_ingestor: bool = True,
+    reflect: bool = True
+) -> Dict[str, Any]:
+    """
+    통합 모드: 정리 + 추출 + 회고 코멘트를 Structured Outputs 1회 호출로 처리
+    (단계별 모드 대비 왕복 1회, 체크인 텍스트도 한 번만 전송)
     
-    # Step 1: Ingestor (선택적)
-    if use_ingestor:
-        clean_text = ingest_text(raw_content)
-        if clean_text:
-            result["clean_text"] = clean_text
+    Args:
+        raw_content: 사용자 입력 원본 텍스트
+        use_ingestor: 텍스트 정리 여부 (False면 clean_text 생략 요청)
+        reflect: 회고 코멘트 생성 여부 (False면 reflection 생략 요청)
+    
+    Returns:
+        process_checkin_with_ai와 같은 형식
+        {"clean_text", "extractions", "reflection", "route": None, "timings": {"fused": ms, "total": ms}}
+    """
+    from lib.prompts import FUSED_SYSTEM_PROMPT, FUSED_JSON_SCHEMA
     
-    # Step 2: Extractor
-    extractions = extract_structured_data(result["clean_text"])
-    if extractions:
-        result["extractions"] = extractions
+    omit = []
+    if not use_ingestor:
+        omit.append("clean_text")
+    if not reflect:
+        omit.append("reflection")
     
-    # Step 3: Reflector (간단한 코멘트)
-    reflection = generate_reflection(result["clean_text"])
-    if reflection:
-        result["reflection"] = reflection
+    user_message = f"다음 체크인을 처리해주세요:\n\n{raw_content}"
+    if omit:
+        user_message += f"\n\n(생략할 항목: {', '.join(omit)})"
     
-    return result
+    messages = [
+        {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+        {"role": "user", "content": user_message}
+    ]
+    
+    started = time.perf_counter()
+    data = chat_completion_json(
+        messages, FUSED_JSON_SCHEMA, temperature=0.3,
+        schema_name="checkin_fused", cache_site="fused"
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    data = data or {}
+    clean_text = data.get("clean_text") if use_ingestor else None
+    reflection = data.get("reflection") if reflect else None
+    
+    return {
+        "clean_text": clean_text or raw_content,
+        "extractions": data.get("extractions"),
+        "reflection": reflection or None,
+        "route": None,
+        "timings": {"fused": elapsed, "total": elapsed}
+    }
@@ -83,6 +83,49 @@ EXTRACTOR_JSON_SCHEMA = {
 }
 
 
+# ============================================
+# FUSED - 정리 + 추출 + 코멘트를 1회 호출로 (Structured Outputs)
+# ============================================
+
+FUSED_SYSTEM_PROMPT = """당신은 개인 회고 도우미입니다.
+사용자의 체크인(일상 기록) 하나를 받아 세 가지 결과를 한 번에 JSON으로 반환합니다.
+
+1. clean_text: 원본 텍스트 정리
+   - 오타 및 문법 교정 (의미 변경 없이), 줄바꿈/공백 정규화, 이모지 유지
+   - 요약하지 말고 원본의 모든 정보를 유지
+2. extractions: 구조화된 정보 추출
+   - tasks: 해야 할 일, 완료한 일, 계획
+   - obstacles: 문제점, 어려움, 막힌 부분
+   - projects: 언급된 프로젝트나 주제
+   - insights: 깨달음, 배움, 아이디어
+   - people: 언급된 사람 이름
+   - emotions: 감정 키워드 (기쁨, 불안, 피곤 등)
+   - 해당 항목이 없으면 빈 배열
+3. reflection: 짧은 회고 코멘트
+   - 성취 인정, 패턴 발견, 구체적인 제안
+   - 따뜻하고 지지적인 말투, 3-5문장
+
+요청에서 생략하라고 한 항목은 빈 문자열("")로 반환하세요."""
+
+
+FUSED_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "clean_text": {
+            "type": "string",
+            "description": "정리된 체크인 텍스트 (생략 요청 시 빈 문자열)"
+        },
+        "extractions": EXTRACTOR_JSON_SCHEMA,
+        "reflection": {
+            "type": "string",
+            "description": "3-5문장 회고 코멘트 (생략 요청 시 빈 문자열)"
+        }
+    },
+    "required": ["clean_text", "extractions", "reflection"],
+    "additionalProperties": False
+}
+
+
 # ============================================
 # REFLECTOR - 회고 및 인사이트 생성
 # ============================================
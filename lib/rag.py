@@ -2,12 +2,18 @@
 ReflectOS - RAG (Retrieval Augmented Generation)
 벡터 검색 기반 기억 조회 및 컨텍스트 생성
 """
+import hashlib
 import streamlit as st
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator
 from datetime import datetime
-from lib.config import get_supabase_client, get_current_user_id
-from lib.openai_client import create_embedding
-from lib.utils import DEMO_TAG
+from lib.config import get_supabase_client, get_current_user_id, get_rag_config
+from lib.openai_client import create_embedding, create_embeddings_batch
+from lib.utils import has_demo_tag
+from lib.supabase_db import _is_missing_function_error
+from lib.vector_store import (
+    get_vector_backend, get_memory_index, search_in_memory,
+    get_embedding_profile, embedding_request_dimensions, storage_vectors, storage_columns, index_vector
+)
 
 
 # ============================================
@@ -22,15 +28,23 @@ def embed(text: str) -> Optional[List[float]]:
         text: 임베딩할 텍스트
     
     Returns:
-        1536차원 벡터 (OpenAI text-embedding-3-small)
+        벡터 (OpenAI text-embedding-3-small, 차원은 [rag] embedding_profile에 따름)
     """
-    return create_embedding(text)
+    return create_embedding(text, dimensions=embedding_request_dimensions(get_embedding_profile()))
 
 
 # ============================================
 # 메모리 청크 저장
 # ============================================
 
+def content_hash(content: str) -> str:
+    """
+    중복 방지용 content 해시 (sha256 hex)
+    sql/memory_content_hash.sql의 encode(sha256(...), 'hex')와 동일한 값
+    """
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
 def save_memory_chunk(
     source_type: str,
     source_id: str,
@@ -40,8 +54,8 @@ def save_memory_chunk(
     user_id: str = None
 ) -> Optional[Dict]:
     """
-    memory_chunks 테이블에 텍스트 조각 저장
-    중복 방지: checkin은 단일 유지 정책 적용
+    memory_chunks 테이블에 텍스트 조각 저장 (upsert_memory_chunk RPC 1회)
+    중복 방지: content_hash 유니크 제약, checkin은 단일 유지 정책 적용
     
     Args:
         source_type: 소스 타입 ('checkin', 'extraction', 'calendar', 'plan')
@@ -61,37 +75,21 @@ def save_memory_chunk(
         
         user_id = user_id or get_current_user_id()
         
-        # 중복 방지: checkin인 경우 기존 chunk 확인
-        if source_type == "checkin":
-            existing = client.table("memory_chunks").select("id, content").eq(
-                "user_id", user_id
-            ).eq("source_type", source_type).eq("source_id", source_id).eq(
-                "chunk_index", chunk_index
-            ).execute()
-            
-            rows = existing.data or []
-            if rows:
-                # content가 같으면 기존 row 반환 (삽입 X)
-                if rows[0].get("content") == content:
-                    return rows[0]
-                # content가 다르면 삭제 후 새로 삽입
-                client.table("memory_chunks").delete().eq(
-                    "user_id", user_id
-                ).eq("source_type", source_type).eq("source_id", source_id).eq(
-                    "chunk_index", chunk_index
-                ).execute()
-        
-        data = {
-            "user_id": user_id,
-            "source_type": source_type,
-            "source_id": source_id,
-            "content": content,
-            "chunk_index": chunk_index,
-            "metadata": metadata or {},
-            "created_at": datetime.utcnow().isoformat()
-        }
+        # stale 행 삭제 + 삽입(동일 해시면 기존 행 반환)을 한 번에
+        response = client.rpc(
+            "upsert_memory_chunk",
+            {
+                "p_user_id": user_id,
+                "p_source_type": source_type,
+                "p_source_id": source_id,
+                "p_content": content,
+                "p_content_hash": content_hash(content),
+                "p_chunk_index": chunk_index,
+                "p_metadata": metadata or {},
+                "p_replace_stale": source_type == "checkin"
+            }
+        ).execute()
         
-        response = client.table("memory_chunks").insert(data).execute()
         return response.data[0] if response.data else None
         
     except Exception as e:
@@ -104,18 +102,27 @@ def save_memory_embedding(
     source_id: str,
     content: str,
     embedding: List[float] = None,
-    user_id: str = None
+    user_id: str = None,
+    chunk_index: int = 0,
+    is_demo: bool = False,
+    created_at: str = None
 ) -> Optional[Dict]:
     """
-    memory_embeddings 테이블에 벡터 임베딩 저장
+    memory_embeddings 테이블에 벡터 임베딩 저장 (upsert_memory_embedding RPC 1회)
     중복 방지: checkin은 단일 유지, extraction은 동일 content만 스킵
     
+    - 임베딩을 넘기지 않으면 같은 content_hash 행이 있는지 먼저 확인하고,
+      현재 프로필 컬럼(embedding / embedding_768 / embedding_512)까지 있으면 임베딩 생성 없이 기존 행 반환
+    
     Args:
         source_type: 소스 타입
         source_id: 소스 레코드 ID
         content: 원본 텍스트 (검색 결과 표시용)
         embedding: 벡터 임베딩 (없으면 자동 생성)
         user_id: 사용자 ID
+        chunk_index: 긴 텍스트 분할 시 순서
+        is_demo: 데모 데이터 여부 (검색 시 exclude_demo 필터에 사용)
+        created_at: 원본 기록 시각 (없으면 저장 시각, 기간 필터에 사용)
     
     Returns:
         저장된 embedding 레코드
@@ -126,47 +133,57 @@ def save_memory_embedding(
             return None
         
         user_id = user_id or get_current_user_id()
+        use_memory_index = get_vector_backend() == "memory"
+        profile = get_embedding_profile()
+        digest = content_hash(content)
         
-        # 중복 방지: 기존 rows 조회
-        existing = client.table("memory_embeddings").select("id, content").eq(
-            "user_id", user_id
-        ).eq("source_type", source_type).eq("source_id", source_id).execute()
-        
-        rows = existing.data or []
-        
-        if source_type == "checkin":
-            # checkin: 동일 content면 반환, 다르면 삭제 후 삽입
-            for row in rows:
-                if row.get("content") == content:
-                    return row  # 동일 content, 스킵
-            # 기존 것 삭제 (content가 다르거나 새로 삽입)
-            if rows:
-                client.table("memory_embeddings").delete().eq(
-                    "user_id", user_id
-                ).eq("source_type", source_type).eq("source_id", source_id).execute()
-        else:
-            # extraction 등: 동일 content면 스킵, 없으면 삽입 (삭제 X)
-            for row in rows:
-                if row.get("content") == content:
-                    return row  # 동일 content, 스킵
-        
-        # 임베딩이 없으면 생성
+        # 임베딩이 없으면: 동일 해시 + 현재 프로필 컬럼이 채워진 행 확인 → 있으면 임베딩 호출 생략
+        # (프로필 전환 전에 저장된 행은 해당 컬럼이 NULL → 아래 upsert가 COALESCE로 채움)
         if embedding is None:
+            existing = client.table("memory_embeddings").select(
+                "id, source_type, source_id, content, content_hash, is_demo, created_at"
+            ).eq("user_id", user_id).eq("source_type", source_type).eq(
+                "source_id", source_id
+            ).eq("chunk_index", chunk_index).eq("content_hash", digest).not_.is_(
+                profile["column"], "null"
+            ).limit(1).execute()
+            
+            if existing.data:
+                return existing.data[0]  # 동일 content, 스킵
+            
             embedding = embed(content)
             if not embedding:
                 return None
         
-        data = {
-            "user_id": user_id,
-            "source_type": source_type,
-            "source_id": source_id,
-            "content": content,
-            "embedding": embedding,
-            "created_at": datetime.utcnow().isoformat()
+        replace_stale = source_type == "checkin"
+        full, reduced = storage_vectors(embedding, profile)
+        
+        params = {
+            "p_user_id": user_id,
+            "p_source_type": source_type,
+            "p_source_id": source_id,
+            "p_content": content,
+            "p_content_hash": digest,
+            "p_embedding": full,
+            "p_chunk_index": chunk_index,
+            "p_replace_stale": replace_stale,
+            "p_is_demo": is_demo,
+            "p_created_at": created_at
         }
+        if reduced is not None:
+            params["p_embedding_reduced"] = reduced
         
-        response = client.table("memory_embeddings").insert(data).execute()
-        return response.data[0] if response.data else None
+        response = client.rpc("upsert_memory_embedding", params).execute()
+        saved = response.data[0] if response.data else None
+        
+        # 인메모리 인덱스 증분 갱신 (memory 백엔드)
+        if saved and use_memory_index:
+            index = get_memory_index()
+            if replace_stale:
+                index.remove(user_id, source_type, source_id)
+            index.add(user_id, saved, index_vector(embedding, profile))
+        
+        return saved
         
     except Exception as e:
         st.error(f"임베딩 저장 실패: {e}")
@@ -180,7 +197,9 @@ def save_memory_embedding(
 def index_checkin(
     checkin_id: str, 
     content: str,
-    extractions: Dict = None
+    extractions: Dict = None,
+    is_demo: bool = False,
+    created_at: str = None
 ) -> bool:
     """
     체크인 내용을 RAG 인덱스에 추가
@@ -191,6 +210,8 @@ def index_checkin(
         checkin_id: 체크인 ID
         content: 체크인 내용
         extractions: 추출된 데이터 (tasks, obstacles 등)
+        is_demo: 데모 체크인 여부
+        created_at: 체크인 생성 시각
     
     Returns:
         성공 여부
@@ -208,7 +229,9 @@ def index_checkin(
         embedding_result = save_memory_embedding(
             source_type="checkin",
             source_id=checkin_id,
-            content=content
+            content=content,
+            is_demo=is_demo,
+            created_at=created_at
         )
         
         return chunk is not None and embedding_result is not None
@@ -218,10 +241,289 @@ def index_checkin(
         return False
 
 
+def build_checkin_memory_entries(
+    content: str,
+    extractions: Dict = None,
+    is_demo: bool = False
+) -> Optional[List[Dict]]:
+    """
+    새 체크인의 RAG 인덱스 항목 준비 (save_checkin_bundle의 memory 인자)
+    체크인 텍스트와 추출 텍스트 임베딩을 create_embeddings_batch 1회로 생성
+    
+    Args:
+        content: 인덱싱할 체크인 텍스트 (clean_text 우선)
+        extractions: 추출 데이터 (비어있으면 extraction 항목 생략)
+        is_demo: 데모 체크인 여부
+    
+    Returns:
+        [{"source_type", "content", "content_hash", "metadata", "store_chunk", "is_demo",
+          "embedding", "embedding_reduced", "vector"}] (임베딩 실패 시 None)
+    """
+    profile = get_embedding_profile()
+    items = [("checkin", content, {"extractions": extractions} if extractions else {}, True)]
+    extraction_text = extraction_index_text(extractions or {})
+    if extraction_text:
+        # extraction은 기존 index_extraction과 같이 임베딩만 저장 (청크 없음)
+        items.append(("extraction", extraction_text, {}, False))
+    
+    embeddings = create_embeddings_batch(
+        [text for _, text, _, _ in items],
+        dimensions=embedding_request_dimensions(profile)
+    )
+    if not all(embeddings):
+        return None
+    
+    entries = []
+    for (source_type, text, metadata, store_chunk), emb in zip(items, embeddings):
+        full, reduced = storage_vectors(emb, profile)
+        entries.append({
+            "source_type": source_type,
+            "content": text,
+            "content_hash": content_hash(text),
+            "metadata": metadata,
+            "store_chunk": store_chunk,
+            "is_demo": is_demo,
+            "embedding": full,
+            "embedding_reduced": reduced,
+            "vector": emb  # 인메모리 인덱스용 원본 (DB로 보내지 않음)
+        })
+    return entries
+
+
+def register_saved_memory(rows: List[Dict], entries: List[Dict], user_id: str = None):
+    """save_checkin_bundle로 저장된 임베딩 행을 인메모리 인덱스에 반영 (memory 백엔드일 때만)"""
+    if get_vector_backend() != "memory" or not rows:
+        return
+    
+    user_id = user_id or get_current_user_id()
+    profile = get_embedding_profile()
+    index = get_memory_index()
+    vectors = {(e["source_type"], e["content_hash"]): e["vector"] for e in entries}
+    for row in rows:
+        emb = vectors.get((row["source_type"], row.get("content_hash")))
+        if emb:
+            index.add(user_id, row, index_vector(emb, profile))
+
+
+def index_checkins_bulk(
+    checkins: List[Dict],
+    batch_size: int = 100,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    user_id: str = None
+) -> Dict[str, int]:
+    """
+    여러 체크인을 한 번에 RAG 인덱스에 추가 (백필/동기화용)
+    
+    - 임베딩은 create_embeddings_batch로 묶어서 생성
+    - batch_size 단위로 upsert_checkin_memory_bulk RPC 1회 (stale 행 정리 + 청크/임베딩 upsert를 한 트랜잭션으로)
+    - RPC가 없으면 체크인별 upsert_memory_chunk / upsert_memory_embedding으로 폴백
+    
+    Args:
+        checkins: [{"id": ..., "content": ..., "tags": [...](선택), "created_at": ...(선택), "extractions": {...}(선택)}]
+        batch_size: DB 일괄 upsert 단위
+        progress_callback: (처리 완료 수, 전체 수)를 받는 콜백
+        user_id: 사용자 ID
+    
+    Returns:
+        {"indexed": 성공 수, "failed": 실패 수}
+    """
+    result = {"indexed": 0, "failed": 0}
+    total = len(checkins)
+    
+    client = get_supabase_client()
+    if not client or not total:
+        return result
+    
+    user_id = user_id or get_current_user_id()
+    use_memory_index = get_vector_backend() == "memory"
+    profile = get_embedding_profile()
+    dimensions = embedding_request_dimensions(profile)
+    
+    for start in range(0, total, batch_size):
+        batch = checkins[start:start + batch_size]
+        batch_indexed = 0
+        
+        try:
+            embeddings = create_embeddings_batch(
+                [c.get("content") or "" for c in batch],
+                dimensions=dimensions
+            )
+            
+            ready = [(c, emb) for c, emb in zip(batch, embeddings) if emb]
+            
+            if ready:
+                now = datetime.utcnow().isoformat()
+                entries = []
+                for c, emb in ready:
+                    full, reduced = storage_vectors(emb, profile)
+                    entries.append({
+                        "source_id": c["id"],
+                        "content": c["content"],
+                        "content_hash": content_hash(c["content"]),
+                        "metadata": {"extractions": c["extractions"]} if c.get("extractions") else {},
+                        "is_demo": has_demo_tag(c.get("tags")),
+                        "created_at": c.get("created_at") or now,  # 청크/임베딩 공통
+                        "embedding": full,
+                        "embedding_reduced": reduced
+                    })
+                
+                # stale 정리 + 청크/임베딩 upsert를 한 트랜잭션으로 (실패 시 기존 인덱스 유지)
+                try:
+                    response = client.rpc(
+                        "upsert_checkin_memory_bulk",
+                        {"p_user_id": user_id, "p_entries": entries}
+                    ).execute()
+                except Exception as e:
+                    if not _is_missing_function_error(e):
+                        raise
+                    # 마이그레이션 미적용: 체크인별 upsert RPC로 폴백 (인메모리 인덱스는 내부에서 갱신)
+                    for (c, emb), entry in zip(ready, entries):
+                        save_memory_chunk(
+                            "checkin", c["id"], c["content"],
+                            metadata=entry["metadata"], user_id=user_id
+                        )
+                        if save_memory_embedding(
+                            "checkin", c["id"], c["content"],
+                            embedding=emb,
+                            user_id=user_id,
+                            is_demo=entry["is_demo"],
+                            created_at=entry["created_at"]
+                        ):
+                            batch_indexed += 1
+                    response = None
+                
+                if response is not None:
+                    saved_rows = response.data or []
+                    batch_indexed = len(saved_rows)
+                    
+                    # 인메모리 인덱스 증분 갱신 (memory 백엔드, DB 반영 성공 후에만)
+                    if use_memory_index:
+                        index = get_memory_index()
+                        vectors = {c["id"]: emb for c, emb in ready}
+                        for row in saved_rows:
+                            index.remove(user_id, "checkin", row["source_id"])
+                            index.add(user_id, row, index_vector(vectors[row["source_id"]], profile))
+        
+        except Exception as e:
+            st.error(f"체크인 일괄 인덱싱 실패: {e}")
+        
+        result["indexed"] += batch_indexed
+        result["failed"] += len(batch) - batch_indexed
+        
+        if progress_callback:
+            progress_callback(min(start + batch_size, total), total)
+    
+    return result
+
+
+def extraction_index_text(data: Dict) -> str:
+    """추출 데이터(tasks, obstacles 등) → 인덱싱용 텍스트 (없으면 빈 문자열)"""
+    text_parts = []
+    
+    if data.get("tasks"):
+        text_parts.append("할 일: " + ", ".join(data["tasks"]))
+    if data.get("obstacles"):
+        text_parts.append("어려움: " + ", ".join(data["obstacles"]))
+    if data.get("projects"):
+        text_parts.append("프로젝트: " + ", ".join(data["projects"]))
+    if data.get("insights"):
+        text_parts.append("인사이트: " + ", ".join(data["insights"]))
+    
+    return " | ".join(text_parts)
+
+
+def index_extractions_bulk(
+    items: List[Dict],
+    user_id: str = None
+) -> Dict[str, int]:
+    """
+    여러 체크인의 추출 데이터를 한 번에 인덱싱 (배치 보강 작업용)
+    
+    - 임베딩은 create_embeddings_batch로 묶어서 생성
+    - (source_type, source_id, chunk_index, content_hash) 충돌 행은 건너뜀 (이미 같은 내용이 인덱싱됨)
+    
+    Args:
+        items: [{"checkin_id", "data", "tags"(선택), "created_at"(선택)}]
+        user_id: 사용자 ID
+    
+    Returns:
+        {"indexed": 저장 수, "skipped": 추출 내용 없음, "failed": 실패 수}
+    """
+    result = {"indexed": 0, "skipped": 0, "failed": 0}
+    
+    client = get_supabase_client()
+    if not client or not items:
+        return result
+    
+    user_id = user_id or get_current_user_id()
+    use_memory_index = get_vector_backend() == "memory"
+    profile = get_embedding_profile()
+    
+    prepared = []
+    for item in items:
+        content = extraction_index_text(item.get("data") or {})
+        if content:
+            prepared.append((item, content))
+        else:
+            result["skipped"] += 1
+    
+    if not prepared:
+        return result
+    
+    try:
+        embeddings = create_embeddings_batch(
+            [content for _, content in prepared],
+            dimensions=embedding_request_dimensions(profile)
+        )
+        ready = [(item, content, emb) for (item, content), emb in zip(prepared, embeddings) if emb]
+        result["failed"] += len(prepared) - len(ready)
+        
+        if ready:
+            now = datetime.utcnow().isoformat()
+            response = client.table("memory_embeddings").upsert(
+                [
+                    {
+                        "user_id": user_id,
+                        "source_type": "extraction",
+                        "source_id": item["checkin_id"],
+                        "content": content,
+                        "content_hash": content_hash(content),
+                        "chunk_index": 0,
+                        **storage_columns(emb, profile),
+                        "is_demo": has_demo_tag(item.get("tags")),
+                        "created_at": item.get("created_at") or now
+                    }
+                    for item, content, emb in ready
+                ],
+                on_conflict="user_id,source_type,source_id,chunk_index,content_hash",
+                ignore_duplicates=True
+            ).execute()
+            
+            saved_rows = response.data or []
+            result["indexed"] += len(saved_rows)
+            
+            # 인메모리 인덱스 증분 갱신 (memory 백엔드)
+            if use_memory_index:
+                index = get_memory_index()
+                vectors = {(item["checkin_id"], content_hash(content)): emb for item, content, emb in ready}
+                for row in saved_rows:
+                    emb = vectors.get((row["source_id"], row.get("content_hash")))
+                    if emb:
+                        index.add(user_id, row, index_vector(emb, profile))
+    
+    except Exception as e:
+        st.error(f"추출 데이터 일괄 인덱싱 실패: {e}")
+        result["failed"] += len(prepared)
+    
+    return result
+
+
 def index_extraction(
     checkin_id: str,
     extraction_type: str,
-    data: Dict
+    data: Dict,
+    is_demo: bool = False,
+    created_at: str = None
 ) -> bool:
     """
     추출 데이터(tasks, obstacles 등)를 별도 인덱싱
@@ -230,32 +532,23 @@ def index_extraction(
         checkin_id: 연결된 체크인 ID
         extraction_type: 추출 타입
         data: 추출된 데이터
+        is_demo: 데모 체크인 여부
+        created_at: 체크인 생성 시각
     
     Returns:
         성공 여부
     """
     try:
-        # 추출 데이터를 텍스트로 변환
-        text_parts = []
-        
-        if data.get("tasks"):
-            text_parts.append("할 일: " + ", ".join(data["tasks"]))
-        if data.get("obstacles"):
-            text_parts.append("어려움: " + ", ".join(data["obstacles"]))
-        if data.get("projects"):
-            text_parts.append("프로젝트: " + ", ".join(data["projects"]))
-        if data.get("insights"):
-            text_parts.append("인사이트: " + ", ".join(data["insights"]))
-        
-        if not text_parts:
+        content = extraction_index_text(data)
+        if not content:
             return True  # 추출 데이터가 없으면 스킵
         
-        content = " | ".join(text_parts)
-        
         return save_memory_embedding(
             source_type="extraction",
             source_id=checkin_id,
-            content=content
+            content=content,
+            is_demo=is_demo,
+            created_at=created_at
         ) is not None
         
     except Exception as e:
@@ -272,17 +565,27 @@ def similarity_search(
     top_k: int = 5,
     threshold: float = 0.7,
     source_type_filter: str = None,
-    exclude_demo: bool = False
+    exclude_demo: bool = False,
+    source_types: List[str] = None,
+    created_after: str = None,
+    created_before: str = None,
+    user_id: str = None
 ) -> List[Dict]:
     """
-    유사 기억 검색 (pgvector 코사인 유사도)
+    유사 기억 검색 (코사인 유사도)
+    백엔드는 [rag] vector_backend 설정으로 선택 (pgvector RPC / 인메모리 NumPy)
+    필터는 모두 top_k 선택 전에 적용 (search_memories_v2)
     
     Args:
         query: 검색 쿼리
         top_k: 최대 결과 수
         threshold: 최소 유사도 (0.0 ~ 1.0)
-        source_type_filter: 소스 타입 필터 (선택)
+        source_type_filter: 소스 타입 필터 (단일, 기존 호환)
         exclude_demo: True면 데모 데이터 기반 결과 제외
+        source_types: 소스 타입 목록 필터
+        created_after: 이 시각 이후 기록만 (ISO, 포함)
+        created_before: 이 시각 이전 기록만 (ISO, 미포함)
+        user_id: 사용자 ID (없으면 현재 세션 사용자)
     
     Returns:
         유사한 메모리 목록 [{id, source_type, source_id, content, similarity, created_at}]
@@ -292,60 +595,56 @@ def similarity_search(
         if not client:
             return []
         
-        user_id = get_current_user_id()
+        user_id = user_id or get_current_user_id()
         
         # 쿼리 임베딩 생성
         query_embedding = embed(query)
         if not query_embedding:
             return []
         
-        # pgvector 유사도 검색 (RPC 함수 호출)
-        response = client.rpc(
-            "search_memories",
-            {
-                "query_embedding": query_embedding,
-                "match_count": top_k,
-                "match_threshold": threshold,
-                "user_id_filter": user_id
-            }
-        ).execute()
+        if source_type_filter:
+            source_types = list(source_types or []) + [source_type_filter]
+        filters = {
+            "source_types": list(source_types) if source_types else None,
+            "created_after": created_after,
+            "created_before": created_before,
+            "exclude_demo": exclude_demo
+        }
         
-        results = response.data or []
+        profile = get_embedding_profile()
+        full, reduced = storage_vectors(query_embedding, profile)
+        
+        if get_vector_backend() == "memory":
+            # 인메모리 정확 검색 (사용자별 행렬, 첫 검색 시 로드)
+            return search_in_memory(
+                user_id, index_vector(query_embedding, profile),
+                top_k=top_k, threshold=threshold, **filters
+            )
+        
+        # pgvector 유사도 검색 (필터를 WHERE에서 적용한 뒤 LIMIT)
+        params = {
+            "query_embedding": reduced if reduced is not None else full,
+            "match_count": top_k,
+            "match_threshold": threshold,
+            "user_id_filter": user_id,
+            **filters
+        }
+        ef_search = get_rag_config().get("hnsw_ef_search")
+        if ef_search:
+            params["ef_search"] = int(ef_search)
         
-        # source_type 필터 적용 (RPC에서 지원 안하면 클라이언트에서)
-        if source_type_filter:
-            results = [r for r in results if r.get("source_type") == source_type_filter]
-        
-        # exclude_demo 필터 적용
-        if exclude_demo and results:
-            # checkin/extraction의 source_id(=checkin_id) 수집
-            ids = list({
-                r.get("source_id") for r in results 
-                if r.get("source_type") in ("checkin", "extraction")
-            })
-            
-            if ids:
-                # 해당 checkin들의 tags 조회
-                resp = client.table("checkins").select("id, tags").eq(
-                    "user_id", user_id
-                ).in_("id", ids).execute()
-                
-                # 데모 태그 포함된 checkin_id 집합
-                demo_ids = {
-                    row["id"] for row in (resp.data or [])
-                    if DEMO_TAG in (row.get("tags") or [])
-                }
-                
-                # 데모 기반 결과 제외
-                results = [
-                    r for r in results 
-                    if not (
-                        r.get("source_type") in ("checkin", "extraction") 
-                        and r.get("source_id") in demo_ids
-                    )
-                ]
+        if reduced is None:
+            rpc_name = "search_memories_v2"
+        else:
+            # halfvec 컬럼 검색 (+ 선택: 상위 후보를 1536차원 원본으로 재점수)
+            rpc_name = "search_memories_reduced"
+            if full is not None:
+                params["query_embedding_full"] = full
+                params["rescore_factor"] = profile["rescore_factor"]
+        
+        response = client.rpc(rpc_name, params).execute()
         
-        return results
+        return response.data or []
         
     except Exception as e:
         st.error(f"유사도 검색 실패: {e}")
@@ -431,11 +730,41 @@ def get_sources_info(memories: List[Dict]) -> List[Dict]:
 # RAG 기반 답변 생성
 # ============================================
 
+# 검색 결과가 없거나 생성에 실패했을 때의 안내 문구
+NO_MEMORY_ANSWER = "관련된 기억을 찾지 못했습니다. 더 많은 체크인을 기록하면 더 좋은 답변을 드릴 수 있어요!"
+FAILED_ANSWER = "답변 생성에 실패했습니다. 다시 시도해주세요."
+
+
+def _prepare_rag_answer(query: str, **search_kwargs) -> Dict[str, Any]:
+    """검색 → 컨텍스트 구성 → LLM 메시지 준비 (검색 결과가 없으면 messages=None)"""
+    from lib.prompts import RAG_INSIGHT_PROMPT
+    
+    memories = similarity_search(query, **search_kwargs)
+    context = build_context(memories)
+    
+    messages = None
+    if memories:
+        messages = [
+            {"role": "system", "content": RAG_INSIGHT_PROMPT},
+            {"role": "user", "content": f"질문: {query}\n\n{context}"}
+        ]
+    
+    return {
+        "messages": messages,
+        "sources": get_sources_info(memories),
+        "context": context,
+        "memories_count": len(memories)
+    }
+
+
 def generate_rag_answer(
     query: str,
     top_k: int = 5,
     threshold: float = 0.6,
-    exclude_demo: bool = False
+    exclude_demo: bool = False,
+    source_types: List[str] = None,
+    created_after: str = None,
+    created_before: str = None
 ) -> Dict[str, Any]:
     """
     RAG 파이프라인: 검색 → 컨텍스트 구성 → 답변 생성
@@ -445,6 +774,9 @@ def generate_rag_answer(
         top_k: 검색 결과 수
         threshold: 유사도 임계값
         exclude_demo: True면 데모 데이터 기반 결과 제외
+        source_types: 소스 타입 목록 필터
+        created_after: 이 시각 이후 기록만 (ISO)
+        created_before: 이 시각 이전 기록만 (ISO)
     
     Returns:
         {
@@ -454,35 +786,79 @@ def generate_rag_answer(
         }
     """
     from lib.openai_client import chat_completion
-    from lib.prompts import RAG_INSIGHT_PROMPT
     
-    # 1. 유사 기억 검색
-    memories = similarity_search(query, top_k=top_k, threshold=threshold, exclude_demo=exclude_demo)
+    prepared = _prepare_rag_answer(
+        query,
+        top_k=top_k,
+        threshold=threshold,
+        exclude_demo=exclude_demo,
+        source_types=source_types,
+        created_after=created_after,
+        created_before=created_before
+    )
+    messages = prepared.pop("messages")
     
-    # 2. 컨텍스트 구성
-    context = build_context(memories)
-    sources = get_sources_info(memories)
-    
-    # 3. 답변 생성
-    if not memories:
-        answer = "관련된 기억을 찾지 못했습니다. 더 많은 체크인을 기록하면 더 좋은 답변을 드릴 수 있어요!"
+    if messages is None:
+        answer = NO_MEMORY_ANSWER
     else:
-        messages = [
-            {"role": "system", "content": RAG_INSIGHT_PROMPT},
-            {"role": "user", "content": f"질문: {query}\n\n{context}"}
-        ]
-        
-        answer = chat_completion(messages, temperature=0.7, max_tokens=800)
-        
-        if not answer:
-            answer = "답변 생성에 실패했습니다. 다시 시도해주세요."
+        answer = chat_completion(
+            messages, temperature=0.7, max_tokens=800, cache_site="rag_answer"
+        ) or FAILED_ANSWER
     
-    return {
-        "answer": answer,
-        "sources": sources,
-        "context": context,
-        "memories_count": len(memories)
-    }
+    return {"answer": answer, **prepared}
+
+
+def stream_rag_answer(
+    query: str,
+    top_k: int = 5,
+    threshold: float = 0.6,
+    exclude_demo: bool = False,
+    source_types: List[str] = None,
+    created_after: str = None,
+    created_before: str = None,
+    user_id: str = None
+) -> Dict[str, Any]:
+    """
+    generate_rag_answer의 스트리밍 버전
+    검색은 먼저 끝내고, 답변은 토큰 단위로 흘려보냄 (st.write_stream / SSE용)
+    
+    Args:
+        generate_rag_answer와 동일 (+ user_id: Streamlit 세션 밖에서 호출할 때 지정)
+    
+    Returns:
+        {
+            "stream": 답변 텍스트 조각 iterator,
+            "sources": [...소스 정보...],
+            "context": "사용된 컨텍스트",
+            "memories_count": 검색된 기억 수
+        }
+    """
+    from lib.openai_client import chat_completion_stream
+    
+    prepared = _prepare_rag_answer(
+        query,
+        top_k=top_k,
+        threshold=threshold,
+        exclude_demo=exclude_demo,
+        source_types=source_types,
+        created_after=created_after,
+        created_before=created_before,
+        user_id=user_id
+    )
+    messages = prepared.pop("messages")
+    
+    def _stream() -> Iterator[str]:
+        if messages is None:
+            yield NO_MEMORY_ANSWER
+            return
+        produced = False
+        for delta in chat_completion_stream(messages, temperature=0.7, max_tokens=800, cache_site="rag_answer"):
+            produced = True
+            yield delta
+        if not produced:
+            yield FAILED_ANSWER
+    
+    return {"stream": _stream(), **prepared}
 
 
 # 별칭 (기존 호환성)
@@ -0,0 +1,440 @@
+"""
+ReflectOS - OpenAI 호출 제한
+프로세스 전역 요청/토큰 버킷 + 동시 호출 상한 + 지수 백오프 재시도, 대기열 지표
+"""
+import email.utils
+import random
+import threading
+import time
+import numpy as np
+import streamlit as st
+from collections import deque
+from typing import Optional, Dict, Any, Callable, Iterator
+from lib.config import get_openai_limits_config
+
+
+# 스레드별 누적 재시도 횟수 (계측에서 호출 전후 차이로 재시도 수 계산)
+_thread_state = threading.local()
+
+
+def thread_retry_count() -> int:
+    """현재 스레드에서 지금까지 발생한 재시도 횟수"""
+    return getattr(_thread_state, "retries", 0)
+
+
+# ============================================
+# 토큰 버킷
+# ============================================
+
+class TokenBucket:
+    """
+    분당 한도를 초 단위로 채우는 토큰 버킷 (스레드 안전)
+
+    Args:
+        per_minute: 분당 허용량 (요청 수 또는 토큰 수, 0 이하면 무제한)
+        burst: 버킷 최대 용량 (None이면 per_minute — 1분치까지 몰아서 사용 가능)
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.per_minute = float(per_minute or 0)
+        self.capacity = float(burst if burst is not None else self.per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.per_minute <= 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.per_minute / 60.0)
+
+    def reserve(self, amount: float) -> float:
+        """
+        amount만큼 예약하고 사용 가능해질 때까지 기다려야 할 시간(초) 반환
+        (잔량을 음수로 빌려 쓰는 방식 → 먼저 예약한 호출이 먼저 통과)
+        """
+        if self.unlimited or amount <= 0:
+            return 0.0
+        # 한 번에 용량보다 큰 요청도 통과할 수 있도록 상한 적용
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * 60.0 / self.per_minute
+
+    def adjust(self, delta: float):
+        """실제 사용량과 예상치의 차이 반영 (양수면 추가 차감, 음수면 환급)"""
+        if self.unlimited or not delta:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+# ============================================
+# 제한기
+# ============================================
+
+class RateLimiter:
+    """
+    요청/분, 토큰/분 버킷 + 동시 호출 세마포어 + 429 공동 대기
+
+    Args:
+        rpm: 분당 요청 수 한도
+        tpm: 분당 토큰 수 한도
+        max_concurrency: 동시에 진행 중인 호출 최대 수
+        max_retries: 재시도 횟수 (첫 시도 제외)
+        backoff_base: 첫 재시도 기본 대기(초)
+        backoff_max: 재시도 대기 상한(초)
+    """
+
+    def __init__(
+        self,
+        rpm: int = 500,
+        tpm: int = 200000,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._cooldown_until = 0.0
+        self._waiting = 0
+        self._in_flight = 0
+        self._waits_ms: deque = deque(maxlen=500)
+        self._counters = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    # --- 슬롯 ---
+
+    def acquire(self, estimated_tokens: int = 0) -> float:
+        """
+        버킷 예약 → 429 공동 대기 → 동시 호출 슬롯 확보 (반환: 대기한 시간 ms)
+        """
+        started = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        try:
+            delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            cooldown = self._cooldown_until - time.monotonic()
+            delay = max(delay, cooldown)
+            if delay > 0:
+                time.sleep(delay)
+            self._slots.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        waited_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._in_flight += 1
+            self._waits_ms.append(waited_ms)
+        return waited_ms
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def cool_down(self, seconds: float):
+        """429 수신 시 다른 스레드도 같은 시간 동안 새 호출을 보내지 않도록 설정"""
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    # --- 재시도 ---
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Retry-After 헤더가 있으면 우선, 없으면 full jitter 지수 백오프"""
+        retry_after = parse_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def call(
+        self,
+        func: Callable[[], Any],
+        estimated_tokens: int = 0,
+        hold_slot: bool = False
+    ) -> Any:
+        """
+        제한기를 거쳐 func 실행, 재시도 가능한 오류면 백오프 후 재시도
+
+        Args:
+            func: 인자 없는 API 호출
+            estimated_tokens: 토큰 버킷에서 미리 차감할 예상 토큰 수
+            hold_slot: True면 슬롯을 반환하지 않고 (결과, release 함수) 반환 (스트리밍용)
+
+        Returns:
+            func 결과 (마지막 시도까지 실패하면 예외를 그대로 전달)
+        """
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens if attempt == 0 else 0)
+            self.count("calls")
+            try:
+                result = func()
+            except Exception as e:
+                self.release()
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.count("failures")
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                if _status_code(e) == 429:
+                    self.count("rate_limited")
+                    self.cool_down(delay)
+                self.count("retries")
+                _thread_state.retries = thread_retry_count() + 1
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            if hold_slot:
+                return result, self.release
+            self.release()
+            return result
+
+    # --- 지표 ---
+
+    def get_stats(self) -> Dict[str, Any]:
+        """대기열 깊이, 진행 중 호출 수, 슬롯 대기시간 분포, 누적 카운터"""
+        with self._lock:
+            waits = np.array(self._waits_ms) if self._waits_ms else None
+            stats = {
+                "queue_depth": self._waiting,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "wait_p50_ms": float(np.percentile(waits, 50)) if waits is not None else 0.0,
+                "wait_p95_ms": float(np.percentile(waits, 95)) if waits is not None else 0.0,
+                "wait_max_ms": float(waits.max()) if waits is not None else 0.0,
+                "cooldown_remaining_s": max(self._cooldown_until - time.monotonic(), 0.0)
+            }
+            stats.update(self._counters)
+        return stats
+
+
+# ============================================
+# 오류 분류
+# ============================================
+
+# 재시도할 HTTP 상태 (요청 시간 초과, 충돌, 한도 초과, 서버 오류)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    """연결/타임아웃 오류와 일시적 HTTP 상태만 재시도 (크레딧 소진 429는 제외)"""
+    try:
+        import openai
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+    except ImportError:
+        pass
+
+    status = _status_code(error)
+    if status not in RETRYABLE_STATUS:
+        return False
+    if status == 429 and getattr(error, "code", None) == "insufficient_quota":
+        return False
+    return True
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """응답 헤더의 retry-after-ms / retry-after(초 또는 HTTP 날짜) → 초"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(float(value) / 1000.0, 0.0)
+
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value)
+            return max(parsed.timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================
+# OpenAI 클라이언트 래퍼
+# ============================================
+
+def _estimate_text_tokens(text: Any) -> int:
+    """대략적인 토큰 수 (버킷 예약용, 실제 사용량은 응답 usage로 보정)"""
+    from lib.utils import estimate_tokens
+
+    if text is None:
+        return 0
+    if isinstance(text, str):
+        return estimate_tokens(text) + 1
+    if isinstance(text, list):
+        return sum(_estimate_text_tokens(item) for item in text)
+    if isinstance(text, dict):
+        return sum(_estimate_text_tokens(v) for v in text.values())
+    return 0
+
+
+def _estimate_chat_tokens(kwargs: Dict) -> int:
+    prompt = _estimate_text_tokens(kwargs.get("messages"))
+    completion = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or 1000
+    return prompt + int(completion)
+
+
+def _usage_tokens(result: Any) -> Optional[int]:
+    usage = getattr(result, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+class _LimitedEndpoint:
+    """client.chat.completions / client.embeddings 등 create()를 제한기로 감싸는 프록시"""
+
+    def __init__(self, target: Any, limiter: RateLimiter, estimator: Callable[[Dict], int]):
+        self._target = target
+        self._limiter = limiter
+        self._estimator = estimator
+
+    def create(self, **kwargs) -> Any:
+        estimated = self._estimator(kwargs)
+
+        if kwargs.get("stream"):
+            stream, release = self._limiter.call(
+                lambda: self._target.create(**kwargs),
+                estimated_tokens=estimated,
+                hold_slot=True
+            )
+            return _GuardedStream(iter(stream), release)
+
+        result = self._limiter.call(lambda: self._target.create(**kwargs), estimated_tokens=estimated)
+        actual = _usage_tokens(result)
+        if actual is not None:
+            self._limiter.tokens.adjust(actual - estimated)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class _GuardedStream:
+    """스트림을 끝까지 읽거나 닫히거나(GC 포함) 할 때 동시 호출 슬롯을 한 번만 반환"""
+
+    def __init__(self, stream: Iterator, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def _done(self):
+        if not self._released:
+            self._released = True
+            self._release()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._stream)
+        except BaseException:
+            self._done()
+            raise
+
+    def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close:
+                close()
+        finally:
+            self._done()
+
+    def __del__(self):
+        self._done()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class _Namespace:
+    """client.chat / client.audio 같은 중간 단계 속성 프록시"""
+
+    def __init__(self, target: Any, **endpoints: Any):
+        self._target = target
+        self.__dict__.update(endpoints)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class LimitedOpenAI:
+    """
+    OpenAI 클라이언트와 같은 인터페이스로 호출하되
+    chat.completions / embeddings / audio.transcriptions 호출은 제한기를 거친다
+    (그 밖의 속성은 원본 클라이언트로 위임)
+    """
+
+    def __init__(self, client: Any, limiter: RateLimiter):
+        self._client = client
+        self.limiter = limiter
+        self.chat = _Namespace(
+            client.chat,
+            completions=_LimitedEndpoint(client.chat.completions, limiter, _estimate_chat_tokens)
+        )
+        self.embeddings = _LimitedEndpoint(
+            client.embeddings, limiter, lambda kwargs: _estimate_text_tokens(kwargs.get("input"))
+        )
+        self.audio = _Namespace(
+            client.audio,
+            transcriptions=_LimitedEndpoint(client.audio.transcriptions, limiter, lambda kwargs: 0)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+# ============================================
+# 프로세스 전역 제한기
+# ============================================
+
+@st.cache_resource
+def get_rate_limiter() -> RateLimiter:
+    """모든 세션/스레드가 공유하는 OpenAI 호출 제한기"""
+    config = get_openai_limits_config()
+    return RateLimiter(
+        rpm=config["rpm"],
+        tpm=config["tpm"],
+        max_concurrency=config["max_concurrency"],
+        max_retries=config["max_retries"],
+        backoff_base=config["backoff_base_seconds"],
+        backoff_max=config["backoff_max_seconds"]
+    )
+
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """설정 페이지 표시용 제한기 지표"""
+    return get_rate_limiter().get_stats()
@@ -0,0 +1,138 @@
+"""
+ReflectOS - 규칙 기반 추출
+LLM 없이 체크인 텍스트에서 할 일 / 어려움 / 프로젝트 / 인사이트 추출
+(Check-in 폴백, 데모 데이터 생성, 대량 백필에서 공용)
+
+규칙:
+    task     : '-', '•', '*'로 시작하는 줄
+    obstacle : '!'로 시작하거나 어려움 키워드가 있는 줄
+    project  : '#프로젝트명'
+    insight  : 인사이트 키워드가 있는 줄
+"""
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Iterable
+
+
+# ============================================
+# 규칙 정의 (모듈 로드 시 한 번만 컴파일)
+# ============================================
+
+TASK_PREFIXES = ("-", "•", "*")
+
+OBSTACLE_KEYWORDS = ["문제", "어려움", "힘들", "막혀", "안됨", "실패", "오류", "버그"]
+INSIGHT_KEYWORDS = ["💡", "인사이트", "배움", "깨달음", "발견", "아이디어"]
+
+
+def _alternation(keywords: List[str]) -> str:
+    # 긴 키워드 우선 (접두사가 겹치는 키워드가 추가돼도 더 긴 쪽이 매칭되도록)
+    return "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+
+
+# 분류별 키워드 패턴 (분류마다 따로 스캔 — 한 패턴으로 합치면 분류가 다른 키워드가 겹칠 때
+# 비중첩 매칭이 한쪽을 삼킴, 예: "아이디어려움"의 '아이디어'와 '어려움')
+KEYWORD_PATTERNS = {
+    "obstacle": re.compile(_alternation(OBSTACLE_KEYWORDS)),
+    "insight": re.compile(_alternation(INSIGHT_KEYWORDS)),
+}
+PROJECT_PATTERN = re.compile(r"#(\w+)")
+
+
+def _keyword_kinds_by_line(text: str, lines: List[str]) -> Dict[int, set]:
+    """
+    줄 번호 → 포함된 키워드 분류 집합 ({"obstacle", "insight"}의 부분집합)
+    분류별 패턴으로 전체 텍스트를 한 번씩 스캔하고 매칭 위치를 줄 번호로 환산 (키워드 없는 줄은 비용 없음)
+
+    Args:
+        text: 전체 텍스트
+        lines: text.split("\n")
+    """
+    line_ends = None
+    kinds: Dict[int, set] = {}
+    for kind, pattern in KEYWORD_PATTERNS.items():
+        for match in pattern.finditer(text):
+            if line_ends is None:
+                line_ends = list(accumulate(len(line) + 1 for line in lines))
+            kinds.setdefault(bisect_right(line_ends, match.start()), set()).add(kind)
+    return kinds
+
+
+# ============================================
+# 추출
+# ============================================
+
+def extract_by_rules(content: str) -> Dict[str, List[str]]:
+    """
+    규칙 기반으로 텍스트에서 구조화된 정보 추출
+
+    Args:
+        content: 체크인 내용 텍스트
+
+    Returns:
+        {"tasks", "obstacles", "projects", "insights", "people": [], "emotions": []}
+        (obstacles / projects / insights는 처음 나온 순서로 중복 제거)
+    """
+    tasks = []
+    # dict를 순서 있는 집합으로 사용 (O(1) 중복 확인)
+    obstacles: Dict[str, None] = {}
+    insights: Dict[str, None] = {}
+
+    text = content.strip()
+    lines = text.split("\n")
+    keyword_kinds = _keyword_kinds_by_line(text, lines)
+
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith(TASK_PREFIXES):
+            task_text = line.lstrip("-•* ").strip()
+            if task_text:
+                tasks.append(task_text)
+
+        kinds = keyword_kinds.get(index, ())
+
+        if "obstacle" in kinds or line.startswith("!"):
+            obstacle_text = line.lstrip("! ").strip()
+            if obstacle_text:
+                obstacles.setdefault(obstacle_text)
+
+        if "insight" in kinds:
+            insights.setdefault(line)
+
+    # #태그는 줄을 넘지 않으므로 전체 텍스트에서 한 번에 찾아도 줄 단위 결과와 같다
+    projects = dict.fromkeys(PROJECT_PATTERN.findall(text))
+
+    return {
+        "tasks": tasks,
+        "obstacles": list(obstacles),
+        "projects": list(projects),
+        "insights": list(insights),
+        "people": [],
+        "emotions": []
+    }
+
+
+def extract_by_rules_batch(contents: Iterable[str]) -> List[Dict[str, List[str]]]:
+    """
+    여러 체크인을 한 번에 규칙 기반 추출 (데모 생성, 대량 백필용)
+    같은 내용은 한 번만 계산 (반복된 내용에는 결과 사본을 반환)
+
+    Args:
+        contents: 체크인 텍스트 목록
+
+    Returns:
+        입력 순서대로 extract_by_rules 결과 목록
+    """
+    computed: Dict[str, Dict[str, List[str]]] = {}
+    results = []
+    for content in contents:
+        data = computed.get(content)
+        if data is None:
+            data = computed[content] = extract_by_rules(content)
+            results.append(data)
+        else:
+            results.append({key: list(values) for key, values in data.items()})
+    return results
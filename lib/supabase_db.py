@@ -2,11 +2,19 @@
 ReflectOS - Supabase DB CRUD 헬퍼
 각 테이블별 기본 CRUD 함수 제공
 """
+import base64
+import copy
+import hashlib
+import json
+import re
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, date
 from typing import Optional, List, Dict, Any, Tuple
 import streamlit as st
 from lib.config import get_supabase_client, get_current_user_id
-from lib.utils import has_demo_tag
+from lib.utils import has_demo_tag, DEMO_TAG
 
 
 # ============================================
@@ -103,14 +111,85 @@ def _get_user_id():
 # profiles 테이블
 # ============================================
 
+# 세션 프로필 캐시: {user_id: {"data", "version", "checked_at"}} (st.session_state에 보관)
+PROFILE_CACHE_KEY = "_profile_cache"
+
+
+def _profile_cache() -> Dict[str, Dict]:
+    """현재 세션의 프로필 캐시 dict"""
+    if PROFILE_CACHE_KEY not in st.session_state:
+        st.session_state[PROFILE_CACHE_KEY] = {}
+    return st.session_state[PROFILE_CACHE_KEY]
+
+
+def _profile_ttl() -> float:
+    from lib.config import get_cache_config
+    return float(get_cache_config().get("profile_ttl_seconds", 30))
+
+
+def _cache_profile(user_id: str, profile: Optional[Dict]):
+    """조회/저장 결과로 캐시 갱신 (version은 sql/profiles_version.sql 적용 시에만 존재)"""
+    if _profile_ttl() <= 0:
+        return
+    _profile_cache()[user_id] = {
+        "data": copy.deepcopy(profile),
+        "version": (profile or {}).get("version"),
+        "checked_at": time.monotonic()
+    }
+
+
+def invalidate_profile_cache(user_id: str = None):
+    """프로필 캐시 무효화 (user_id가 없으면 현재 세션 캐시 전체)"""
+    cache = _profile_cache()
+    if user_id:
+        cache.pop(user_id, None)
+    else:
+        cache.clear()
+
+
+def _profile_version(client, user_id: str) -> Optional[int]:
+    """profiles.version만 조회 (실패하면 None → 전체 재조회)"""
+    try:
+        response = client.table("profiles").select("version").eq("user_id", user_id).limit(1).execute()
+    except Exception:
+        return None
+    return response.data[0].get("version") if response.data else None
+
+
+def _fetch_profile(client, user_id: str) -> Optional[Dict]:
+    """profiles 전체 조회 + 캐시 갱신 (캐시 무시, 오류는 호출부로 전달)"""
+    response = client.table("profiles").select("*").eq("user_id", user_id).limit(1).execute()
+    profile = response.data[0] if response.data else None
+    _cache_profile(user_id, profile)
+    return profile
+
+
 def get_profile(user_id: str = None) -> Optional[Dict]:
-    """사용자 프로필 조회"""
+    """
+    사용자 프로필 조회 (세션 캐시 경유)
+    
+    - [cache] profile_ttl_seconds 안에서는 DB 조회 없이 캐시 반환 (한 번의 rerun 안의 반복 조회 제거)
+    - 지나면 profiles.version만 조회해서 같으면 캐시 재사용, 다르면 전체 재조회
+    - upsert_profile / update_profile_settings는 저장 결과로 캐시 갱신
+    
+    반환값은 사본이므로 호출부에서 수정해도 캐시에 영향 없음
+    """
     try:
         client = _get_client()
         user_id = user_id or _get_user_id()
+        ttl = _profile_ttl()
+        entry = _profile_cache().get(user_id) if ttl > 0 else None
         
-        response = client.table("profiles").select("*").eq("user_id", user_id).single().execute()
-        return response.data
+        if entry is not None:
+            fresh = time.monotonic() - entry["checked_at"] < ttl
+            if not fresh and entry["version"] is not None:
+                fresh = _profile_version(client, user_id) == entry["version"]
+                if fresh:
+                    entry["checked_at"] = time.monotonic()
+            if fresh:
+                return copy.deepcopy(entry["data"])
+        
+        return _fetch_profile(client, user_id)
     except Exception as e:
         # 인증 오류 처리
         _handle_auth_error(e)
@@ -140,14 +219,89 @@ def upsert_profile(profile_data: Dict, user_id: str = None) -> Dict:
         }
         
         response = client.table("profiles").upsert(data, on_conflict="user_id").execute()
-        return response.data[0] if response.data else None
+        row = response.data[0] if response.data else None
+        if row:
+            _cache_profile(user_id, row)
+        else:
+            invalidate_profile_cache(user_id)
+        return row
     except Exception as e:
+        invalidate_profile_cache(user_id)
         # 인증 오류 처리
         _handle_auth_error(e)
         st.error(f"프로필 저장 실패: {e}")
         return None
 
 
+# 다른 세션의 동시 변경으로 조건부 UPDATE가 0행일 때 재시도 횟수
+PROFILE_UPDATE_RETRIES = 3
+
+
+def update_profile_settings(
+    changes: Dict = None,
+    remove_keys: List[str] = None,
+    user_id: str = None,
+    create_missing: bool = False
+) -> Optional[Dict]:
+    """
+    profiles.settings 일부 키만 변경 (다른 키는 DB의 최신 값 유지)
+    
+    - 병합 기준은 캐시가 아니라 DB에서 새로 읽은 프로필 (TTL 안에 다른 세션이 바꾼 키를 덮어쓰지 않음)
+    - version 컬럼이 있으면 읽은 version일 때만 UPDATE → 그 사이 변경되었으면 다시 읽고 재시도
+    
+    Args:
+        changes: 추가/변경할 키
+        remove_keys: 삭제할 키
+        user_id: 사용자 ID
+        create_missing: 프로필 행이 없으면 upsert로 생성
+    
+    Returns:
+        갱신된 프로필 (프로필 행이 없거나 실패하면 None)
+    """
+    def merge(current: Dict) -> Dict:
+        settings = dict(current or {})
+        settings.update(changes or {})
+        for key in remove_keys or []:
+            settings.pop(key, None)
+        return settings
+    
+    try:
+        client = _get_client()
+        user_id = user_id or _get_user_id()
+        
+        for _ in range(PROFILE_UPDATE_RETRIES):
+            profile = _fetch_profile(client, user_id)
+            if profile is None:
+                return upsert_profile({"settings": merge({})}, user_id=user_id) if create_missing else None
+            
+            current = profile.get("settings") or {}
+            settings = merge(current)
+            if settings == current:
+                return profile
+            
+            query = client.table("profiles").update({"settings": settings}).eq("user_id", user_id)
+            version = profile.get("version")
+            if version is not None:
+                query = query.eq("version", version)
+            response = query.execute()
+            
+            row = response.data[0] if response.data else None
+            if row:
+                _cache_profile(user_id, row)
+                return row
+            if version is None:
+                break
+        
+        invalidate_profile_cache(user_id)
+        st.error("프로필 설정 저장 실패: 다른 세션에서 동시에 변경 중입니다. 다시 시도해주세요.")
+        return None
+    except Exception as e:
+        invalidate_profile_cache(user_id)
+        _handle_auth_error(e)
+        st.error(f"프로필 설정 저장 실패: {e}")
+        return None
+
+
 # ============================================
 # checkins 테이블
 # ============================================
@@ -195,6 +349,128 @@ def insert_checkin(
         return None
 
 
+def _is_missing_function_error(e: Exception) -> bool:
+    """RPC 함수가 없음 (PGRST202 — 마이그레이션 미적용)"""
+    error_str = str(e)
+    return getattr(e, "code", None) == "PGRST202" or "PGRST202" in error_str or "Could not find the function" in error_str
+
+
+def save_checkin_bundle(
+    content: str,
+    mood: str = "neutral",
+    tags: List[str] = None,
+    metadata: Dict = None,
+    artifacts: List[Dict] = None,
+    extraction_type: Optional[str] = None,
+    extraction_data: Optional[Dict] = None,
+    memory: Optional[List[Dict]] = None,
+    user_id: str = None,
+    created_at: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    체크인 + 첨부파일 + 추출 (+ 선택: RAG 청크/임베딩)을 save_checkin_bundle RPC 1회로 저장
+    한 트랜잭션이므로 중간 실패 시 전체 롤백 (추출 없는 체크인이 남지 않음)
+    
+    sql/save_checkin_bundle.sql이 적용되지 않았으면 기존 개별 저장으로 폴백
+    (이 경우 memory는 저장하지 않고 결과의 "memory"가 None → 호출부에서 기존 방식으로 인덱싱)
+    
+    Args:
+        content / mood / tags / metadata / created_at: insert_checkin과 동일
+        artifacts: [{"type", "storage_path", "original_name", "file_size", "metadata"}]
+        extraction_type / extraction_data: 추출 저장 (둘 중 하나라도 없으면 생략)
+        memory: rag.build_checkin_memory_entries 결과 (None이면 인덱싱 생략)
+        user_id: 사용자 ID
+    
+    Returns:
+        {"checkin": 체크인 레코드, "artifact_ids": [...], "extraction_id": ID 또는 None,
+         "memory": 저장된 임베딩 행 목록 또는 None, "atomic": RPC 사용 여부}
+    """
+    try:
+        client = _get_client()
+        user_id = user_id or _get_user_id()
+    except Exception as e:
+        st.error(f"체크인 저장 실패: {e}")
+        return None
+    
+    artifacts = artifacts or []
+    params = {
+        "p_user_id": user_id,
+        "p_content": content,
+        "p_mood": mood,
+        "p_tags": tags or [],
+        "p_metadata": metadata or {},
+        "p_created_at": created_at,
+        "p_artifacts": [
+            {
+                "type": a["type"],
+                "storage_path": a["storage_path"],
+                "original_name": a.get("original_name"),
+                "file_size": a.get("file_size"),
+                "mime_type": a.get("mime_type"),
+                "metadata": a.get("metadata") or {}
+            }
+            for a in artifacts
+        ],
+        "p_extraction_type": extraction_type if extraction_data is not None else None,
+        "p_extraction_data": extraction_data if extraction_type else None,
+        "p_memory": [
+            {key: entry.get(key) for key in (
+                "source_type", "content", "content_hash", "metadata", "store_chunk",
+                "is_demo", "embedding", "embedding_reduced"
+            )}
+            for entry in memory or []
+        ]
+    }
+    
+    try:
+        response = client.rpc("save_checkin_bundle", params).execute()
+        data = response.data or {}
+        if not data.get("checkin"):
+            st.error("체크인 저장 실패: 빈 응답")
+            return None
+        return {
+            "checkin": data["checkin"],
+            "artifact_ids": data.get("artifact_ids") or [],
+            "extraction_id": data.get("extraction_id"),
+            "memory": data.get("memory") if memory is not None else None,
+            "atomic": True
+        }
+    except Exception as e:
+        if not _is_missing_function_error(e):
+            _handle_auth_error(e)
+            st.error(f"체크인 저장 실패: {e}")
+            return None
+    
+    # 폴백: 개별 저장 (RPC 미적용 환경)
+    checkin = insert_checkin(content, mood=mood, tags=tags, metadata=metadata, user_id=user_id, created_at=created_at)
+    if not checkin:
+        return None
+    
+    artifact_rows = [
+        insert_artifact(
+            checkin_id=checkin["id"],
+            artifact_type=a["type"],
+            storage_path=a["storage_path"],
+            metadata=a.get("metadata"),
+            original_name=a.get("original_name"),
+            file_size=a.get("file_size"),
+            user_id=user_id
+        )
+        for a in artifacts
+    ]
+    extraction = None
+    if extraction_type and extraction_data is not None:
+        extraction = insert_extraction("checkin", checkin["id"], extraction_type, extraction_data, user_id=user_id)
+    
+    return {
+        "checkin": checkin,
+        "artifact_ids": [row["id"] for row in artifact_rows if row],
+        "extraction_id": extraction["id"] if extraction else None,
+        "memory": None,
+        "atomic": False
+    }
+
+
 def list_checkins(
     limit: int = 10,
     offset: int = 0,
@@ -206,7 +482,7 @@ def list_checkins(
     
     Args:
         limit: 가져올 개수
-        offset: 건너뛸 개수 (페이지네이션)
+        offset: 건너뛸 개수 (깊은 페이지 탐색은 list_checkins_page 사용)
         user_id: 사용자 ID
         exclude_demo: True면 데모 데이터 제외
     
@@ -236,6 +512,132 @@ def list_checkins(
         return []
 
 
+# 체크인 페이지 커서: (created_at, id) — 같은 시각 체크인도 id로 순서가 고정됨
+CHECKIN_PAGE_MAX_LIMIT = 100
+# PostgREST timestamptz 표기 (소수 초 자릿수는 가변)
+_CURSOR_TIMESTAMP_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:?\d{2})?)?$")
+
+
+def encode_checkin_cursor(checkin: Dict) -> str:
+    """체크인 레코드 → 불투명 페이지 커서 (URL-safe base64)"""
+    raw = json.dumps([checkin["created_at"], checkin["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_checkin_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    페이지 커서 → (created_at, id)
+    
+    Raises:
+        ValueError: 형식이 잘못된 커서
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, checkin_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        # 필터 문자열에 그대로 들어가므로 값 형식을 확인
+        if not _CURSOR_TIMESTAMP_PATTERN.match(str(created_at)):
+            raise ValueError(created_at)
+        checkin_id = str(uuid.UUID(str(checkin_id)))
+    except Exception as e:
+        raise ValueError(f"잘못된 페이지 커서: {cursor}") from e
+    return str(created_at), checkin_id
+
+
+def _query_checkins_page(
+    client,
+    user_id: str,
+    limit: int,
+    cursor: Optional[str],
+    exclude_demo: bool
+) -> Dict[str, Any]:
+    """
+    키셋 페이지 1회 조회 (내부 헬퍼, 오류는 호출부로 전달)
+    세션 상태를 읽지 않으므로 백그라운드 스레드에서도 호출 가능
+    """
+    limit = max(1, min(int(limit), CHECKIN_PAGE_MAX_LIMIT))
+    query = client.table("checkins").select("*").eq("user_id", user_id)
+    if exclude_demo:
+        # 데모 제외를 DB에서 처리해야 페이지 크기가 일정하게 유지됨 (tags는 항상 배열로 저장)
+        query = query.not_.contains("tags", [DEMO_TAG])
+    if cursor:
+        created_at, checkin_id = decode_checkin_cursor(cursor)
+        # (created_at, id) < 커서: created_at <= 커서 조건이 (user_id, created_at, id) 인덱스 탐색 시작점이 되고
+        # OR 조건은 같은 시각의 행만 걸러낸다 → 페이지 깊이와 무관하게 일정한 비용
+        query = query.lte("created_at", created_at).or_(
+            f'created_at.lt."{created_at}",id.lt.{checkin_id}'
+        )
+    
+    # 1개 더 가져와서 다음 페이지 존재 여부 판단 (별도 count 쿼리 없음)
+    response = (
+        query.order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(limit + 1)
+        .execute()
+    )
+    rows = response.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_checkin_cursor(rows[-1]) if has_more else None
+    }
+
+
+def list_checkins_page(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    user_id: str = None,
+    exclude_demo: bool = False
+) -> Dict[str, Any]:
+    """
+    체크인 목록 키셋 페이지네이션 (최신순, (created_at, id) 커서)
+    
+    - offset 방식과 달리 깊은 페이지도 일정한 비용
+    - 새 체크인이 추가되어도 다음 페이지 행이 밀리거나 중복되지 않음
+    
+    Args:
+        limit: 페이지 크기 (최대 CHECKIN_PAGE_MAX_LIMIT)
+        cursor: 이전 페이지의 next_cursor (None이면 첫 페이지)
+        user_id: 사용자 ID
+        exclude_demo: True면 데모 데이터 제외
+    
+    Returns:
+        {"items": 체크인 레코드 목록, "next_cursor": 다음 페이지 커서 또는 None(마지막 페이지)}
+    """
+    try:
+        return _query_checkins_page(_get_client(), user_id or _get_user_id(), limit, cursor, exclude_demo)
+    except Exception as e:
+        _handle_auth_error(e)
+        st.error(f"체크인 목록 조회 실패: {e}")
+        return {"items": [], "next_cursor": None}
+
+
+@st.cache_resource
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    """다음 페이지 미리 가져오기용 스레드풀 (앱 전체 공유)"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="checkins-prefetch")
+
+
+def prefetch_checkins_page(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    user_id: str = None,
+    exclude_demo: bool = False
+) -> Future:
+    """
+    다음 페이지를 백그라운드에서 미리 조회
+    클라이언트/사용자 ID는 호출 스레드에서 확정 (세션 상태는 스크립트 스레드에서만 읽을 수 있음)
+    
+    Returns:
+        결과가 list_checkins_page와 같은 dict인 Future (조회 오류는 future.result()에서 발생)
+    """
+    client = _get_client()
+    user_id = user_id or _get_user_id()
+    return _get_prefetch_executor().submit(
+        _query_checkins_page, client, user_id, limit, cursor, exclude_demo
+    )
+
+
 def get_checkin(checkin_id: str, user_id: str = None) -> Optional[Dict]:
     """특정 체크인 조회"""
     try:
@@ -315,6 +717,39 @@ def insert_extraction(
         return None
 
 
+def insert_extractions_bulk(records: List[Dict], batch_size: int = 200) -> int:
+    """
+    추출 데이터 일괄 저장 (배치 보강 작업용)
+    
+    Args:
+        records: [{"user_id", "source_type", "source_id", "extraction_type", "data", "created_at"(선택)}]
+        batch_size: 요청당 행 수
+    
+    Returns:
+        저장된 행 수
+    """
+    if not records:
+        return 0
+    
+    try:
+        client = _get_client()
+        now = datetime.utcnow().isoformat()
+        saved = 0
+        
+        for start in range(0, len(records), batch_size):
+            rows = [
+                {**record, "created_at": record.get("created_at") or now}
+                for record in records[start:start + batch_size]
+            ]
+            response = client.table("extractions").insert(rows).execute()
+            saved += len(response.data or [])
+        
+        return saved
+    except Exception as e:
+        st.error(f"Extraction 일괄 저장 실패: {e}")
+        return 0
+
+
 def get_extractions_by_source(source_type: str, source_id: str, user_id: str = None) -> List[Dict]:
     """특정 소스의 모든 extraction 조회"""
     try:
@@ -336,6 +771,56 @@ def get_extractions_by_source(source_type: str, source_id: str, user_id: str = N
         return []
 
 
+# in_ 필터 1회당 ID 개수 (UUID 36자 × 100 ≈ 4KB, URL 길이 제한 안쪽)
+EXTRACTION_ID_CHUNK_SIZE = 100
+
+
+def get_extractions_for_sources(
+    source_ids: List[str],
+    source_type: str = "checkin",
+    columns: str = "data",
+    user_id: str = None,
+    chunk_size: int = EXTRACTION_ID_CHUNK_SIZE
+) -> List[Dict]:
+    """
+    여러 소스의 extraction 일괄 조회 (소스별 개별 조회 대신 in_ 필터)
+    
+    Args:
+        source_ids: 소스 ID 목록
+        source_type: 소스 타입
+        columns: 가져올 컬럼 (기본: data만 — 리포트 집계용)
+        user_id: 사용자 ID
+        chunk_size: 요청 1회당 ID 개수
+    
+    Returns:
+        extraction 레코드 목록 (columns에 지정한 컬럼만)
+    """
+    ids = list(dict.fromkeys(sid for sid in source_ids if sid))
+    if not ids:
+        return []
+    
+    try:
+        client = _get_client()
+        user_id = user_id or _get_user_id()
+        
+        rows = []
+        for start in range(0, len(ids), chunk_size):
+            query = (
+                client.table("extractions")
+                .select(columns)
+                .eq("source_type", source_type)
+                .in_("source_id", ids[start:start + chunk_size])
+            )
+            if user_id:
+                query = query.eq("user_id", user_id)
+            rows.extend(query.execute().data or [])
+        return rows
+    except Exception as e:
+        _handle_auth_error(e)
+        st.error(f"추출 데이터 조회 실패: {e}")
+        return []
+
+
 # ============================================
 # artifacts 테이블 (멀티모달 첨부파일)
 # ============================================
@@ -406,6 +891,37 @@ def list_artifacts_by_checkin(checkin_id: str, user_id: str = None) -> List[Dict
         return []
 
 
+def find_artifact_by_media_key(media_cache_key: str, user_id: str = None) -> Optional[Dict]:
+    """
+    같은 원본·파라미터로 이미 분석한 아티팩트 조회 (metadata.media_cache_key 기준)
+    
+    Args:
+        media_cache_key: lib.cache.media_cache_key 값
+        user_id: 사용자 ID
+    
+    Returns:
+        가장 최근 artifact 레코드 (없으면 None)
+    """
+    try:
+        client = _get_client()
+        user_id = user_id or _get_user_id()
+        if not user_id:
+            return None
+        
+        response = (
+            client.table("artifacts")
+            .select("id, metadata, created_at")
+            .eq("user_id", user_id)
+            .eq("metadata->>media_cache_key", media_cache_key)
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+    except Exception:
+        return None
+
+
 # ============================================
 # plans 테이블 (일간 플랜)
 # ============================================
@@ -511,6 +1027,7 @@ def insert_memory_chunk(
             "source_type": source_type,
             "source_id": source_id,
             "content": content,
+            "content_hash": hashlib.sha256(content.encode("utf-8")).hexdigest(),
             "created_at": datetime.utcnow().isoformat()
         }
         
@@ -576,6 +1093,57 @@ def get_checkins_date_range(
         return []
 
 
+def get_report_data(
+    start_date: str,
+    end_date: str,
+    user_id: str = None,
+    exclude_demo: bool = False
+) -> Dict[str, List[Dict]]:
+    """
+    주간 리포트 입력 조회: 기간 내 체크인 + 체크인별 extraction data
+    get_report_data RPC 1회로 조인해서 가져옴 (체크인 수와 무관하게 왕복 1회)
+    
+    sql/get_report_data.sql이 적용되지 않았으면 체크인 조회 + get_extractions_for_sources로 폴백
+    
+    Args:
+        start_date: 시작일 (YYYY-MM-DD)
+        end_date: 종료일 (YYYY-MM-DD, 해당일 포함)
+        user_id: 사용자 ID
+        exclude_demo: True면 데모 데이터 제외
+    
+    Returns:
+        {"checkins": 체크인 레코드 목록 (최신순), "extractions": [{"source_id", "data"}]}
+    """
+    try:
+        client = _get_client()
+        user_id = user_id or _get_user_id()
+        
+        response = client.rpc("get_report_data", {
+            "p_user_id": user_id,
+            "p_start": f"{start_date}T00:00:00",
+            "p_end": f"{end_date}T23:59:59",
+            "p_exclude_demo": exclude_demo,
+            "p_demo_tag": DEMO_TAG
+        }).execute()
+        data = response.data or {}
+        return {
+            "checkins": data.get("checkins") or [],
+            "extractions": data.get("extractions") or []
+        }
+    except Exception as e:
+        if not _is_missing_function_error(e):
+            _handle_auth_error(e)
+            st.error(f"리포트 데이터 조회 실패: {e}")
+            return {"checkins": [], "extractions": []}
+    
+    # 폴백: 체크인 1회 + extraction 일괄 조회 (RPC 미적용 환경)
+    checkins = get_checkins_date_range(start_date, end_date, user_id=user_id, exclude_demo=exclude_demo)
+    extractions = get_extractions_for_sources(
+        [c["id"] for c in checkins], columns="source_id, data", user_id=user_id
+    )
+    return {"checkins": checkins, "extractions": extractions}
+
+
 # ============================================
 # module_entries 테이블 (공용 모듈 데이터)
 # ============================================
@@ -0,0 +1,274 @@
+"""
+ReflectOS - LLM 호출 계측
+호출 지점별 지연시간, 토큰, 추정 비용, 재시도, 캐시 적중 기록 (메모리 링 버퍼 + JSONL)
+"""
+import json
+import os
+import threading
+import time
+import numpy as np
+import streamlit as st
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Iterator
+from lib.config import get_telemetry_config, get_llm_provider_config
+
+
+# ============================================
+# 가격표 (USD, 2025년 기준 공개 가격 — 변경 시 여기만 수정)
+# ============================================
+
+# 텍스트/임베딩 모델: 100만 토큰당 (input, output)
+MODEL_PRICING_PER_1M = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+# 음성 모델: 분당
+AUDIO_PRICING_PER_MINUTE = {
+    "whisper-1": 0.006,
+}
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    audio_seconds: Optional[float] = None
+) -> Optional[float]:
+    """
+    호출 1건의 추정 비용 (USD, 가격표에 없는 모델이면 None)
+
+    Args:
+        model: 모델명
+        prompt_tokens: 입력 토큰 수
+        completion_tokens: 출력 토큰 수
+        audio_seconds: 음성 길이(초, 음성 모델)
+    """
+    if model in AUDIO_PRICING_PER_MINUTE:
+        if audio_seconds is None:
+            return None
+        return AUDIO_PRICING_PER_MINUTE[model] * audio_seconds / 60.0
+
+    pricing = MODEL_PRICING_PER_1M.get(model)
+    if pricing is None:
+        return None
+    input_price, output_price = pricing
+    return ((prompt_tokens or 0) * input_price + (completion_tokens or 0) * output_price) / 1_000_000
+
+
+# ============================================
+# 기록 저장소 (링 버퍼 + JSONL)
+# ============================================
+
+class TelemetrySink:
+    """
+    최근 호출 기록을 링 버퍼에 보관하고 JSONL 파일에 한 줄씩 추가
+
+    Args:
+        buffer_size: 메모리에 보관할 최근 기록 수
+        jsonl_path: JSONL 파일 경로 (None이면 파일 기록 안 함)
+    """
+
+    def __init__(self, buffer_size: int = 2000, jsonl_path: Optional[str] = None):
+        self._records: deque = deque(maxlen=max(int(buffer_size), 1))
+        self._lock = threading.Lock()
+        self.jsonl_path = jsonl_path
+
+        if jsonl_path:
+            directory = os.path.dirname(jsonl_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def add(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) if self.jsonl_path else None
+        with self._lock:
+            self._records.append(record)
+            if line is not None:
+                try:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                except OSError:
+                    pass  # 디스크 기록 실패는 무시 (메모리 버퍼는 유지)
+
+    def records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+@st.cache_resource
+def _get_sink() -> Optional[TelemetrySink]:
+    """프로세스 전역 계측 저장소 싱글톤 (비활성화면 None)"""
+    config = get_telemetry_config()
+    if not config.get("enabled", True):
+        return None
+    path = config.get("jsonl_path") or None
+    try:
+        return TelemetrySink(config.get("buffer_size", 2000), path)
+    except OSError:
+        return TelemetrySink(config.get("buffer_size", 2000), None)
+
+
+# ============================================
+# 기록
+# ============================================
+
+def record_llm_call(
+    site: str,
+    model: str,
+    latency_ms: float,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    retries: int = 0,
+    cache_hit: bool = False,
+    error: Optional[str] = None,
+    **extra: Any
+):
+    """
+    호출 1건 기록
+
+    Args:
+        site: 호출 지점 (ingest, extract, reflect, embedding, transcribe 등)
+        model: 모델명
+        latency_ms: 벽시계 소요 시간
+        prompt_tokens / completion_tokens: response.usage 값 (캐시 적중이면 None)
+        retries: 제한기 재시도 횟수
+        cache_hit: 캐시에서 반환했는지
+        error: 실패 시 오류 요약
+        extra: 호출별 부가 정보 (ttft_ms, inputs, audio_seconds 등)
+    """
+    sink = _get_sink()
+    if sink is None:
+        return
+
+    provider = get_llm_provider_config().get("provider", "openai")
+
+    cost = None
+    if provider == "offline":
+        cost = 0.0  # offline provider는 과금 없음 (OpenAI 단가로 집계하지 않음)
+    elif not cache_hit:
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, extra.get("audio_seconds"))
+
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "site": site,
+        "model": model,
+        "provider": provider,
+        "latency_ms": round(float(latency_ms), 1),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": cost,
+        "retries": int(retries),
+        "cache_hit": bool(cache_hit),
+        "error": error
+    }
+    record.update(extra)
+    sink.add(record)
+
+
+@contextmanager
+def track_llm_call(site: str, model: str) -> Iterator[Dict[str, Any]]:
+    """
+    with 블록의 소요 시간과 제한기 재시도 횟수를 재서 기록
+    블록 안에서 yield된 dict에 usage / cache_hit / 부가 정보를 채운다
+
+    사용 예:
+        with track_llm_call("reflect", model) as call:
+            response = client.chat.completions.create(...)
+            call["usage"] = response.usage
+    """
+    from lib.rate_limit import thread_retry_count
+
+    call: Dict[str, Any] = {"usage": None, "cache_hit": False}
+    retries_before = thread_retry_count()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield call
+    except GeneratorExit:
+        error = "cancelled"  # 스트림을 끝까지 읽지 않고 닫음
+        raise
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        usage = call.pop("usage", None)
+        cache_hit = call.pop("cache_hit", False)
+        record_llm_call(
+            site,
+            model,
+            (time.perf_counter() - started) * 1000,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+            retries=thread_retry_count() - retries_before,
+            cache_hit=cache_hit,
+            error=error,
+            **call
+        )
+
+
+# ============================================
+# 조회 / 집계
+# ============================================
+
+def get_recent_llm_calls(limit: int = 100) -> List[Dict[str, Any]]:
+    """최근 호출 기록 (최신순)"""
+    sink = _get_sink()
+    if sink is None:
+        return []
+    return list(reversed(sink.records()))[:limit]
+
+
+def summarize_llm_calls() -> List[Dict[str, Any]]:
+    """
+    호출 지점별 집계 (링 버퍼 기준)
+
+    Returns:
+        [{"site", "calls", "cache_hit_rate", "p50_ms", "p95_ms", "prompt_tokens",
+          "completion_tokens", "cost_usd", "retries", "errors"}, ...] (비용 큰 순)
+    """
+    sink = _get_sink()
+    if sink is None:
+        return []
+
+    by_site: Dict[str, List[Dict[str, Any]]] = {}
+    for record in sink.records():
+        by_site.setdefault(record["site"], []).append(record)
+
+    rows = []
+    for site, records in by_site.items():
+        # 지연시간 분포는 실제 API 호출만 (캐시 적중은 ~0ms라 분포를 왜곡)
+        api_latencies = [r["latency_ms"] for r in records if not r["cache_hit"]]
+        latencies = np.array(api_latencies) if api_latencies else None
+        hits = sum(1 for r in records if r["cache_hit"])
+        rows.append({
+            "site": site,
+            "calls": len(records),
+            "cache_hit_rate": hits / len(records),
+            "p50_ms": float(np.percentile(latencies, 50)) if latencies is not None else None,
+            "p95_ms": float(np.percentile(latencies, 95)) if latencies is not None else None,
+            "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in records),
+            "completion_tokens": sum(r.get("completion_tokens") or 0 for r in records),
+            "cost_usd": sum(r.get("cost_usd") or 0.0 for r in records),
+            "retries": sum(r.get("retries") or 0 for r in records),
+            "errors": sum(1 for r in records if r.get("error"))
+        })
+
+    rows.sort(key=lambda r: r["cost_usd"], reverse=True)
+    return rows
+
+
+def clear_llm_telemetry():
+    """메모리 링 버퍼 비우기 (JSONL 파일은 유지)"""
+    sink = _get_sink()
+    if sink is not None:
+        sink.clear()
@@ -0,0 +1,468 @@
+"""
+ReflectOS - 벡터 스토어 백엔드
+similarity_search가 사용하는 검색 백엔드 선택 및 인메모리 NumPy 인덱스
+"""
+import json
+import threading
+import numpy as np
+from datetime import datetime, timezone
+import streamlit as st
+from typing import Optional, List, Dict, Any, Tuple, Callable
+from lib.config import get_supabase_client, get_rag_config
+
+
+# 지원하는 백엔드
+VECTOR_BACKENDS = ("pgvector", "memory")
+
+# 임베딩 저장 프로필 (차원 / 정밀도 / memory_embeddings 컬럼)
+# - 1536_f32: 기존 vector(1536) 컬럼
+# - 768_f16, 512_f16: halfvec 컬럼 (sql/memory_embeddings_halfvec.sql), 인덱스 크기 4~6배 축소
+EMBEDDING_PROFILES = {
+    "1536_f32": {"dimensions": 1536, "precision": "f32", "column": "embedding"},
+    "768_f16": {"dimensions": 768, "precision": "f16", "column": "embedding_768"},
+    "512_f16": {"dimensions": 512, "precision": "f16", "column": "embedding_512"},
+}
+DEFAULT_EMBEDDING_PROFILE = "1536_f32"
+FULL_EMBEDDING_DIMENSIONS = 1536
+
+# memory_embeddings 로드 시 한 번에 가져올 행 수 (PostgREST max-rows 기본값)
+_LOAD_PAGE_SIZE = 1000
+
+# 인덱스에 함께 보관하는 메타데이터 컬럼 (search_memories RPC 반환 형식과 동일)
+_ROW_FIELDS = ("id", "source_type", "source_id", "content", "created_at")
+
+
+def get_vector_backend() -> str:
+    """설정된 벡터 검색 백엔드 반환 (알 수 없는 값이면 pgvector)"""
+    backend = get_rag_config().get("vector_backend", "pgvector")
+    return backend if backend in VECTOR_BACKENDS else "pgvector"
+
+
+def get_embedding_profile() -> Dict[str, Any]:
+    """
+    설정된 임베딩 저장 프로필 반환 (알 수 없는 값이면 1536_f32)
+
+    Returns:
+        {"name", "dimensions", "precision", "column", "rescore", "rescore_factor"}
+    """
+    config = get_rag_config()
+    name = config.get("embedding_profile", DEFAULT_EMBEDDING_PROFILE)
+    if name not in EMBEDDING_PROFILES:
+        name = DEFAULT_EMBEDDING_PROFILE
+    profile = {"name": name, **EMBEDDING_PROFILES[name]}
+    reduced = profile["column"] != "embedding"
+    profile["rescore"] = reduced and bool(config.get("rescore", False))
+    profile["rescore_factor"] = max(int(config.get("rescore_factor", 4)), 1)
+    return profile
+
+
+def is_reduced_profile(profile: Dict[str, Any]) -> bool:
+    return profile["column"] != "embedding"
+
+
+def embedding_request_dimensions(profile: Dict[str, Any]) -> Optional[int]:
+    """
+    임베딩 API에 요청할 차원
+    재점수(rescore)를 쓰면 1536차원을 받아 로컬에서 축소, 아니면 API dimensions로 바로 축소
+    """
+    if not is_reduced_profile(profile) or profile["rescore"]:
+        return None
+    return profile["dimensions"]
+
+
+def reduce_embedding(embedding: List[float], dimensions: int) -> List[float]:
+    """
+    앞쪽 dimensions개만 남기고 L2 재정규화
+    (text-embedding-3 계열은 API의 dimensions 파라미터와 같은 결과)
+    """
+    vec = np.asarray(embedding, dtype=np.float32)
+    if vec.shape[0] <= dimensions:
+        return list(embedding)
+    return _normalize(vec[:dimensions]).tolist()
+
+
+def storage_vectors(
+    embedding: List[float],
+    profile: Dict[str, Any]
+) -> Tuple[Optional[List[float]], Optional[List[float]]]:
+    """
+    임베딩을 저장용 (전체 정밀도 vector(1536), 축소 halfvec)으로 분리
+
+    Returns:
+        (full, reduced) — 1536_f32 프로필이면 reduced=None,
+        축소 프로필에서 rescore가 꺼져 있으면 full=None
+    """
+    if not is_reduced_profile(profile):
+        return embedding, None
+    reduced = reduce_embedding(embedding, profile["dimensions"])
+    full = embedding if profile["rescore"] and len(embedding) == FULL_EMBEDDING_DIMENSIONS else None
+    return full, reduced
+
+
+def storage_columns(embedding: List[float], profile: Dict[str, Any]) -> Dict[str, Any]:
+    """memory_embeddings 직접 insert용 컬럼 값"""
+    full, reduced = storage_vectors(embedding, profile)
+    columns = {"embedding": full}
+    if reduced is not None:
+        columns[profile["column"]] = reduced
+    return columns
+
+
+def index_vector(embedding: List[float], profile: Dict[str, Any]) -> List[float]:
+    """검색 인덱스(ANN / 인메모리)에 쓰이는 벡터 — 축소 프로필이면 축소 벡터"""
+    full, reduced = storage_vectors(embedding, profile)
+    return reduced if reduced is not None else full
+
+
+def _parse_embedding(value: Any) -> Optional[np.ndarray]:
+    """
+    PostgREST가 반환한 임베딩 값을 float32 벡터로 변환
+    pgvector 컬럼은 "[0.1,0.2,...]" 문자열로 내려옴
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _to_timestamp(value: Any) -> float:
+    """created_at(ISO 문자열/datetime)을 epoch 초로 변환 (없으면 NaN)"""
+    if value is None or value == "":
+        return float("nan")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return float("nan")
+    if isinstance(value, datetime):
+        # 시간대 없는 값은 DB 세션(UTC)과 같게 해석 (서버 로컬 시간대에 따라 결과가 달라지지 않도록)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float("nan")
+
+
+def _normalize(vec: np.ndarray) -> np.ndarray:
+    """L2 정규화 (영벡터는 그대로)"""
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+# ============================================
+# 인메모리 인덱스
+# ============================================
+
+class _UserMatrix:
+    """
+    한 사용자의 임베딩 행렬 (행 단위 L2 정규화, 용량 2배 확장)
+    필터용 컬럼(source_type, created_at, is_demo)을 같은 순서의 배열로 함께 보관
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        capacity = max(capacity, 1)
+        self.dim = dim
+        self.size = 0
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.created_ts = np.full(capacity, np.nan, dtype=np.float64)
+        self.is_demo = np.zeros(capacity, dtype=bool)
+        self.source_types = np.empty(capacity, dtype=object)
+        self.rows: List[Dict] = []
+
+    def _grow(self):
+        capacity = self.matrix.shape[0] * 2
+        for name, fill in (("matrix", 0.0), ("created_ts", np.nan), ("is_demo", False), ("source_types", None)):
+            old = getattr(self, name)
+            grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            grown[self.size:] = fill
+            setattr(self, name, grown)
+
+    def append(self, record: Dict, vec: np.ndarray):
+        if self.size == self.matrix.shape[0]:
+            self._grow()
+        i = self.size
+        self.matrix[i] = _normalize(vec)
+        self.created_ts[i] = _to_timestamp(record.get("created_at"))
+        self.is_demo[i] = bool(record.get("is_demo"))
+        self.source_types[i] = record.get("source_type")
+        self.rows.append({k: record.get(k) for k in _ROW_FIELDS})
+        self.size += 1
+
+    def remove_where(self, predicate) -> int:
+        keep = [i for i, row in enumerate(self.rows) if not predicate(row)]
+        removed = self.size - len(keep)
+        if removed:
+            n = len(keep)
+            self.matrix[:n] = self.matrix[keep]
+            self.created_ts[:n] = self.created_ts[keep]
+            self.is_demo[:n] = self.is_demo[keep]
+            self.source_types[:n] = self.source_types[keep]
+            self.rows = [self.rows[i] for i in keep]
+            self.size = n
+        return removed
+
+    def filter_mask(
+        self,
+        source_types: Optional[List[str]] = None,
+        created_after: Any = None,
+        created_before: Any = None,
+        exclude_demo: bool = False
+    ) -> Optional[np.ndarray]:
+        """필터 조건을 만족하는 행 마스크 (조건이 없으면 None)"""
+        n = self.size
+        mask = None
+
+        def _and(cond):
+            nonlocal mask
+            mask = cond if mask is None else (mask & cond)
+
+        if source_types:
+            _and(np.isin(self.source_types[:n], list(source_types)))
+        if created_after is not None:
+            _and(self.created_ts[:n] >= _to_timestamp(created_after))
+        if created_before is not None:
+            _and(self.created_ts[:n] < _to_timestamp(created_before))
+        if exclude_demo:
+            _and(~self.is_demo[:n])
+        return mask
+
+
+class InMemoryVectorIndex:
+    """
+    사용자별 memory_embeddings를 연속된 float32 행렬로 보관하는 인덱스
+
+    - 첫 검색 시 lazy load, 이후 save_memory_embedding에서 증분 갱신
+    - 검색은 행렬-벡터 곱 1회 + argpartition으로 정확한 top-k
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._users: Dict[str, _UserMatrix] = {}
+        self._loaded: set = set()
+        # 사용자별 로드 잠금 (첫 검색이 동시에 들어와도 DB 전체 조회는 1회)
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # 로드 중에 들어온 변경 [("add", record, vec) | ("remove", source_type, source_id)] → 로드 후 반영
+        self._pending: Dict[str, List[tuple]] = {}
+        # invalidate 횟수 (로드 중 무효화되면 그 로드 결과는 버림)
+        self._generation: Dict[str, int] = {}
+
+    def is_loaded(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._loaded
+
+    def ensure_loaded(self, user_id: str, fetch: Callable[[], List[Dict]]):
+        """
+        사용자 인덱스가 없으면 fetch()로 읽어서 구성 (사용자별 1회)
+
+        로드 중 add/remove는 버퍼에 모았다가 로드 직후 반영 → 첫 검색 도중 저장된 체크인도 빠지지 않음
+        """
+        with self._lock:
+            if user_id in self._loaded:
+                return
+            load_lock = self._load_locks.setdefault(user_id, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if user_id in self._loaded:
+                    return
+                self._pending[user_id] = []
+                generation = self._generation.get(user_id, 0)
+            try:
+                records = fetch()
+            except Exception:
+                with self._lock:
+                    self._pending.pop(user_id, None)
+                raise
+            self.load(user_id, records, generation=generation)
+
+    def load(self, user_id: str, records: List[Dict], generation: Optional[int] = None):
+        """DB에서 읽은 레코드로 사용자 인덱스를 새로 구성 (로드 중 버퍼에 쌓인 변경도 반영)"""
+        entry = None
+        for record in records:
+            vec = _parse_embedding(record.get("embedding"))
+            if vec is None:
+                continue
+            if entry is None:
+                entry = _UserMatrix(vec.shape[0], capacity=len(records))
+            if vec.shape[0] != entry.dim:
+                continue
+            entry.append(record, vec)
+
+        with self._lock:
+            pending = self._pending.pop(user_id, [])
+            if generation is not None and self._generation.get(user_id, 0) != generation:
+                # 조회 도중 invalidate됨 → 결과를 버리고 다음 검색에서 다시 로드
+                return
+
+            loaded_ids = {row.get("id") for row in entry.rows} if entry is not None else set()
+            for op in pending:
+                if op[0] == "add":
+                    _, record, vec = op
+                    if record.get("id") is not None and record.get("id") in loaded_ids:
+                        continue  # 조회 결과에 이미 포함됨
+                    if entry is None:
+                        entry = _UserMatrix(vec.shape[0])
+                    if vec.shape[0] == entry.dim:
+                        entry.append(record, vec)
+                else:
+                    _, source_type, source_id = op
+                    if entry is not None:
+                        entry.remove_where(
+                            lambda row: row.get("source_type") == source_type and row.get("source_id") == source_id
+                        )
+
+            if entry is None:
+                self._users.pop(user_id, None)
+            else:
+                self._users[user_id] = entry
+            self._loaded.add(user_id)
+
+    def add(self, user_id: str, record: Dict, embedding: List[float]):
+        """임베딩 1건 추가 (로드 중이면 버퍼에 보관, 로드 전이면 다음 검색 때 로드되므로 무시)"""
+        vec = _parse_embedding(embedding)
+        if vec is None:
+            return
+        with self._lock:
+            if user_id not in self._loaded:
+                if user_id in self._pending:
+                    self._pending[user_id].append(("add", record, vec))
+                return
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = _UserMatrix(vec.shape[0])
+                self._users[user_id] = entry
+            if vec.shape[0] != entry.dim:
+                return
+            entry.append(record, vec)
+
+    def remove(self, user_id: str, source_type: str, source_id: str) -> int:
+        """특정 소스의 임베딩 제거 (로드 중이면 로드 후 반영)"""
+        with self._lock:
+            if user_id in self._pending:
+                self._pending[user_id].append(("remove", source_type, source_id))
+            entry = self._users.get(user_id)
+            if entry is None:
+                return 0
+            return entry.remove_where(
+                lambda row: row.get("source_type") == source_type and row.get("source_id") == source_id
+            )
+
+    def invalidate(self, user_id: str = None):
+        """사용자(또는 전체) 인덱스 폐기 → 다음 검색 때 다시 로드"""
+        with self._lock:
+            user_ids = list(set(self._users) | self._loaded | set(self._pending)) if user_id is None else [user_id]
+            for uid in user_ids:
+                self._users.pop(uid, None)
+                self._loaded.discard(uid)
+                self._generation[uid] = self._generation.get(uid, 0) + 1
+
+    def search(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        threshold: float = 0.7,
+        source_types: Optional[List[str]] = None,
+        created_after: Any = None,
+        created_before: Any = None,
+        exclude_demo: bool = False
+    ) -> List[Dict]:
+        """
+        코사인 유사도 기준 정확한 top-k 검색 (필터는 top-k 선택 전에 적용)
+
+        Returns:
+            search_memories RPC와 같은 형식 [{id, source_type, source_id, content, similarity, created_at}]
+        """
+        query = _parse_embedding(query_embedding)
+        if query is None or top_k <= 0:
+            return []
+
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry.size == 0 or query.shape[0] != entry.dim:
+                return []
+            sims = entry.matrix[:entry.size] @ _normalize(query)
+            mask = entry.filter_mask(source_types, created_after, created_before, exclude_demo)
+            rows = entry.rows
+
+        if mask is not None:
+            eligible = np.flatnonzero(mask)
+        else:
+            eligible = np.arange(sims.shape[0])
+        if eligible.size == 0:
+            return []
+
+        eligible_sims = sims[eligible]
+        k = min(top_k, eligible.size)
+        if k < eligible.size:
+            picked = np.argpartition(-eligible_sims, k - 1)[:k]
+        else:
+            picked = np.arange(eligible.size)
+        ordered = eligible[picked[np.argsort(-eligible_sims[picked])]]
+
+        results = []
+        for i in ordered:
+            similarity = float(sims[i])
+            if similarity <= threshold:
+                break
+            results.append({**rows[i], "similarity": similarity})
+        return results
+
+
+@st.cache_resource
+def get_memory_index() -> InMemoryVectorIndex:
+    """인메모리 벡터 인덱스 싱글톤 (프로세스 전체 공유)"""
+    return InMemoryVectorIndex()
+
+
+def _fetch_user_embeddings(user_id: str) -> List[Dict]:
+    """사용자의 memory_embeddings 전체 조회 (페이지 단위)"""
+    client = get_supabase_client()
+    if not client:
+        return []
+
+    # 축소 프로필이면 halfvec 컬럼을 embedding으로 alias
+    column = get_embedding_profile()["column"]
+    embedding_select = "embedding" if column == "embedding" else f"embedding:{column}"
+
+    records = []
+    offset = 0
+    while True:
+        response = (
+            client.table("memory_embeddings")
+            .select(f"id, source_type, source_id, content, {embedding_select}, is_demo, created_at")
+            .eq("user_id", user_id)
+            .order("created_at")
+            .range(offset, offset + _LOAD_PAGE_SIZE - 1)
+            .execute()
+        )
+        page = response.data or []
+        records.extend(page)
+        if len(page) < _LOAD_PAGE_SIZE:
+            break
+        offset += _LOAD_PAGE_SIZE
+    return records
+
+
+def search_in_memory(
+    user_id: str,
+    query_embedding: List[float],
+    top_k: int = 5,
+    threshold: float = 0.7,
+    **filters
+) -> List[Dict]:
+    """
+    인메모리 백엔드 검색 (필요 시 사용자 인덱스 lazy load)
+
+    filters: source_types, created_after, created_before, exclude_demo
+    """
+    index = get_memory_index()
+    index.ensure_loaded(user_id, lambda: _fetch_user_embeddings(user_id))
+    return index.search(user_id, query_embedding, top_k=top_k, threshold=threshold, **filters)
+
+
+def invalidate_memory_index(user_id: str = None):
+    """임베딩을 대량 삭제한 뒤 호출 (memory 백엔드가 아니면 아무것도 안 함)"""
+    if get_vector_backend() == "memory":
+        get_memory_index().invalidate(user_id)
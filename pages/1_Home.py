@@ -106,6 +106,9 @@ try:
         else:
             st.info("아직 체크인 기록이 없습니다. **Check-in** 페이지에서 첫 기록을 남겨보세요!")
         
+        if checkins and st.button("📜 전체 기록 보기"):
+            st.switch_page("pages/7_History.py")
+        
         # === 활성 모듈 요약 (공통화) ===
         from lib.modules import get_active_modules, MODULE_REGISTRY
         from lib.supabase_db import get_module_entries
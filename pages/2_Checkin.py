@@ -7,8 +7,6 @@ Step 4: 음성 STT
 Step 5: 이미지 Vision
 """
 import streamlit as st
-import re
-from typing import Dict, List, Optional
 from datetime import datetime
 from lib.auth import get_current_user
 
@@ -26,59 +24,9 @@ if "auto_index_on_save" not in st.session_state:
 
 
 # === 규칙 기반 Extraction (폴백용) ===
-def extract_by_rules(content: str) -> Dict[str, List[str]]:
-    """
-    규칙 기반으로 텍스트에서 구조화된 정보 추출
-    """
-    lines = content.strip().split('\n')
-    
-    tasks = []
-    obstacles = []
-    projects = []
-    insights = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        # task: '-' 또는 '•'로 시작하는 줄
-        if line.startswith('-') or line.startswith('•') or line.startswith('*'):
-            task_text = line.lstrip('-•* ').strip()
-            if task_text:
-                tasks.append(task_text)
-        
-        # obstacle: '!' 시작 또는 부정적 키워드 포함
-        obstacle_keywords = ['문제', '어려움', '힘들', '막혀', '안됨', '실패', '오류', '버그']
-        if line.startswith('!') or any(kw in line for kw in obstacle_keywords):
-            obstacle_text = line.lstrip('! ').strip()
-            if obstacle_text and obstacle_text not in obstacles:
-                obstacles.append(obstacle_text)
-        
-        # project: '#프로젝트명' 형태
-        project_matches = re.findall(r'#(\w+)', line)
-        for proj in project_matches:
-            if proj not in projects:
-                projects.append(proj)
-        
-        # insight: 인사이트 키워드 포함
-        insight_keywords = ['💡', '인사이트', '배움', '깨달음', '발견', '아이디어']
-        if any(kw in line for kw in insight_keywords):
-            insight_text = line.strip()
-            if insight_text and insight_text not in insights:
-                insights.append(insight_text)
-    
-    return {
-        "tasks": tasks,
-        "obstacles": obstacles,
-        "projects": projects,
-        "insights": insights,
-        "people": [],
-        "emotions": []
-    }
+from lib.rule_extraction import extract_by_rules
 
 
-# === 멀티모달 입력 섹션 렌더링 함수 ===
 def render_multimodal_section():
     """
     멀티모달 입력(음성/이미지) 섹션을 렌더링하는 함수
@@ -104,6 +52,16 @@ def render_multimodal_section():
             # 오디오 미리보기
             st.audio(audio_file, format=f"audio/{audio_file.type.split('/')[-1] if audio_file.type else 'mpeg'}")
             
+            # 긴 녹음 모드: 무음 기준으로 나눠 병렬 변환 (큰 파일은 자동 적용)
+            from lib.config import get_stt_config
+            long_threshold_mb = get_stt_config()["long_audio_threshold_mb"]
+            long_audio = st.checkbox(
+                "⏱️ 긴 녹음 모드 (구간 분할 병렬 변환)",
+                value=audio_file.size > long_threshold_mb * 1024 * 1024,
+                key="long_audio_mode",
+                help=f"10분 이상 녹음에 권장. {long_threshold_mb}MB를 넘는 파일은 항상 이 모드로 변환됩니다. (FFmpeg 필요)"
+            )
+            
             if st.button("🎯 음성 → 텍스트 변환", key="transcribe_btn"):
                 with st.spinner("🔄 음성을 텍스트로 변환 중..."):
                     try:
@@ -119,7 +77,8 @@ def render_multimodal_section():
                             audio_bytes=audio_bytes,
                             filename=filename,
                             mimetype=mimetype,
-                            language="ko"
+                            language="ko",
+                            long_audio=long_audio or None
                         )
                         
                         st.session_state.transcribed_text = transcribed
@@ -175,25 +134,12 @@ def render_multimodal_section():
             if st.button("🔍 이미지 분석", key="analyze_image_btn"):
                 with st.spinner("🔄 이미지 분석 중..."):
                     try:
-                        from lib.openai_client import analyze_image
-                        from lib.supabase_storage import upload_file, get_public_url
-                        import base64
+                        from lib.openai_client import analyze_image_bytes, run_pipeline
+                        from lib.supabase_storage import upload_file
                         
-                        # 1. Supabase Storage에 업로드
                         file_bytes = image_file.getvalue()
                         content_type = image_file.type or "image/jpeg"
                         
-                        storage_path = upload_file(
-                            file_data=file_bytes,
-                            file_name=image_file.name,
-                            content_type=content_type,
-                            folder="images"
-                        )
-                        
-                        # 2. Base64로 인코딩하여 Vision API 호출
-                        base64_image = base64.b64encode(file_bytes).decode('utf-8')
-                        image_url = f"data:{content_type};base64,{base64_image}"
-                        
                         # 분석 프롬프트
                         analysis_prompt = """이 이미지에서 다음을 추출해주세요:
 1. 이미지에 보이는 텍스트/메모 내용
@@ -202,22 +148,44 @@ def render_multimodal_section():
 
 간결하게 요점만 정리해주세요."""
                         
-                        analysis_result = analyze_image(image_url, analysis_prompt)
+                        # 원본 Storage 업로드와 축소본 Vision 분석을 동시에 실행
+                        # (분석은 축소·재인코딩한 이미지를 data URL로 전송)
+                        image_stages = {
+                            "upload": (lambda _: upload_file(
+                                file_data=file_bytes,
+                                file_name=image_file.name,
+                                content_type=content_type,
+                                folder="images"
+                            ), []),
+                            "analyze": (lambda _: analyze_image_bytes(file_bytes, analysis_prompt), [])
+                        }
+                        image_result = run_pipeline(image_stages)
+                        storage_path = image_result.get("upload")
+                        analysis = image_result.get("analyze")
+                        analysis_result = analysis["analysis"] if analysis else None
                         
                         if analysis_result:
                             st.session_state.image_analysis = analysis_result
                             
-                            # artifacts 정보 저장
-                            st.session_state.uploaded_artifacts.append({
-                                "type": "image",
-                                "storage_path": storage_path,
-                                "original_name": image_file.name,
-                                "file_size": len(file_bytes),
-                                "metadata": {
-                                    "analysis": analysis_result
-                                }
-                            })
+                            # artifacts 정보 저장 (업로드 실패 시 분석 결과만 사용)
+                            if storage_path:
+                                st.session_state.uploaded_artifacts.append({
+                                    "type": "image",
+                                    "storage_path": storage_path,
+                                    "original_name": image_file.name,
+                                    "file_size": len(file_bytes),
+                                    "metadata": {
+                                        "analysis": analysis_result,
+                                        # 같은 이미지 재업로드 시 분석 결과 재사용 (미디어 캐시 미러)
+                                        "media_cache_key": analysis["cache_key"]
+                                    }
+                                })
                             
+                            if analysis["sent_bytes"]:
+                                st.caption(
+                                    f"분석 전송 {analysis['sent_bytes'] / 1024:.0f}KB "
+                                    f"(원본 {analysis['original_bytes'] / 1024:.0f}KB)"
+                                )
                             st.success("✅ 이미지 분석 완료!")
                         else:
                             st.error("이미지 분석에 실패했습니다.")
@@ -272,6 +240,15 @@ with st.sidebar:
     )
     
     if use_ai_extraction:
+        ai_mode = st.radio(
+            "AI 처리 방식",
+            options=["staged", "fused"],
+            format_func=lambda x: {
+                "staged": "단계별 (정리 → 추출, 코멘트 스트리밍)",
+                "fused": "통합 1회 호출 (더 빠르고 저렴)"
+            }[x],
+            help="통합 모드는 정리·추출·코멘트를 한 번의 Structured Outputs 요청으로 처리합니다"
+        )
         use_ingestor = st.checkbox(
             "텍스트 정리 (Ingestor)",
             value=False,
@@ -283,6 +260,7 @@ with st.sidebar:
             help="체크인에 대한 짧은 AI 코멘트"
         )
     else:
+        ai_mode = "staged"
         use_ingestor = False
         generate_reflection = False
     
@@ -372,34 +350,43 @@ with st.form("checkin_form"):
             # 결과 저장용 변수
             extractions = None
             clean_text = combined_content
+            reflection_pending = False
             ai_reflection = None
             extraction_type = "rule_based"
             
             # === AI 기반 처리 (Step 3) ===
+            ai_timings = None
+            ai_route = None
             if use_ai_extraction:
                 with st.spinner("🤖 AI가 분석 중..."):
                     try:
-                        from lib.openai_client import (
-                            ingest_text, 
-                            extract_structured_data,
-                            generate_reflection as gen_reflection
-                        )
+                        from lib.openai_client import process_checkin_with_ai, process_checkin_fused
                         
-                        # Ingestor (선택적)
-                        if use_ingestor:
-                            ingested = ingest_text(combined_content)
-                            if ingested:
-                                clean_text = ingested
+                        if ai_mode == "fused":
+                            # 정리 + 추출 + 코멘트를 1회 호출로
+                            ai_result = process_checkin_fused(
+                                combined_content,
+                                use_ingestor=use_ingestor,
+                                reflect=generate_reflection
+                            )
+                            ai_reflection = ai_result["reflection"]
+                        else:
+                            # Ingestor(선택) → Extractor (Structured Outputs)
+                            # Reflector는 저장 후 결과 화면에서 스트리밍으로 생성
+                            ai_result = process_checkin_with_ai(
+                                combined_content,
+                                use_ingestor=use_ingestor,
+                                reflect=False
+                            )
+                            reflection_pending = generate_reflection
                         
-                        # Extractor (Structured Outputs)
-                        llm_extractions = extract_structured_data(clean_text)
-                        if llm_extractions:
-                            extractions = llm_extractions
-                            extraction_type = "llm_extractor"
+                        clean_text = ai_result["clean_text"]
+                        ai_timings = ai_result["timings"]
+                        ai_route = ai_result.get("route")
                         
-                        # Reflector (선택적)
-                        if generate_reflection:
-                            ai_reflection = gen_reflection(clean_text)
+                        if ai_result["extractions"]:
+                            extractions = ai_result["extractions"]
+                            extraction_type = "llm_fused" if ai_mode == "fused" else "llm_extractor"
                         
                     except ImportError as e:
                         st.warning(f"⚠️ OpenAI 모듈 로드 실패: {e}")
@@ -413,74 +400,105 @@ with st.form("checkin_form"):
             
             # === DB 저장 ===
             try:
-                from lib.supabase_db import insert_checkin, insert_extraction, insert_artifact
+                import time
+                from lib.supabase_db import save_checkin_bundle
                 
-                # 체크인 저장
-                checkin_data = insert_checkin(
-                    content=content,  # 원본 텍스트만 저장
-                    mood=mood,
-                    tags=tags,
-                    metadata={
-                        "energy": energy,
-                        "clean_text": clean_text if clean_text != content else None,
-                        "has_audio": bool(st.session_state.transcribed_text),
-                        "has_image": bool(st.session_state.image_analysis)
-                    }
-                )
+                has_extractions = bool(extractions and any(extractions.values()))
+                artifacts = list(st.session_state.uploaded_artifacts)
                 
-                if checkin_data:
-                    checkin_id = checkin_data.get("id")
-                    
-                    # artifacts 저장 (멀티모달)
-                    for artifact in st.session_state.uploaded_artifacts:
-                        insert_artifact(
-                            checkin_id=checkin_id,
-                            artifact_type=artifact["type"],
-                            storage_path=artifact["storage_path"],
-                            metadata=artifact.get("metadata"),
-                            original_name=artifact.get("original_name"),
-                            file_size=artifact.get("file_size")
+                # 자동 인덱싱 (토글 ON일 때만)
+                auto_index = st.session_state.get("auto_index_on_save", False)
+                if auto_index:
+                    from lib.config import is_llm_configured
+                    if not is_llm_configured():
+                        st.warning("⚠️ OpenAI API 키가 없어 자동 인덱싱을 건너뜁니다.")
+                        auto_index = False
+                
+                with st.spinner("🧠 저장 및 자동 인덱싱 중..." if auto_index else "💾 저장 중..."):
+                    # 인덱스 임베딩을 먼저 만들어 저장 RPC에 함께 전달 → 체크인/첨부/추출/인덱스가 한 트랜잭션
+                    memory_entries = None
+                    embed_ms = None
+                    if auto_index:
+                        from lib.rag import build_checkin_memory_entries
+                        
+                        # checkin 인덱싱: clean_text 우선(멀티모달/ingestor 반영)
+                        started = time.perf_counter()
+                        memory_entries = build_checkin_memory_entries(
+                            clean_text, extractions if has_extractions else None
                         )
+                        embed_ms = (time.perf_counter() - started) * 1000
                     
-                    # extraction 저장
-                    if any(extractions.values()):
-                        insert_extraction(
-                            source_type="checkin",
-                            source_id=checkin_id,
-                            extraction_type=extraction_type,
-                            data=extractions
-                        )
+                    started = time.perf_counter()
+                    bundle = save_checkin_bundle(
+                        content=content,  # 원본 텍스트만 저장
+                        mood=mood,
+                        tags=tags,
+                        metadata={
+                            "energy": energy,
+                            "clean_text": clean_text if clean_text != content else None,
+                            "has_audio": bool(st.session_state.transcribed_text),
+                            "has_image": bool(st.session_state.image_analysis)
+                        },
+                        artifacts=artifacts,
+                        extraction_type=extraction_type if has_extractions else None,
+                        extraction_data=extractions if has_extractions else None,
+                        memory=memory_entries
+                    )
+                    save_ms = (time.perf_counter() - started) * 1000
                     
+                    checkin_data = bundle["checkin"] if bundle else None
+                    writes = None
+                    if checkin_data and auto_index and bundle["memory"] is None:
+                        # 폴백 (RPC 미적용 또는 임베딩 실패): 기존 방식으로 개별 인덱싱 (서로 독립 → 동시 실행)
+                        from lib.openai_client import run_pipeline
+                        from lib.rag import index_checkin, index_extraction
+                        
+                        checkin_id = checkin_data.get("id")
+                        created_at = checkin_data.get("created_at")
+                        index_stages = {
+                            "index_checkin": (lambda _: index_checkin(
+                                checkin_id, clean_text, extractions, created_at=created_at
+                            ), [])
+                        }
+                        # extraction 인덱싱: 추출값이 비어있지 않을 때만
+                        if has_extractions:
+                            index_stages["index_extraction"] = (lambda _: index_extraction(
+                                checkin_id, extraction_type, extractions, created_at=created_at
+                            ), [])
+                        writes = run_pipeline(index_stages)
+                
+                if checkin_data:
                     st.success("✅ 체크인이 저장되었습니다!")
                     st.balloons()
                     
-                    # === 자동 인덱싱 (토글 ON일 때만) ===
-                    if st.session_state.get("auto_index_on_save", False):
-                        from lib.config import get_openai_api_key
-                        if not get_openai_api_key():
-                            st.warning("⚠️ OpenAI API 키가 없어 자동 인덱싱을 건너뜁니다.")
+                    if auto_index and writes is None:
+                        from lib.rag import register_saved_memory
+                        register_saved_memory(bundle["memory"], memory_entries)
+                        st.info("✅ 자동 인덱싱 완료 (Memory에서 즉시 검색 가능)")
+                    elif auto_index:
+                        index_errors = writes.errors
+                        ok_checkin = bool(writes.get("index_checkin"))
+                        ok_extraction = writes.get("index_extraction", True) is not False
+                        
+                        if index_errors:
+                            st.warning(f"⚠️ 자동 인덱싱 오류 (체크인은 저장됨): {'; '.join(index_errors.values())}")
+                        elif ok_checkin and ok_extraction:
+                            st.info("✅ 자동 인덱싱 완료 (Memory에서 즉시 검색 가능)")
                         else:
-                            with st.spinner("🧠 자동 인덱싱 중..."):
-                                try:
-                                    from lib.rag import index_checkin, index_extraction
-                                    
-                                    # checkin 인덱싱: clean_text 우선(멀티모달/ingestor 반영)
-                                    ok_checkin = index_checkin(checkin_id, clean_text, extractions)
-                                    
-                                    # extraction 인덱싱: 추출값이 비어있지 않을 때만
-                                    ok_extraction = True
-                                    try:
-                                        if extractions and any(extractions.values()):
-                                            ok_extraction = index_extraction(checkin_id, extraction_type, extractions)
-                                    except Exception:
-                                        ok_extraction = False
-                                    
-                                    if ok_checkin and ok_extraction:
-                                        st.info("✅ 자동 인덱싱 완료 (Memory에서 즉시 검색 가능)")
-                                    else:
-                                        st.warning("⚠️ 자동 인덱싱 일부 실패 (체크인은 저장됨). 필요시 Memory에서 수동 동기화하세요.")
-                                except Exception as e:
-                                    st.warning(f"⚠️ 자동 인덱싱 오류 (체크인은 저장됨): {e}")
+                            st.warning("⚠️ 자동 인덱싱 일부 실패 (체크인은 저장됨). 필요시 Memory에서 수동 동기화하세요.")
+                    
+                    # 단계별 소요 시간
+                    timing_parts = []
+                    if ai_timings:
+                        timing_parts.append(f"AI {ai_timings['total']:.0f}ms")
+                    if ai_route:
+                        timing_parts.append(f"경로 {ai_route['route']} ({ai_route['reason']})")
+                    if embed_ms is not None:
+                        timing_parts.append(f"임베딩 {embed_ms:.0f}ms")
+                    timing_parts.append(f"저장 {save_ms:.0f}ms" + (" (1회 왕복)" if bundle["atomic"] else " (개별 저장)"))
+                    if writes is not None:
+                        timing_parts.extend(f"{name} {ms:.0f}ms" for name, ms in writes.timings.items())
+                    st.caption("⏱️ " + " · ".join(timing_parts))
                     
                     # 세션 상태 초기화
                     st.session_state.transcribed_text = ""
@@ -531,11 +549,16 @@ with st.form("checkin_form"):
                             if not any(extractions.values()):
                                 st.caption("추출된 항목 없음")
                     
-                    # AI 코멘트 표시
+                    # AI 코멘트 표시 (통합 모드는 응답에 포함, 단계별 모드는 토큰 단위 스트리밍)
                     if ai_reflection:
                         st.divider()
                         st.subheader("💬 AI 코멘트")
                         st.info(ai_reflection)
+                    elif reflection_pending:
+                        from lib.openai_client import generate_reflection_stream
+                        st.divider()
+                        st.subheader("💬 AI 코멘트")
+                        st.write_stream(generate_reflection_stream(clean_text))
                 else:
                     st.error("저장 실패. 다시 시도해주세요.")
                     
@@ -553,6 +576,9 @@ with st.form("checkin_form"):
                     })
                 if ai_reflection:
                     st.info(f"💬 AI: {ai_reflection}")
+                elif reflection_pending:
+                    from lib.openai_client import generate_reflection_stream
+                    st.write_stream(generate_reflection_stream(clean_text))
             except Exception as e:
                 st.error(f"오류 발생: {e}")
 
@@ -25,9 +25,14 @@ with st.sidebar:
 
 
 # === 주간 리포트 생성 함수 ===
-def generate_weekly_report_json(checkins: List[Dict], extractions: List[Dict]) -> Optional[Dict]:
+def generate_weekly_report_json(
+    checkins: List[Dict],
+    extractions: List[Dict],
+    use_cache: bool = True
+) -> Optional[Dict]:
     """
     주간 데이터를 분석하여 구조화된 리포트 생성
+    같은 기간·같은 기록이면 LLM 응답 캐시에서 바로 반환 (use_cache=False면 새로 생성)
     
     Returns:
         {
@@ -117,7 +122,10 @@ def generate_weekly_report_json(checkins: List[Dict], extractions: List[Dict]) -
 """}
     ]
     
-    result = chat_completion_json(messages, report_schema, temperature=0.7)
+    result = chat_completion_json(
+        messages, report_schema, temperature=0.7,
+        use_cache=use_cache, cache_site="weekly_report_json"
+    )
     
     if result:
         # 통계 추가
@@ -196,43 +204,36 @@ st.session_state.rpt_end = end_date
 
 
 # === 리포트 생성 ===
+regenerate_report = st.checkbox(
+    "🔄 새로 생성 (캐시 무시)",
+    value=False,
+    help="같은 기간의 리포트는 캐시에서 바로 표시됩니다. 체크하면 AI로 다시 생성합니다."
+)
+
 if st.button("📝 리포트 생성", use_container_width=True, type="primary"):
     with st.spinner("📊 주간 데이터를 분석 중..."):
         try:
-            from lib.supabase_db import get_checkins_date_range
-            from lib.config import get_supabase_client, get_current_user_id
+            from lib.supabase_db import get_report_data
             
-            client = get_supabase_client()
-            user_id = get_current_user_id()
-            
-            # 체크인 조회
-            checkins = get_checkins_date_range(
+            # 체크인 + extraction 조회 (1회 왕복)
+            report_data = get_report_data(
                 start_date=start_date.isoformat(),
                 end_date=end_date.isoformat(),
                 exclude_demo=st.session_state.get("exclude_demo", True)
             )
+            checkins = report_data["checkins"]
+            extractions = report_data["extractions"]
             
             if not checkins:
                 st.warning(f"⚠️ {start_date} ~ {end_date} 기간에 체크인 기록이 없습니다.")
             else:
-                # extractions 조회
-                checkin_ids = [c["id"] for c in checkins]
-                extractions = []
-                
-                for cid in checkin_ids:
-                    try:
-                        ext_response = client.table("extractions").select("*").eq("source_id", cid).execute()
-                        if ext_response.data:
-                            extractions.extend(ext_response.data)
-                    except:
-                        pass
-                
                 # 리포트 생성
-                report = generate_weekly_report_json(checkins, extractions)
+                report = generate_weekly_report_json(checkins, extractions, use_cache=not regenerate_report)
                 
                 if report:
                     st.session_state.weekly_report = report
                     st.session_state.report_checkins = checkins
+                    st.session_state.weekly_narrative = None
                     st.success("✅ 리포트 생성 완료!")
                 else:
                     st.error("리포트 생성에 실패했습니다.")
@@ -320,6 +321,17 @@ if st.session_state.get("weekly_report"):
             else:
                 st.caption("제안 사항이 없습니다")
     
+    # 서술형 회고 (토큰 단위 스트리밍, 생성 후 세션에 보관)
+    st.divider()
+    st.markdown("### ✍️ 서술형 회고")
+    if st.session_state.get("weekly_narrative"):
+        st.markdown(st.session_state.weekly_narrative)
+    elif st.button("✍️ 서술형 회고 생성", key="gen_weekly_narrative"):
+        from lib.openai_client import generate_weekly_report_stream
+        st.session_state.weekly_narrative = st.write_stream(generate_weekly_report_stream(checkins))
+    else:
+        st.caption("이번 주 체크인을 바탕으로 한 짧은 회고 글을 생성합니다")
+    
     # 기분 분포 차트
     st.divider()
     st.markdown("### 📊 기분 분포")
@@ -33,7 +33,8 @@ def generate_time_blocks(
     goals: List[str],
     work_hours: tuple,
     existing_events: List[Dict] = None,
-    weekly_insights: str = None
+    weekly_insights: str = None,
+    use_cache: bool = True
 ) -> Optional[Dict]:
     """
     AI Planner 에이전트를 사용하여 시간블록 제안
@@ -43,6 +44,7 @@ def generate_time_blocks(
         work_hours: (시작시간, 종료시간) 튜플
         existing_events: 기존 캘린더 이벤트
         weekly_insights: 주간 리포트에서 가져온 인사이트
+        use_cache: False면 LLM 응답 캐시를 건너뛰고 새로 제안
     
     Returns:
         {
@@ -85,7 +87,10 @@ def generate_time_blocks(
         {"role": "user", "content": user_message}
     ]
     
-    return chat_completion_json(messages, PLANNER_JSON_SCHEMA, temperature=0.7)
+    return chat_completion_json(
+        messages, PLANNER_JSON_SCHEMA, temperature=0.7,
+        use_cache=use_cache, cache_site="planner"
+    )
 
 
 # === 타임라인 렌더링 함수 ===
@@ -256,7 +261,9 @@ with col_left:
     
     st.divider()
     
-    # AI 계획 생성 버튼
+    # AI 계획 생성 버튼 (같은 목표·일정이면 캐시된 제안을 바로 표시)
+    regenerate_plan = st.checkbox("🔄 새로 제안받기 (캐시 무시)", value=False)
+    
     if st.button("🤖 AI 계획 생성", use_container_width=True, type="primary"):
         if not goal1:
             st.warning("최소 1개의 목표를 입력해주세요!")
@@ -278,7 +285,8 @@ with col_left:
                         goals=goals,
                         work_hours=(work_start, work_end),
                         existing_events=existing_events,
-                        weekly_insights=weekly_insights
+                        weekly_insights=weekly_insights,
+                        use_cache=not regenerate_plan
                     )
                     
                     if plan:
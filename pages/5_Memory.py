@@ -4,7 +4,7 @@ RAG 기반 기억 검색 및 인사이트 생성
 Step 6: 벡터 검색 + 소스 표시
 """
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from lib.auth import get_current_user
 
 # 사용자 정보 가져오기
@@ -49,6 +49,28 @@ with st.sidebar:
     )
     st.session_state["exclude_demo"] = exclude_demo
     
+    source_type_labels = {
+        "checkin": "✍️ 체크인",
+        "extraction": "📋 추출 데이터",
+        "calendar": "📅 캘린더",
+        "plan": "📝 계획"
+    }
+    selected_source_types = st.multiselect(
+        "검색 대상",
+        options=list(source_type_labels.keys()),
+        format_func=lambda t: source_type_labels[t],
+        help="비워두면 전체 소스에서 검색"
+    )
+    
+    use_date_range = st.checkbox("📆 기간 지정", value=False)
+    date_range = None
+    if use_date_range:
+        date_range = st.date_input(
+            "기간",
+            value=(date.today() - timedelta(days=30), date.today()),
+            max_value=date.today()
+        )
+    
     st.divider()
     st.caption("💡 더 많은 체크인을 기록할수록\n검색 정확도가 높아집니다")
 
@@ -95,80 +117,96 @@ if st.session_state.get("show_examples"):
 
 # === 검색 실행 ===
 if search_btn and search_query:
-    with st.spinner("🔄 기억을 검색하고 답변을 생성 중..."):
-        try:
-            from lib.rag import generate_rag_answer, similarity_search, get_sources_info
+    try:
+        from lib.rag import stream_rag_answer
+        
+        # 기간 필터 (종료일 포함 → 다음 날 0시 미만)
+        # 앱 시간대 기준 자정으로 오프셋을 붙여 보냄 (naive면 DB는 UTC, 인메모리 백엔드는 서버 시간대로 해석)
+        created_after = created_before = None
+        if date_range and len(date_range) == 2:
+            from zoneinfo import ZoneInfo
+            from lib.config import get_app_config
             
-            # RAG 파이프라인 실행
-            result = generate_rag_answer(
+            app_tz = ZoneInfo(get_app_config()["timezone"])
+            created_after = datetime.combine(date_range[0], datetime.min.time(), tzinfo=app_tz).isoformat()
+            created_before = datetime.combine(
+                date_range[1] + timedelta(days=1), datetime.min.time(), tzinfo=app_tz
+            ).isoformat()
+        
+        # RAG 검색 (필터는 검색 RPC 안에서 LIMIT 전에 적용)
+        with st.spinner("🔄 기억을 검색 중..."):
+            result = stream_rag_answer(
                 query=search_query,
                 top_k=top_k,
                 threshold=threshold,
-                exclude_demo=st.session_state.get("exclude_demo", True)
+                exclude_demo=st.session_state.get("exclude_demo", True),
+                source_types=selected_source_types or None,
+                created_after=created_after,
+                created_before=created_before
             )
-            
-            # === 답변 표시 ===
+        
+        # === 답변 표시 (토큰 단위 스트리밍) ===
+        st.divider()
+        st.subheader("💬 AI 답변")
+        
+        result["answer"] = st.write_stream(result["stream"])
+        
+        # === 소스(출처) 표시 ===
+        if result["sources"]:
             st.divider()
-            st.subheader("💬 AI 답변")
-            
-            st.markdown(result["answer"])
+            st.subheader(f"📚 참조한 기억 ({result['memories_count']}개)")
             
-            # === 소스(출처) 표시 ===
-            if result["sources"]:
-                st.divider()
-                st.subheader(f"📚 참조한 기억 ({result['memories_count']}개)")
-                
-                for i, source in enumerate(result["sources"], 1):
-                    with st.container():
-                        col1, col2, col3 = st.columns([1, 4, 1])
-                        
-                        with col1:
-                            # 소스 타입 아이콘
-                            type_icons = {
-                                "checkin": "✍️",
-                                "extraction": "📋",
-                                "calendar": "📅",
-                                "plan": "📝"
-                            }
-                            icon = type_icons.get(source["source_type"], "📄")
-                            st.markdown(f"### {icon}")
-                            st.caption(source["date"])
-                        
-                        with col2:
-                            st.markdown(f"**{source['source_type'].upper()}**")
-                            st.markdown(source["preview"])
-                        
-                        with col3:
-                            similarity_pct = source["similarity"] * 100
-                            st.metric("유사도", f"{similarity_pct:.0f}%")
-                        
-                        # 원문 보기 버튼
-                        if st.button(f"📖 원문 보기", key=f"view_source_{i}"):
-                            st.session_state[f"show_full_{i}"] = True
-                        
-                        if st.session_state.get(f"show_full_{i}"):
-                            # 전체 내용 조회 (체크인인 경우)
-                            if source["source_type"] == "checkin":
-                                try:
-                                    from lib.supabase_db import get_checkin
-                                    checkin = get_checkin(source["source_id"])
-                                    if checkin:
-                                        with st.expander("전체 내용", expanded=True):
-                                            st.markdown(checkin.get("content", ""))
-                                            st.caption(f"기분: {checkin.get('mood', '-')} | 태그: {', '.join(checkin.get('tags', []))}")
-                                except:
-                                    pass
-            
-            # === 컨텍스트 표시 (선택적) ===
-            if show_context and result.get("context"):
-                with st.expander("🔍 AI가 참조한 컨텍스트"):
-                    st.code(result["context"], language=None)
-            
-        except ImportError as e:
-            st.error(f"모듈 로드 실패: {e}")
-            st.info("lib/rag.py, lib/openai_client.py가 필요합니다.")
-        except Exception as e:
-            st.error(f"검색 중 오류 발생: {e}")
+            for i, source in enumerate(result["sources"], 1):
+                with st.container():
+                    col1, col2, col3 = st.columns([1, 4, 1])
+                    
+                    with col1:
+                        # 소스 타입 아이콘
+                        type_icons = {
+                            "checkin": "✍️",
+                            "extraction": "📋",
+                            "calendar": "📅",
+                            "plan": "📝"
+                        }
+                        icon = type_icons.get(source["source_type"], "📄")
+                        st.markdown(f"### {icon}")
+                        st.caption(source["date"])
+                    
+                    with col2:
+                        st.markdown(f"**{source['source_type'].upper()}**")
+                        st.markdown(source["preview"])
+                    
+                    with col3:
+                        similarity_pct = source["similarity"] * 100
+                        st.metric("유사도", f"{similarity_pct:.0f}%")
+                    
+                    # 원문 보기 버튼
+                    if st.button(f"📖 원문 보기", key=f"view_source_{i}"):
+                        st.session_state[f"show_full_{i}"] = True
+                    
+                    if st.session_state.get(f"show_full_{i}"):
+                        # 전체 내용 조회 (체크인인 경우)
+                        if source["source_type"] == "checkin":
+                            try:
+                                from lib.supabase_db import get_checkin
+                                checkin = get_checkin(source["source_id"])
+                                if checkin:
+                                    with st.expander("전체 내용", expanded=True):
+                                        st.markdown(checkin.get("content", ""))
+                                        st.caption(f"기분: {checkin.get('mood', '-')} | 태그: {', '.join(checkin.get('tags', []))}")
+                            except:
+                                pass
+        
+        # === 컨텍스트 표시 (선택적) ===
+        if show_context and result.get("context"):
+            with st.expander("🔍 AI가 참조한 컨텍스트"):
+                st.code(result["context"], language=None)
+        
+    except ImportError as e:
+        st.error(f"모듈 로드 실패: {e}")
+        st.info("lib/rag.py, lib/openai_client.py가 필요합니다.")
+    except Exception as e:
+        st.error(f"검색 중 오류 발생: {e}")
 
 
 st.divider()
@@ -229,7 +267,7 @@ if st.button("📥 체크인 동기화", use_container_width=True):
     with st.spinner("동기화 중..."):
         try:
             from lib.config import get_supabase_client, get_current_user_id
-            from lib.rag import index_checkin
+            from lib.rag import index_checkins_bulk
             
             client = get_supabase_client()
             user_id = get_current_user_id()
@@ -239,7 +277,7 @@ if st.button("📥 체크인 동기화", use_container_width=True):
             else:
                 # 아직 인덱싱되지 않은 체크인 조회
                 # (간단히: 모든 체크인 가져와서 기존 임베딩과 비교)
-                checkins = client.table("checkins").select("id, content").eq("user_id", user_id).execute()
+                checkins = client.table("checkins").select("id, content, tags, created_at").eq("user_id", user_id).execute()
                 existing = client.table("memory_embeddings").select("source_id").eq("user_id", user_id).eq("source_type", "checkin").execute()
                 
                 existing_ids = {e["source_id"] for e in (existing.data or [])}
@@ -249,14 +287,14 @@ if st.button("📥 체크인 동기화", use_container_width=True):
                     st.info("✅ 모든 체크인이 이미 동기화되어 있습니다.")
                 else:
                     progress = st.progress(0)
-                    success_count = 0
                     
-                    for i, checkin in enumerate(new_checkins):
-                        if index_checkin(checkin["id"], checkin["content"]):
-                            success_count += 1
-                        progress.progress((i + 1) / len(new_checkins))
+                    # 임베딩 배치 생성 + 일괄 삽입
+                    sync_result = index_checkins_bulk(
+                        new_checkins,
+                        progress_callback=lambda done, total: progress.progress(done / total)
+                    )
                     
-                    st.success(f"✅ {success_count}/{len(new_checkins)}개 체크인 동기화 완료!")
+                    st.success(f"✅ {sync_result['indexed']}/{len(new_checkins)}개 체크인 동기화 완료!")
                     st.rerun()
                     
         except Exception as e:
@@ -110,9 +110,11 @@ with col2:
     with st.container():
         st.markdown("**🤖 OpenAI**")
         try:
-            from lib.config import get_openai_api_key
+            from lib.config import get_openai_api_key, get_llm_provider_config
             api_key = get_openai_api_key()
-            if api_key:
+            if get_llm_provider_config()["provider"] == "offline":
+                st.info("🧪 offline provider (결정적 응답, API 호출 없음)")
+            elif api_key:
                 st.success("✅ API 키 설정됨")
                 # 마스킹된 키 표시
                 masked_key = api_key[:7] + "..." + api_key[-4:]
@@ -369,7 +371,7 @@ st.subheader("👤 프로필")
 
 try:
     from lib.config import get_supabase_client, get_current_user_id
-    from lib.supabase_db import get_profile, upsert_profile
+    from lib.supabase_db import get_profile, upsert_profile, update_profile_settings
     
     client = get_supabase_client()
     user_id = get_current_user_id()
@@ -413,13 +415,14 @@ try:
             if client:
                 result = upsert_profile({
                     "display_name": display_name,
-                    "timezone": timezone,
-                    "settings": {
-                        **settings,
+                    "timezone": timezone
+                })
+                # settings는 바꾼 키만 DB 최신 값에 병합 (다른 세션에서 저장한 키 유지)
+                if result:
+                    result = update_profile_settings({
                         "morning_reminder": morning_reminder,
                         "evening_reminder": evening_reminder
-                    }
-                })
+                    })
                 
                 if result:
                     st.success("✅ 프로필이 저장되었습니다!")
@@ -482,8 +485,8 @@ st.subheader("🤖 AI 자동화")
 st.caption("체크인 저장 후 자동으로 RAG 인덱싱을 실행합니다. (Memory 동기화 버튼 없이 바로 검색 가능)")
 
 try:
-    from lib.supabase_db import get_profile, upsert_profile
-    from lib.config import get_openai_api_key
+    from lib.supabase_db import get_profile, update_profile_settings
+    from lib.config import is_llm_configured
     
     # 현재 프로필/설정 로드
     profile = get_profile()
@@ -497,17 +500,183 @@ try:
     
     # 값이 바뀌었을 때만 저장
     if auto_index != stored_value:
-        merged = dict(current_settings)
-        merged["auto_index_on_save"] = auto_index
-        upsert_profile({"settings": merged})
+        update_profile_settings({"auto_index_on_save": auto_index}, create_missing=True)
     
     # OpenAI 키 없을 때 안내
-    if not get_openai_api_key():
+    if not is_llm_configured():
         st.warning("OpenAI API 키가 없으면 자동 인덱싱이 동작하지 않습니다. (Settings 상단 OpenAI 상태를 확인하세요)")
         
 except Exception as e:
     st.error(f"AI 자동화 설정 로드 오류: {e}")
 
+# --- 임베딩 캐시 현황 ---
+with st.expander("🧮 임베딩 캐시"):
+    try:
+        from lib.cache import get_embedding_cache_stats, clear_embedding_cache
+
+        cache_stats = get_embedding_cache_stats()
+
+        ccol1, ccol2, ccol3, ccol4 = st.columns(4)
+        with ccol1:
+            st.metric("메모리 적중", cache_stats["memory_hits"])
+        with ccol2:
+            st.metric("디스크 적중", cache_stats["disk_hits"])
+        with ccol3:
+            st.metric("미스", cache_stats["misses"])
+        with ccol4:
+            st.metric("적중률", f"{cache_stats['hit_rate'] * 100:.0f}%")
+
+        st.caption(f"저장된 항목: 메모리 {cache_stats['memory_entries']}개 / 디스크 {cache_stats['disk_entries']}개")
+
+        if st.button("🧹 임베딩 캐시 비우기", key="clear_embedding_cache"):
+            clear_embedding_cache()
+            st.success("임베딩 캐시를 비웠습니다.")
+            st.rerun()
+    except Exception as e:
+        st.warning(f"임베딩 캐시 상태 확인 실패: {e}")
+
+# --- LLM 응답 캐시 현황 ---
+with st.expander("🗂️ LLM 응답 캐시"):
+    try:
+        from lib.cache import get_llm_cache_stats, clear_llm_cache
+        from lib.config import get_cache_config
+
+        llm_stats = get_llm_cache_stats()
+        cache_config = get_cache_config()
+
+        st.caption(
+            f"저장된 응답 {llm_stats['entries']}개 · "
+            f"만료 {cache_config['llm_ttl_hours']}시간 · 최대 {cache_config['llm_max_entries']}개"
+        )
+
+        if llm_stats["sites"]:
+            import pandas as pd
+
+            rows = [
+                {
+                    "호출 지점": site,
+                    "적중": stats["disk_hits"],
+                    "미스": stats["misses"],
+                    "적중률": f"{stats['hit_rate'] * 100:.0f}%"
+                }
+                for site, stats in sorted(llm_stats["sites"].items())
+            ]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("아직 기록된 호출이 없습니다.")
+
+        if st.button("🧹 LLM 응답 캐시 비우기", key="clear_llm_cache"):
+            clear_llm_cache()
+            st.success("LLM 응답 캐시를 비웠습니다.")
+            st.rerun()
+    except Exception as e:
+        st.warning(f"LLM 응답 캐시 상태 확인 실패: {e}")
+
+# --- 미디어 분석 캐시 현황 ---
+with st.expander("🎞️ 미디어 분석 캐시"):
+    try:
+        from lib.cache import get_media_cache_stats, clear_media_cache
+
+        media_stats = get_media_cache_stats()
+        st.caption(f"저장된 전사/이미지 분석 결과 {media_stats['entries']}개 (파일 sha256 기준)")
+
+        kind_labels = {"transcribe": "음성 전사", "vision": "이미지 분석"}
+        for kind, stats in sorted(media_stats["kinds"].items()):
+            st.caption(
+                f"{kind_labels.get(kind, kind)}: 적중 {stats['disk_hits']} · 미스 {stats['misses']} · "
+                f"적중률 {stats['hit_rate'] * 100:.0f}%"
+            )
+
+        if st.button("🧹 미디어 분석 캐시 비우기", key="clear_media_cache"):
+            clear_media_cache()
+            st.success("미디어 분석 캐시를 비웠습니다.")
+            st.rerun()
+    except Exception as e:
+        st.warning(f"미디어 분석 캐시 상태 확인 실패: {e}")
+
+# --- OpenAI 호출 제한 현황 ---
+with st.expander("🚦 OpenAI 호출 제한"):
+    try:
+        from lib.rate_limit import get_rate_limit_stats
+        from lib.config import get_openai_limits_config
+
+        limits = get_openai_limits_config()
+        limiter_stats = get_rate_limit_stats()
+
+        st.caption(
+            f"분당 {limits['rpm']}요청 · {limits['tpm']:,}토큰 · "
+            f"동시 {limits['max_concurrency']}개 · 재시도 최대 {limits['max_retries']}회"
+        )
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("대기 중", limiter_stats["queue_depth"])
+        with col2:
+            st.metric("진행 중", f"{limiter_stats['in_flight']}/{limiter_stats['max_concurrency']}")
+        with col3:
+            st.metric("대기 p50", f"{limiter_stats['wait_p50_ms']:.0f}ms")
+        with col4:
+            st.metric("대기 p95", f"{limiter_stats['wait_p95_ms']:.0f}ms")
+
+        st.caption(
+            f"호출 {limiter_stats['calls']}회 · 재시도 {limiter_stats['retries']}회 · "
+            f"429 {limiter_stats['rate_limited']}회 · 최종 실패 {limiter_stats['failures']}회"
+        )
+        if limiter_stats["cooldown_remaining_s"] > 0:
+            st.warning(f"⏳ 한도 초과로 {limiter_stats['cooldown_remaining_s']:.1f}초간 새 호출 대기 중")
+    except Exception as e:
+        st.warning(f"호출 제한 상태 확인 실패: {e}")
+
+# --- LLM 호출 통계 ---
+with st.expander("📈 LLM 호출 통계"):
+    try:
+        from lib.telemetry import summarize_llm_calls, get_recent_llm_calls, clear_llm_telemetry
+        from lib.config import get_telemetry_config
+
+        telemetry_config = get_telemetry_config()
+        summary = summarize_llm_calls()
+
+        if not telemetry_config["enabled"]:
+            st.caption("계측이 꺼져 있습니다. `[telemetry] enabled = true`로 켤 수 있습니다.")
+        elif not summary:
+            st.caption("아직 기록된 호출이 없습니다.")
+        else:
+            import pandas as pd
+
+            total_cost = sum(row["cost_usd"] for row in summary)
+            total_calls = sum(row["calls"] for row in summary)
+            st.caption(
+                f"최근 {total_calls}건 기준 · 추정 비용 ${total_cost:.4f}"
+                + (f" · 기록 파일 `{telemetry_config['jsonl_path']}`" if telemetry_config["jsonl_path"] else "")
+            )
+
+            rows = [
+                {
+                    "호출 지점": row["site"],
+                    "호출": row["calls"],
+                    "캐시 적중률": f"{row['cache_hit_rate'] * 100:.0f}%",
+                    "p50(ms)": round(row["p50_ms"]) if row["p50_ms"] is not None else None,
+                    "p95(ms)": round(row["p95_ms"]) if row["p95_ms"] is not None else None,
+                    "입력 토큰": row["prompt_tokens"],
+                    "출력 토큰": row["completion_tokens"],
+                    "비용($)": round(row["cost_usd"], 4),
+                    "재시도": row["retries"],
+                    "오류": row["errors"]
+                }
+                for row in summary
+            ]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+            if st.checkbox("최근 호출 보기", key="show_recent_llm_calls"):
+                st.dataframe(pd.DataFrame(get_recent_llm_calls(50)), hide_index=True, use_container_width=True)
+
+        if st.button("🧹 통계 초기화", key="clear_llm_telemetry"):
+            clear_llm_telemetry()
+            st.success("LLM 호출 통계를 초기화했습니다. (JSONL 파일은 유지)")
+            st.rerun()
+    except Exception as e:
+        st.warning(f"LLM 호출 통계 확인 실패: {e}")
+
 
 # === 계정 관리 ===
 st.divider()
@@ -638,6 +807,8 @@ with st.expander("⚠️ 위험 구역"):
                     if client:
                         client.table("memory_embeddings").delete().eq("user_id", user_id).execute()
                         client.table("memory_chunks").delete().eq("user_id", user_id).execute()
+                        from lib.vector_store import invalidate_memory_index
+                        invalidate_memory_index(user_id)
                         st.success("초기화 완료")
                         st.session_state.confirm_reset_embeddings = False
                 except Exception as e:
@@ -0,0 +1,133 @@
+"""
+ReflectOS - History
+전체 체크인 기록 탐색 (키셋 페이지네이션 + 다음 페이지 미리 가져오기)
+"""
+import streamlit as st
+from lib.auth import get_current_user
+from lib.utils import format_datetime
+
+# 사용자 정보 가져오기
+user = get_current_user()
+user_id = user.id
+
+PAGE_SIZE = 20
+STATE_KEY = "history_feed"
+
+MOOD_EMOJI = {
+    "great": "😊",
+    "good": "🙂",
+    "neutral": "😐",
+    "bad": "😔",
+    "terrible": "😢"
+}
+
+st.title("📜 History")
+st.caption("지금까지의 체크인을 최신순으로 탐색합니다")
+
+# === 사이드바: 데모 데이터 제외 토글 (Home과 공유) ===
+with st.sidebar:
+    exclude_demo = st.checkbox(
+        "🧪 데모 데이터 제외",
+        value=st.session_state.get("exclude_demo", True)
+    )
+    st.session_state["exclude_demo"] = exclude_demo
+
+
+# === 피드 상태 ===
+# {"user_id", "exclude_demo", "items", "next_cursor", "prefetch": (cursor, Future) 또는 None}
+
+def _reset_feed():
+    """첫 페이지부터 다시 로드"""
+    st.session_state.pop(STATE_KEY, None)
+
+
+def _start_prefetch(feed: dict):
+    """다음 페이지를 백그라운드에서 미리 조회 (이미 같은 커서를 조회 중이면 생략)"""
+    from lib.supabase_db import prefetch_checkins_page
+    
+    cursor = feed["next_cursor"]
+    if not cursor or (feed["prefetch"] and feed["prefetch"][0] == cursor):
+        return
+    try:
+        feed["prefetch"] = (cursor, prefetch_checkins_page(
+            limit=PAGE_SIZE, cursor=cursor, user_id=user_id, exclude_demo=feed["exclude_demo"]
+        ))
+    except Exception:
+        # 미리 가져오기 실패는 무시 (더 보기에서 직접 조회)
+        feed["prefetch"] = None
+
+
+def _load_more():
+    """더 보기: 미리 가져온 페이지가 있으면 그대로 사용, 없으면 직접 조회"""
+    from lib.supabase_db import list_checkins_page
+    
+    feed = st.session_state.get(STATE_KEY)
+    if not feed or not feed["next_cursor"]:
+        return
+    
+    page = None
+    prefetch = feed["prefetch"]
+    if prefetch and prefetch[0] == feed["next_cursor"]:
+        try:
+            page = prefetch[1].result(timeout=10)
+        except Exception:
+            page = None
+    feed["prefetch"] = None
+    
+    if page is None:
+        page = list_checkins_page(
+            limit=PAGE_SIZE, cursor=feed["next_cursor"], user_id=user_id, exclude_demo=feed["exclude_demo"]
+        )
+    
+    feed["items"].extend(page["items"])
+    feed["next_cursor"] = page["next_cursor"]
+
+
+feed = st.session_state.get(STATE_KEY)
+if not feed or feed["user_id"] != user_id or feed["exclude_demo"] != exclude_demo:
+    from lib.supabase_db import list_checkins_page
+    
+    first = list_checkins_page(limit=PAGE_SIZE, user_id=user_id, exclude_demo=exclude_demo)
+    feed = {
+        "user_id": user_id,
+        "exclude_demo": exclude_demo,
+        "items": first["items"],
+        "next_cursor": first["next_cursor"],
+        "prefetch": None
+    }
+    st.session_state[STATE_KEY] = feed
+
+# 화면을 그리는 동안 다음 페이지를 미리 가져와서 '더 보기'가 바로 반영되도록
+_start_prefetch(feed)
+
+col_count, col_refresh = st.columns([4, 1])
+with col_count:
+    st.caption(f"{len(feed['items'])}개 표시 중" + ("" if feed["next_cursor"] else " · 마지막 기록까지 모두 표시됨"))
+with col_refresh:
+    st.button("🔄 새로고침", on_click=_reset_feed, use_container_width=True)
+
+# === 체크인 목록 ===
+if not feed["items"]:
+    st.info("아직 체크인 기록이 없습니다. **Check-in** 페이지에서 첫 기록을 남겨보세요!")
+
+current_day = None
+for checkin in feed["items"]:
+    created_at = checkin.get("created_at") or ""
+    day = format_datetime(created_at, "%Y-%m-%d") if created_at else "날짜 없음"
+    if day != current_day:
+        st.markdown(f"#### {day}")
+        current_day = day
+    
+    with st.container(border=True):
+        col1, col2 = st.columns([1, 6])
+        with col1:
+            st.markdown(f"### {MOOD_EMOJI.get(checkin.get('mood', ''), '📝')}")
+            st.caption(format_datetime(created_at, "%H:%M") if created_at else "")
+        with col2:
+            st.markdown(checkin.get("content", "*내용 없음*"))
+            tags = checkin.get("tags") or []
+            if tags:
+                st.caption(" ".join(f"`{tag}`" for tag in tags))
+
+if feed["next_cursor"]:
+    st.button("⬇️ 더 보기", on_click=_load_more, use_container_width=True)
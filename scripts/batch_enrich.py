@@ -0,0 +1,122 @@
+"""
+ReflectOS - 과거 체크인 배치 보강
+LLM 추출이 없는 체크인을 OpenAI Batch API로 일괄 추출하고 extractions / memory_embeddings에 저장
+
+대화형 호출 대비 할인된 Batch 가격으로 처리하며, 작업 상태는 .cache/batch_enrich/<job_id>/에
+체크포인트로 남으므로 중단되어도 resume으로 이어서 실행할 수 있습니다.
+(.streamlit/secrets.toml의 Supabase / OpenAI 설정을 그대로 사용)
+
+사용법:
+    python scripts/batch_enrich.py run --user-id <USER_ID> --limit 1000
+    python scripts/batch_enrich.py run --user-id <USER_ID> --no-wait   # 제출만 하고 종료
+    python scripts/batch_enrich.py resume <JOB_ID>                     # 완료 확인 + 결과 저장
+    python scripts/batch_enrich.py status <JOB_ID>
+    python scripts/batch_enrich.py list
+
+    --transport local: API 호출 없이 형식만 맞는 결과로 전체 경로 리허설
+"""
+import argparse
+import os
+import sys
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.batch_enrich import (  # noqa: E402
+    find_unenriched_checkins,
+    create_job,
+    load_job,
+    list_jobs,
+    run_job,
+    get_transport,
+)
+
+
+def _print_progress(stage: str, job: Dict[str, Any]):
+    if stage == "submitted":
+        ids = ", ".join(b["batch_id"] for b in job["batches"])
+        print(f"제출 완료: {ids}")
+    elif stage == "polled":
+        for b in job["batches"]:
+            counts = b.get("counts") or {}
+            print(f"  {b['batch_id']}: {b['status']} ({counts.get('completed', 0)}/{counts.get('total', 0)}, 실패 {counts.get('failed', 0)})")
+    elif stage == "written":
+        last = job.get("last_write") or {}
+        print(f"저장: extractions {last.get('written', 0)}건, 임베딩 {last.get('indexed', 0)}건, 실패 {last.get('failed', 0)}건")
+
+
+def _print_status(job: Dict[str, Any]):
+    print(f"작업 {job['job_id']} ({job['transport']}, {job['model']})")
+    print(f"  단계: {job['stage']}  요청: {job['total']}  저장 완료: {len(job['written'])}")
+    for b in job["batches"]:
+        print(f"  - {b['batch_id'] or '(미제출)'}: {b['status']}")
+    for error in job["errors"][-5:]:
+        print(f"  ! {error}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="과거 체크인 LLM 추출 배치 보강")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="대상 체크인 조회 → 작업 생성 → 제출")
+    run.add_argument("--user-id", required=True)
+    run.add_argument("--limit", type=int, default=None, help="최대 체크인 수")
+    run.add_argument("--include-demo", action="store_true", help="데모 체크인 포함")
+    run.add_argument("--model", default="gpt-4o-mini")
+
+    resume = sub.add_parser("resume", help="중단된 작업 이어서 실행")
+    resume.add_argument("job_id")
+
+    status = sub.add_parser("status", help="작업 상태 출력")
+    status.add_argument("job_id")
+
+    sub.add_parser("list", help="작업 목록")
+
+    for p in (run, resume):
+        p.add_argument("--transport", choices=["openai", "local"], default=None,
+                       help="run 기본값 openai, resume 기본값은 작업 생성 시 값")
+        p.add_argument("--no-wait", action="store_true", help="완료를 기다리지 않고 현재 상태만 반영")
+        p.add_argument("--poll-seconds", type=float, default=60.0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        jobs = list_jobs()
+        if not jobs:
+            print("작업이 없습니다.")
+        for j in jobs:
+            print(f"{j['job_id']}  {j['stage']:<10} {j['written']}/{j['requests']}  user={j['user_id']}")
+        return 0
+
+    if args.command == "status":
+        _print_status(load_job(args.job_id))
+        return 0
+
+    if args.command == "run":
+        checkins = find_unenriched_checkins(args.user_id, limit=args.limit, include_demo=args.include_demo)
+        if not checkins:
+            print("LLM 추출이 필요한 체크인이 없습니다.")
+            return 0
+        job = create_job(args.user_id, checkins, model=args.model, transport=args.transport or "openai")
+        print(f"작업 생성: {job['job_id']} (체크인 {job['total']}건, 배치 {len(job['batches'])}개)")
+    else:
+        job = load_job(args.job_id)
+        if args.transport:
+            job["transport"] = args.transport
+
+    transport = get_transport(job["transport"])
+    job = run_job(
+        job,
+        transport,
+        wait=not args.no_wait,
+        poll_seconds=args.poll_seconds,
+        progress_callback=_print_progress
+    )
+    _print_status(job)
+    if job["stage"] != "written":
+        print(f"\n이어서 실행: python scripts/batch_enrich.py resume {job['job_id']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
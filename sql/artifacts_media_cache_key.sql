@@ -0,0 +1,19 @@
+-- ============================================
+-- artifacts 미디어 분석 캐시 키 인덱스
+-- [cache] media_mirror_artifacts = true 일 때
+-- metadata->>'media_cache_key' 조회(같은 이미지의 분석 결과 재사용, 전사는 로컬 캐시만)를 인덱스로 처리
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_artifacts_media_cache_key
+ON artifacts (user_id, (metadata->>'media_cache_key'))
+WHERE metadata ? 'media_cache_key';
+
+ANALYZE artifacts;
+
+-- PostgREST 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'artifacts 미디어 캐시 키 인덱스 생성 완료' AS status,
+    (SELECT COUNT(*) FROM artifacts WHERE metadata ? 'media_cache_key') AS keyed_artifacts;
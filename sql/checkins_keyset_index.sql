@@ -0,0 +1,22 @@
+-- ============================================
+-- checkins 키셋 페이지네이션 인덱스
+-- lib/supabase_db.py list_checkins_page (History 페이지, GET /checkins?cursor=)
+--
+-- 조회 형태:
+--   WHERE user_id = ? AND created_at <= :cursor_ts
+--     AND (created_at < :cursor_ts OR id < :cursor_id)
+--   ORDER BY created_at DESC, id DESC
+--   LIMIT n + 1
+-- → 인덱스에서 커서 위치로 바로 탐색해 n + 1행만 읽음 (OFFSET처럼 앞 페이지를 건너뛰며 읽지 않음)
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_checkins_user_created_id
+    ON checkins (user_id, created_at DESC, id DESC);
+
+-- PostgREST 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'checkins 키셋 인덱스 추가 완료' AS status,
+    (SELECT COUNT(*) FROM pg_indexes WHERE indexname = 'idx_checkins_user_created_id') AS index_exists;
@@ -0,0 +1,52 @@
+-- ============================================
+-- get_report_data: 주간 리포트 입력 1회 왕복 조회
+-- 기간 내 체크인 + 각 체크인의 extraction data를 한 응답으로 반환
+-- lib/supabase_db.py get_report_data()에서 호출 (함수가 없으면 체크인 조회 + extraction 일괄 조회로 폴백)
+-- ============================================
+--
+-- 반환: {"checkins": [체크인 레코드, 최신순], "extractions": [{"source_id", "data"}]}
+-- extraction은 idx_extractions_source (source_type, source_id) 인덱스로 조인
+-- SECURITY INVOKER(기본값)이므로 각 테이블 RLS 정책이 그대로 적용됨
+
+CREATE OR REPLACE FUNCTION get_report_data(
+    p_user_id TEXT,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ,
+    p_exclude_demo BOOLEAN DEFAULT FALSE,
+    p_demo_tag TEXT DEFAULT '__demo__'
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH range_checkins AS (
+        SELECT c.*
+        FROM checkins c
+        WHERE c.user_id = p_user_id
+          AND c.created_at >= p_start
+          AND c.created_at <= p_end
+          AND (NOT p_exclude_demo OR NOT (COALESCE(c.tags, '{}') @> ARRAY[p_demo_tag]))
+    )
+    SELECT jsonb_build_object(
+        'checkins', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(rc) ORDER BY rc.created_at DESC) FROM range_checkins rc),
+            '[]'::JSONB
+        ),
+        'extractions', COALESCE(
+            (
+                SELECT jsonb_agg(jsonb_build_object('source_id', e.source_id, 'data', e.data) ORDER BY e.created_at)
+                FROM extractions e
+                JOIN range_checkins rc ON e.source_type = 'checkin' AND e.source_id = rc.id
+            ),
+            '[]'::JSONB
+        )
+    );
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'get_report_data 함수 생성 완료' AS status,
+    EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'get_report_data') AS function_exists;
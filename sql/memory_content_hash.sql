@@ -0,0 +1,139 @@
+-- ============================================
+-- memory_chunks / memory_embeddings content_hash 마이그레이션
+-- 해시 기반 중복 방지 + 1회 왕복 upsert RPC
+-- (sql/schema.sql 적용 이후 실행)
+-- ============================================
+
+-- 1. 컬럼 추가
+ALTER TABLE memory_chunks ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+ALTER TABLE memory_embeddings ADD COLUMN IF NOT EXISTS chunk_index INTEGER DEFAULT 0;
+ALTER TABLE memory_embeddings ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- 2. 기존 행 해시 채우기 (Python: hashlib.sha256(content.encode("utf-8")).hexdigest())
+UPDATE memory_chunks
+SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+UPDATE memory_embeddings
+SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex'),
+    chunk_index = COALESCE(chunk_index, 0)
+WHERE content_hash IS NULL OR chunk_index IS NULL;
+
+ALTER TABLE memory_chunks ALTER COLUMN content_hash SET NOT NULL;
+ALTER TABLE memory_embeddings ALTER COLUMN content_hash SET NOT NULL;
+ALTER TABLE memory_embeddings ALTER COLUMN chunk_index SET NOT NULL;
+
+-- 3. 기존 중복 행 정리 (가장 오래된 행만 유지)
+DELETE FROM memory_chunks a
+USING memory_chunks b
+WHERE a.user_id = b.user_id
+  AND a.source_type = b.source_type
+  AND a.source_id = b.source_id
+  AND a.chunk_index = b.chunk_index
+  AND a.content_hash = b.content_hash
+  AND (a.created_at, a.id) > (b.created_at, b.id);
+
+DELETE FROM memory_embeddings a
+USING memory_embeddings b
+WHERE a.user_id = b.user_id
+  AND a.source_type = b.source_type
+  AND a.source_id = b.source_id
+  AND a.chunk_index = b.chunk_index
+  AND a.content_hash = b.content_hash
+  AND (a.created_at, a.id) > (b.created_at, b.id);
+
+-- 4. 유니크 제약
+ALTER TABLE memory_chunks DROP CONSTRAINT IF EXISTS memory_chunks_content_key;
+ALTER TABLE memory_chunks
+ADD CONSTRAINT memory_chunks_content_key
+UNIQUE (user_id, source_type, source_id, chunk_index, content_hash);
+
+ALTER TABLE memory_embeddings DROP CONSTRAINT IF EXISTS memory_embeddings_content_key;
+ALTER TABLE memory_embeddings
+ADD CONSTRAINT memory_embeddings_content_key
+UNIQUE (user_id, source_type, source_id, chunk_index, content_hash);
+
+-- ============================================
+-- 5. upsert RPC (stale 행 교체 + 삽입을 한 트랜잭션/한 번의 호출로)
+-- p_replace_stale = TRUE  : 같은 소스/chunk_index의 다른 해시 행 삭제 (checkin 단일 유지 정책)
+-- p_replace_stale = FALSE : 동일 해시만 스킵, 다른 행은 유지 (extraction 등)
+-- ============================================
+CREATE OR REPLACE FUNCTION upsert_memory_chunk(
+    p_user_id TEXT,
+    p_source_type TEXT,
+    p_source_id UUID,
+    p_content TEXT,
+    p_content_hash TEXT,
+    p_chunk_index INT DEFAULT 0,
+    p_metadata JSONB DEFAULT '{}',
+    p_replace_stale BOOLEAN DEFAULT FALSE
+)
+RETURNS SETOF memory_chunks
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_replace_stale THEN
+        DELETE FROM memory_chunks
+        WHERE user_id = p_user_id
+          AND source_type = p_source_type
+          AND source_id = p_source_id
+          AND chunk_index = p_chunk_index
+          AND content_hash <> p_content_hash;
+    END IF;
+
+    RETURN QUERY
+    INSERT INTO memory_chunks (user_id, source_type, source_id, content, content_hash, chunk_index, metadata)
+    VALUES (p_user_id, p_source_type, p_source_id, p_content, p_content_hash, p_chunk_index, COALESCE(p_metadata, '{}'))
+    ON CONFLICT ON CONSTRAINT memory_chunks_content_key
+    DO UPDATE SET metadata = EXCLUDED.metadata
+    RETURNING *;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION upsert_memory_embedding(
+    p_user_id TEXT,
+    p_source_type TEXT,
+    p_source_id UUID,
+    p_content TEXT,
+    p_content_hash TEXT,
+    p_embedding vector(1536),
+    p_chunk_index INT DEFAULT 0,
+    p_replace_stale BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (
+    id UUID,
+    source_type TEXT,
+    source_id UUID,
+    content TEXT,
+    content_hash TEXT,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_replace_stale THEN
+        DELETE FROM memory_embeddings me
+        WHERE me.user_id = p_user_id
+          AND me.source_type = p_source_type
+          AND me.source_id = p_source_id
+          AND me.chunk_index = p_chunk_index
+          AND me.content_hash <> p_content_hash;
+    END IF;
+
+    RETURN QUERY
+    INSERT INTO memory_embeddings AS me (user_id, source_type, source_id, content, content_hash, chunk_index, embedding)
+    VALUES (p_user_id, p_source_type, p_source_id, p_content, p_content_hash, p_chunk_index, p_embedding)
+    ON CONFLICT ON CONSTRAINT memory_embeddings_content_key
+    DO UPDATE SET embedding = EXCLUDED.embedding
+    RETURNING me.id, me.source_type, me.source_id, me.content, me.content_hash, me.created_at;
+END;
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'content_hash 마이그레이션 완료' AS status,
+    (SELECT COUNT(*) FROM pg_proc WHERE proname IN ('upsert_memory_chunk', 'upsert_memory_embedding')) AS rpc_count;
@@ -0,0 +1,203 @@
+-- ============================================
+-- memory_embeddings 축소 차원 / half-precision 저장 프로필 마이그레이션
+-- [rag] embedding_profile = "768_f16" | "512_f16" 사용 시 필요
+-- (sql/memory_embeddings_hnsw.sql 적용 이후 실행, pgvector 0.7.0+ 필요: halfvec, subvector, l2_normalize)
+-- ============================================
+--
+-- vector(1536) float32 = 약 6KB/행 → halfvec(768) 약 1.5KB, halfvec(512) 약 1KB
+-- HNSW 인덱스도 같은 비율로 작아져 같은 인스턴스에서 더 많은 사용자의 인덱스를 메모리에 유지할 수 있다.
+--
+-- 기존 embedding(vector(1536)) 컬럼은 유지:
+--   - rescore = true  : 원본도 저장 → 상위 후보를 원본으로 재점수
+--   - rescore = false : 원본은 NULL로 저장 (힙 크기도 축소)
+
+-- 1. 축소 컬럼 추가
+ALTER TABLE memory_embeddings ADD COLUMN IF NOT EXISTS embedding_768 halfvec(768);
+ALTER TABLE memory_embeddings ADD COLUMN IF NOT EXISTS embedding_512 halfvec(512);
+
+-- 2. 기존 행 채우기: 앞쪽 N차원 + L2 재정규화
+-- (text-embedding-3 계열은 API의 dimensions 파라미터와 같은 결과)
+UPDATE memory_embeddings
+SET embedding_768 = l2_normalize(subvector(embedding, 1, 768))::halfvec(768),
+    embedding_512 = l2_normalize(subvector(embedding, 1, 512))::halfvec(512)
+WHERE embedding IS NOT NULL
+  AND (embedding_768 IS NULL OR embedding_512 IS NULL);
+
+-- 3. HNSW 인덱스 (사용하지 않는 프로필의 인덱스는 DROP INDEX로 제거해도 됨)
+CREATE INDEX IF NOT EXISTS idx_memory_embeddings_vector_768
+ON memory_embeddings USING hnsw (embedding_768 halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_memory_embeddings_vector_512
+ON memory_embeddings USING hnsw (embedding_512 halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- ============================================
+-- 4. upsert_memory_embedding: 원본 선택 + 축소 벡터 인자 추가
+-- (시그니처가 바뀌므로 기존 함수 삭제 후 재생성 — PostgREST 오버로드 모호성 방지)
+-- ============================================
+DROP FUNCTION IF EXISTS upsert_memory_embedding(TEXT, TEXT, UUID, TEXT, TEXT, vector, INT, BOOLEAN, BOOLEAN, TIMESTAMPTZ);
+
+CREATE OR REPLACE FUNCTION upsert_memory_embedding(
+    p_user_id TEXT,
+    p_source_type TEXT,
+    p_source_id UUID,
+    p_content TEXT,
+    p_content_hash TEXT,
+    p_embedding vector(1536) DEFAULT NULL,
+    p_chunk_index INT DEFAULT 0,
+    p_replace_stale BOOLEAN DEFAULT FALSE,
+    p_is_demo BOOLEAN DEFAULT FALSE,
+    p_created_at TIMESTAMPTZ DEFAULT NULL,
+    p_embedding_reduced halfvec DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    source_type TEXT,
+    source_id UUID,
+    content TEXT,
+    content_hash TEXT,
+    is_demo BOOLEAN,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_reduced_dims INT := CASE WHEN p_embedding_reduced IS NULL THEN NULL ELSE vector_dims(p_embedding_reduced) END;
+BEGIN
+    IF v_reduced_dims IS NOT NULL AND v_reduced_dims NOT IN (768, 512) THEN
+        RAISE EXCEPTION 'unsupported reduced embedding dimension: %', v_reduced_dims;
+    END IF;
+
+    IF p_replace_stale THEN
+        DELETE FROM memory_embeddings me
+        WHERE me.user_id = p_user_id
+          AND me.source_type = p_source_type
+          AND me.source_id = p_source_id
+          AND me.chunk_index = p_chunk_index
+          AND me.content_hash <> p_content_hash;
+    END IF;
+
+    RETURN QUERY
+    INSERT INTO memory_embeddings AS me (
+        user_id, source_type, source_id, content, content_hash, chunk_index,
+        embedding, embedding_768, embedding_512, is_demo, created_at
+    )
+    VALUES (
+        p_user_id, p_source_type, p_source_id, p_content, p_content_hash, p_chunk_index,
+        p_embedding,
+        CASE WHEN v_reduced_dims = 768 THEN p_embedding_reduced::halfvec(768) END,
+        CASE WHEN v_reduced_dims = 512 THEN p_embedding_reduced::halfvec(512) END,
+        COALESCE(p_is_demo, FALSE), COALESCE(p_created_at, NOW())
+    )
+    ON CONFLICT ON CONSTRAINT memory_embeddings_content_key
+    DO UPDATE SET
+        embedding = COALESCE(EXCLUDED.embedding, me.embedding),
+        embedding_768 = COALESCE(EXCLUDED.embedding_768, me.embedding_768),
+        embedding_512 = COALESCE(EXCLUDED.embedding_512, me.embedding_512),
+        is_demo = EXCLUDED.is_demo
+    RETURNING me.id, me.source_type, me.source_id, me.content, me.content_hash, me.is_demo, me.created_at;
+END;
+$$;
+
+-- ============================================
+-- 5. search_memories_reduced: halfvec 컬럼 ANN 검색 (+ 선택적 원본 재점수)
+-- query_embedding 차원(768/512)으로 컬럼 선택
+-- query_embedding_full이 있으면 상위 match_count × rescore_factor 후보를 vector(1536)으로 재점수
+-- ============================================
+CREATE OR REPLACE FUNCTION search_memories_reduced(
+    query_embedding halfvec,
+    match_count INT DEFAULT 5,
+    match_threshold FLOAT DEFAULT 0.7,
+    user_id_filter TEXT DEFAULT NULL,
+    source_types TEXT[] DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL,
+    created_before TIMESTAMPTZ DEFAULT NULL,
+    exclude_demo BOOLEAN DEFAULT FALSE,
+    ef_search INT DEFAULT NULL,
+    query_embedding_full vector(1536) DEFAULT NULL,
+    rescore_factor INT DEFAULT 4
+)
+RETURNS TABLE (
+    id UUID,
+    source_type TEXT,
+    source_id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_dims INT := vector_dims(query_embedding);
+    v_column TEXT;
+    v_candidates INT;
+BEGIN
+    IF v_dims = 768 THEN
+        v_column := 'embedding_768';
+    ELSIF v_dims = 512 THEN
+        v_column := 'embedding_512';
+    ELSE
+        RAISE EXCEPTION 'unsupported reduced embedding dimension: %', v_dims;
+    END IF;
+
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::TEXT, TRUE);
+    END IF;
+
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', TRUE);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector 0.8.0 미만
+    END;
+
+    v_candidates := CASE
+        WHEN query_embedding_full IS NULL THEN match_count
+        ELSE match_count * GREATEST(rescore_factor, 1)
+    END;
+
+    RETURN QUERY EXECUTE format($q$
+        SELECT r.id, r.source_type, r.source_id, r.content, r.similarity, r.created_at
+        FROM (
+            SELECT
+                c.id, c.source_type, c.source_id, c.content, c.created_at,
+                CASE
+                    WHEN $8 IS NOT NULL AND c.embedding IS NOT NULL THEN 1 - (c.embedding <=> $8)
+                    ELSE 1 - c.distance
+                END AS similarity
+            FROM (
+                SELECT
+                    me.id, me.source_type, me.source_id, me.content, me.created_at, me.embedding,
+                    me.%1$I <=> $1 AS distance
+                FROM memory_embeddings me
+                WHERE
+                    me.%1$I IS NOT NULL
+                    AND ($2 IS NULL OR me.user_id = $2)
+                    AND ($3 IS NULL OR me.source_type = ANY($3))
+                    AND ($4 IS NULL OR me.created_at >= $4)
+                    AND ($5 IS NULL OR me.created_at < $5)
+                    AND (NOT $6 OR NOT me.is_demo)
+                ORDER BY me.%1$I <=> $1
+                LIMIT $7
+            ) c
+        ) r
+        WHERE r.similarity > $9
+        ORDER BY r.similarity DESC
+        LIMIT $10
+    $q$, v_column)
+    USING query_embedding, user_id_filter, source_types, created_after, created_before,
+          exclude_demo, v_candidates, query_embedding_full, match_threshold, match_count;
+END;
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'halfvec 프로필 마이그레이션 완료' AS status,
+    (SELECT COUNT(*) FROM memory_embeddings WHERE embedding_768 IS NOT NULL) AS rows_768,
+    (SELECT COUNT(*) FROM memory_embeddings WHERE embedding_512 IS NOT NULL) AS rows_512,
+    pg_size_pretty(pg_relation_size('idx_memory_embeddings_vector')) AS index_1536,
+    pg_size_pretty(pg_relation_size('idx_memory_embeddings_vector_768')) AS index_768,
+    pg_size_pretty(pg_relation_size('idx_memory_embeddings_vector_512')) AS index_512;
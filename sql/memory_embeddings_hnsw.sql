@@ -0,0 +1,103 @@
+-- ============================================
+-- memory_embeddings HNSW 인덱스 마이그레이션
+-- ivfflat(lists=100) → HNSW + 필터 검색용 iterative index scan
+-- (sql/search_memories_v2.sql 적용 이후 실행, pgvector 0.8.0+ 권장)
+-- ============================================
+--
+-- ivfflat은 빈 테이블에서 만들면 centroid가 데이터 없이 학습되고,
+-- user_id 등으로 필터링하면 probes 안의 후보가 부족해 recall이 크게 떨어진다.
+-- HNSW는 학습 단계가 없어 데이터가 늘어나도 재생성이 필요 없다.
+--
+-- 튜닝 값
+--   m               : 노드당 연결 수 (기본 16, 클수록 recall↑ 메모리↑)
+--   ef_construction : 빌드 시 후보 수 (기본 64, 클수록 빌드 느림 recall↑)
+--   hnsw.ef_search  : 검색 시 후보 수 (기본 40) → search_memories_v2의 ef_search 인자로 호출마다 지정
+--
+-- 아래 m / ef_construction 값을 바꿔 재실행하면 인덱스를 다시 만든다.
+
+-- 0. pgvector 버전 확인 (iterative scan은 0.8.0부터)
+SELECT extname, extversion FROM pg_extension WHERE extname = 'vector';
+
+-- 1. 기존 ivfflat 인덱스 제거 후 HNSW 생성
+DROP INDEX IF EXISTS idx_memory_embeddings_vector;
+
+CREATE INDEX idx_memory_embeddings_vector
+ON memory_embeddings USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+ANALYZE memory_embeddings;
+
+-- ============================================
+-- 2. search_memories_v2: ef_search 인자 + iterative index scan
+-- (시그니처가 바뀌므로 기존 함수 삭제 후 재생성 — PostgREST 오버로드 모호성 방지)
+-- ============================================
+DROP FUNCTION IF EXISTS search_memories_v2(vector, INT, FLOAT, TEXT, TEXT[], TIMESTAMPTZ, TIMESTAMPTZ, BOOLEAN);
+
+CREATE OR REPLACE FUNCTION search_memories_v2(
+    query_embedding vector(1536),
+    match_count INT DEFAULT 5,
+    match_threshold FLOAT DEFAULT 0.7,
+    user_id_filter TEXT DEFAULT NULL,
+    source_types TEXT[] DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL,
+    created_before TIMESTAMPTZ DEFAULT NULL,
+    exclude_demo BOOLEAN DEFAULT FALSE,
+    ef_search INT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    source_type TEXT,
+    source_id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- 트랜잭션 범위(SET LOCAL)로만 적용 → 커넥션 풀의 다른 요청에 영향 없음
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', ef_search::TEXT, TRUE);
+    END IF;
+
+    -- 필터로 걸러진 행이 많아도 match_count를 채울 때까지 인덱스를 계속 탐색
+    -- (relaxed_order: 순서가 약간 어긋날 수 있어 바깥에서 다시 정렬)
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', TRUE);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector 0.8.0 미만: iterative scan 없이 동작
+    END;
+
+    RETURN QUERY
+    SELECT r.id, r.source_type, r.source_id, r.content, r.similarity, r.created_at
+    FROM (
+        SELECT
+            me.id,
+            me.source_type,
+            me.source_id,
+            me.content,
+            1 - (me.embedding <=> query_embedding) AS similarity,
+            me.created_at,
+            me.embedding <=> query_embedding AS distance
+        FROM memory_embeddings me
+        WHERE
+            (user_id_filter IS NULL OR me.user_id = user_id_filter)
+            AND (source_types IS NULL OR me.source_type = ANY(source_types))
+            AND (created_after IS NULL OR me.created_at >= created_after)
+            AND (created_before IS NULL OR me.created_at < created_before)
+            AND (NOT exclude_demo OR NOT me.is_demo)
+        ORDER BY me.embedding <=> query_embedding
+        LIMIT match_count
+    ) r
+    WHERE r.similarity > match_threshold
+    ORDER BY r.distance;
+END;
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'HNSW 마이그레이션 완료' AS status,
+    (SELECT indexdef FROM pg_indexes WHERE indexname = 'idx_memory_embeddings_vector') AS index_def;
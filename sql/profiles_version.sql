@@ -0,0 +1,31 @@
+-- ============================================
+-- profiles 버전 카운터
+-- lib/supabase_db.py 프로필 캐시가 다른 세션/프로세스의 변경을 감지하는 데 사용
+-- (캐시 유효 시간이 지나면 version만 조회해서 같으면 캐시 재사용, 다르면 전체 재조회)
+-- ============================================
+
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
+
+-- UPDATE마다 version 증가 (upsert의 ON CONFLICT DO UPDATE 포함)
+CREATE OR REPLACE FUNCTION bump_profile_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version = COALESCE(OLD.version, 0) + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_profiles_version ON profiles;
+CREATE TRIGGER bump_profiles_version
+    BEFORE UPDATE ON profiles
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_profile_version();
+
+-- PostgREST 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'profiles 버전 카운터 추가 완료' AS status,
+    (SELECT COUNT(*) FROM profiles) AS profiles,
+    (SELECT MAX(version) FROM profiles) AS max_version;
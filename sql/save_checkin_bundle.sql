@@ -0,0 +1,131 @@
+-- ============================================
+-- save_checkin_bundle: 체크인 저장 1회 왕복 + 단일 트랜잭션
+-- checkins + artifacts(N개) + extraction + (선택) memory_chunks / memory_embeddings
+-- lib/supabase_db.py save_checkin_bundle()에서 호출 (함수가 없으면 기존 개별 저장으로 폴백)
+-- ============================================
+--
+-- p_artifacts: [{"type", "storage_path", "original_name", "file_size", "mime_type", "metadata"}]
+-- p_memory   : [{"source_type", "content", "content_hash", "metadata", "store_chunk",
+--                "is_demo", "embedding"(1536 배열 또는 null), "embedding_reduced"(768/512 배열, 선택)}]
+--              source_id는 새 체크인 ID, created_at은 체크인 created_at
+--              embedding_reduced는 sql/memory_embeddings_halfvec.sql 적용 후에만 사용
+--
+-- 어느 단계든 실패하면 전체 롤백 → 추출 없는 체크인이 남지 않음
+-- SECURITY INVOKER(기본값)이므로 각 테이블 RLS 정책이 그대로 적용됨
+
+CREATE OR REPLACE FUNCTION save_checkin_bundle(
+    p_user_id TEXT,
+    p_content TEXT,
+    p_mood TEXT DEFAULT 'neutral',
+    p_tags TEXT[] DEFAULT '{}',
+    p_metadata JSONB DEFAULT '{}',
+    p_created_at TIMESTAMPTZ DEFAULT NULL,
+    p_artifacts JSONB DEFAULT '[]',
+    p_extraction_type TEXT DEFAULT NULL,
+    p_extraction_data JSONB DEFAULT NULL,
+    p_memory JSONB DEFAULT '[]'
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_checkin checkins%ROWTYPE;
+    v_artifact_ids UUID[];
+    v_extraction_id UUID;
+    v_memory JSONB := '[]'::JSONB;
+    v_entry JSONB;
+    v_row JSONB;
+    v_dims INT;
+BEGIN
+    -- 1. 체크인
+    INSERT INTO checkins (user_id, content, mood, tags, metadata, created_at)
+    VALUES (
+        p_user_id, p_content, COALESCE(p_mood, 'neutral'), COALESCE(p_tags, '{}'),
+        COALESCE(p_metadata, '{}'), COALESCE(p_created_at, NOW())
+    )
+    RETURNING * INTO v_checkin;
+
+    -- 2. 첨부파일 (개수와 무관하게 INSERT 1문)
+    WITH inserted AS (
+        INSERT INTO artifacts (user_id, checkin_id, type, storage_path, original_name, file_size, mime_type, metadata, created_at)
+        SELECT
+            p_user_id, v_checkin.id, a->>'type', a->>'storage_path', a->>'original_name',
+            (a->>'file_size')::INTEGER, a->>'mime_type', COALESCE(a->'metadata', '{}'), NOW()
+        FROM jsonb_array_elements(COALESCE(p_artifacts, '[]')) AS a
+        RETURNING id
+    )
+    SELECT COALESCE(array_agg(id), '{}') INTO v_artifact_ids FROM inserted;
+
+    -- 3. 추출 데이터
+    IF p_extraction_type IS NOT NULL AND p_extraction_data IS NOT NULL THEN
+        INSERT INTO extractions (user_id, source_type, source_id, extraction_type, data, created_at)
+        VALUES (p_user_id, 'checkin', v_checkin.id, p_extraction_type, p_extraction_data, NOW())
+        RETURNING id INTO v_extraction_id;
+    END IF;
+
+    -- 4. (선택) RAG 인덱스: 새 체크인이므로 stale 행 정리 없이 바로 삽입
+    FOR v_entry IN SELECT * FROM jsonb_array_elements(COALESCE(p_memory, '[]'))
+    LOOP
+        IF COALESCE((v_entry->>'store_chunk')::BOOLEAN, FALSE) THEN
+            INSERT INTO memory_chunks (user_id, source_type, source_id, content, content_hash, chunk_index, metadata)
+            VALUES (
+                p_user_id, v_entry->>'source_type', v_checkin.id, v_entry->>'content',
+                v_entry->>'content_hash', 0, COALESCE(v_entry->'metadata', '{}')
+            );
+        END IF;
+
+        IF v_entry->'embedding_reduced' IS NULL OR jsonb_typeof(v_entry->'embedding_reduced') = 'null' THEN
+            INSERT INTO memory_embeddings AS me (
+                user_id, source_type, source_id, content, content_hash, chunk_index, embedding, is_demo, created_at
+            )
+            VALUES (
+                p_user_id, v_entry->>'source_type', v_checkin.id, v_entry->>'content', v_entry->>'content_hash', 0,
+                (v_entry->>'embedding')::vector(1536),
+                COALESCE((v_entry->>'is_demo')::BOOLEAN, FALSE), v_checkin.created_at
+            )
+            RETURNING jsonb_build_object(
+                'id', me.id, 'source_type', me.source_type, 'source_id', me.source_id, 'content', me.content,
+                'content_hash', me.content_hash, 'is_demo', me.is_demo, 'created_at', me.created_at
+            ) INTO v_row;
+        ELSE
+            v_dims := jsonb_array_length(v_entry->'embedding_reduced');
+            IF v_dims NOT IN (768, 512) THEN
+                RAISE EXCEPTION 'unsupported reduced embedding dimension: %', v_dims;
+            END IF;
+
+            INSERT INTO memory_embeddings AS me (
+                user_id, source_type, source_id, content, content_hash, chunk_index,
+                embedding, embedding_768, embedding_512, is_demo, created_at
+            )
+            VALUES (
+                p_user_id, v_entry->>'source_type', v_checkin.id, v_entry->>'content', v_entry->>'content_hash', 0,
+                (v_entry->>'embedding')::vector(1536),
+                CASE WHEN v_dims = 768 THEN (v_entry->>'embedding_reduced')::halfvec(768) END,
+                CASE WHEN v_dims = 512 THEN (v_entry->>'embedding_reduced')::halfvec(512) END,
+                COALESCE((v_entry->>'is_demo')::BOOLEAN, FALSE), v_checkin.created_at
+            )
+            RETURNING jsonb_build_object(
+                'id', me.id, 'source_type', me.source_type, 'source_id', me.source_id, 'content', me.content,
+                'content_hash', me.content_hash, 'is_demo', me.is_demo, 'created_at', me.created_at
+            ) INTO v_row;
+        END IF;
+
+        v_memory := v_memory || jsonb_build_array(v_row);
+    END LOOP;
+
+    RETURN jsonb_build_object(
+        'checkin', to_jsonb(v_checkin),
+        'artifact_ids', to_jsonb(v_artifact_ids),
+        'extraction_id', v_extraction_id,
+        'memory', v_memory
+    );
+END;
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'save_checkin_bundle 함수 생성 완료' AS status,
+    EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'save_checkin_bundle') AS function_exists;
@@ -178,9 +178,11 @@ CREATE TABLE IF NOT EXISTS memory_embeddings (
 );
 
 -- 벡터 인덱스 (코사인 유사도)
+-- HNSW: 빈 테이블에서 만들어도 학습 단계가 없어 데이터 증가 후 재생성 불필요
+-- (기존 ivfflat 설치본은 sql/memory_embeddings_hnsw.sql로 전환)
 CREATE INDEX IF NOT EXISTS idx_memory_embeddings_vector 
-ON memory_embeddings USING ivfflat (embedding vector_cosine_ops) 
-WITH (lists = 100);
+ON memory_embeddings USING hnsw (embedding vector_cosine_ops) 
+WITH (m = 16, ef_construction = 64);
 
 CREATE INDEX IF NOT EXISTS idx_memory_embeddings_user_id ON memory_embeddings(user_id);
 
@@ -0,0 +1,127 @@
+-- ============================================
+-- search_memories_v2 마이그레이션
+-- source_type / 기간 / 데모 제외 필터를 LIMIT 이전에 적용
+-- (sql/memory_content_hash.sql 적용 이후 실행)
+-- ============================================
+
+-- 1. 데모 여부 비정규화 컬럼
+ALTER TABLE memory_embeddings ADD COLUMN IF NOT EXISTS is_demo BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- 2. 기존 행 채우기: 데모 태그(__demo__)가 있는 체크인 기반 행 + created_at을 원본 체크인 시각으로 정렬
+UPDATE memory_embeddings me
+SET is_demo = ('__demo__' = ANY(c.tags)),
+    created_at = c.created_at
+FROM checkins c
+WHERE me.source_type IN ('checkin', 'extraction')
+  AND me.source_id = c.id;
+
+-- 3. 필터용 인덱스
+CREATE INDEX IF NOT EXISTS idx_memory_embeddings_user_filter
+ON memory_embeddings(user_id, is_demo, source_type, created_at);
+
+-- ============================================
+-- 4. upsert_memory_embedding: is_demo / created_at 인자 추가
+-- (시그니처가 바뀌므로 기존 함수 삭제 후 재생성 — PostgREST 오버로드 모호성 방지)
+-- ============================================
+DROP FUNCTION IF EXISTS upsert_memory_embedding(TEXT, TEXT, UUID, TEXT, TEXT, vector, INT, BOOLEAN);
+
+CREATE OR REPLACE FUNCTION upsert_memory_embedding(
+    p_user_id TEXT,
+    p_source_type TEXT,
+    p_source_id UUID,
+    p_content TEXT,
+    p_content_hash TEXT,
+    p_embedding vector(1536),
+    p_chunk_index INT DEFAULT 0,
+    p_replace_stale BOOLEAN DEFAULT FALSE,
+    p_is_demo BOOLEAN DEFAULT FALSE,
+    p_created_at TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    source_type TEXT,
+    source_id UUID,
+    content TEXT,
+    content_hash TEXT,
+    is_demo BOOLEAN,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_replace_stale THEN
+        DELETE FROM memory_embeddings me
+        WHERE me.user_id = p_user_id
+          AND me.source_type = p_source_type
+          AND me.source_id = p_source_id
+          AND me.chunk_index = p_chunk_index
+          AND me.content_hash <> p_content_hash;
+    END IF;
+
+    RETURN QUERY
+    INSERT INTO memory_embeddings AS me (
+        user_id, source_type, source_id, content, content_hash, chunk_index, embedding, is_demo, created_at
+    )
+    VALUES (
+        p_user_id, p_source_type, p_source_id, p_content, p_content_hash, p_chunk_index, p_embedding,
+        COALESCE(p_is_demo, FALSE), COALESCE(p_created_at, NOW())
+    )
+    ON CONFLICT ON CONSTRAINT memory_embeddings_content_key
+    DO UPDATE SET embedding = EXCLUDED.embedding, is_demo = EXCLUDED.is_demo
+    RETURNING me.id, me.source_type, me.source_id, me.content, me.content_hash, me.is_demo, me.created_at;
+END;
+$$;
+
+-- ============================================
+-- 5. search_memories_v2: 필터를 WHERE에서 적용한 뒤 LIMIT
+-- ============================================
+CREATE OR REPLACE FUNCTION search_memories_v2(
+    query_embedding vector(1536),
+    match_count INT DEFAULT 5,
+    match_threshold FLOAT DEFAULT 0.7,
+    user_id_filter TEXT DEFAULT NULL,
+    source_types TEXT[] DEFAULT NULL,
+    created_after TIMESTAMPTZ DEFAULT NULL,
+    created_before TIMESTAMPTZ DEFAULT NULL,
+    exclude_demo BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (
+    id UUID,
+    source_type TEXT,
+    source_id UUID,
+    content TEXT,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        me.id,
+        me.source_type,
+        me.source_id,
+        me.content,
+        1 - (me.embedding <=> query_embedding) AS similarity,
+        me.created_at
+    FROM memory_embeddings me
+    WHERE
+        (user_id_filter IS NULL OR me.user_id = user_id_filter)
+        AND (source_types IS NULL OR me.source_type = ANY(source_types))
+        AND (created_after IS NULL OR me.created_at >= created_after)
+        AND (created_before IS NULL OR me.created_at < created_before)
+        AND (NOT exclude_demo OR NOT me.is_demo)
+        AND 1 - (me.embedding <=> query_embedding) > match_threshold
+    ORDER BY me.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'search_memories_v2 마이그레이션 완료' AS status,
+    (SELECT COUNT(*) FROM memory_embeddings WHERE is_demo) AS demo_embeddings;
@@ -0,0 +1,123 @@
+-- ============================================
+-- upsert_checkin_memory_bulk: 체크인 RAG 인덱스 일괄 upsert (백필/동기화용)
+-- lib/rag.py index_checkins_bulk()에서 배치마다 1회 호출
+-- (함수가 없으면 체크인별 upsert_memory_chunk / upsert_memory_embedding으로 폴백)
+-- ============================================
+--
+-- p_entries: [{"source_id", "content", "content_hash", "metadata", "is_demo", "created_at",
+--              "embedding"(1536 배열 또는 null), "embedding_reduced"(768/512 배열, 선택)}]
+--
+-- upsert_memory_chunk / upsert_memory_embedding(p_replace_stale = TRUE)과 같은 규칙을 배치 단위로 적용
+--   - 같은 체크인의 다른 해시 행(stale)만 삭제, 같은 해시 행은 갱신
+--   - 한 트랜잭션이므로 중간에 실패하면 기존 인덱스가 그대로 남음 (삭제만 되고 삽입이 안 되는 상태 없음)
+-- memory_chunks와 memory_embeddings의 created_at은 같은 값(체크인 시각)을 사용
+-- embedding_reduced는 sql/memory_embeddings_halfvec.sql 적용 후에만 사용
+-- SECURITY INVOKER(기본값)이므로 각 테이블 RLS 정책이 그대로 적용됨
+
+CREATE OR REPLACE FUNCTION upsert_checkin_memory_bulk(
+    p_user_id TEXT,
+    p_entries JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_reduced_dims INT;
+    v_rows JSONB;
+BEGIN
+    SELECT jsonb_array_length(e->'embedding_reduced') INTO v_reduced_dims
+    FROM jsonb_array_elements(COALESCE(p_entries, '[]')) AS e
+    WHERE jsonb_typeof(e->'embedding_reduced') = 'array'
+    LIMIT 1;
+
+    IF v_reduced_dims IS NOT NULL AND v_reduced_dims NOT IN (768, 512) THEN
+        RAISE EXCEPTION 'unsupported reduced embedding dimension: %', v_reduced_dims;
+    END IF;
+
+    -- 1. stale 행 정리 (내용이 바뀐 체크인의 이전 해시 행)
+    DELETE FROM memory_chunks mc
+    USING jsonb_to_recordset(p_entries) AS e(source_id UUID, content_hash TEXT)
+    WHERE mc.user_id = p_user_id
+      AND mc.source_type = 'checkin'
+      AND mc.chunk_index = 0
+      AND mc.source_id = e.source_id
+      AND mc.content_hash <> e.content_hash;
+
+    DELETE FROM memory_embeddings me
+    USING jsonb_to_recordset(p_entries) AS e(source_id UUID, content_hash TEXT)
+    WHERE me.user_id = p_user_id
+      AND me.source_type = 'checkin'
+      AND me.chunk_index = 0
+      AND me.source_id = e.source_id
+      AND me.content_hash <> e.content_hash;
+
+    -- 2. 청크 upsert
+    INSERT INTO memory_chunks AS mc (user_id, source_type, source_id, content, content_hash, chunk_index, metadata, created_at)
+    SELECT
+        p_user_id, 'checkin', e.source_id, e.content, e.content_hash, 0,
+        COALESCE(e.metadata, '{}'), COALESCE(e.created_at, NOW())
+    FROM jsonb_to_recordset(p_entries) AS e(
+        source_id UUID, content TEXT, content_hash TEXT, metadata JSONB, created_at TIMESTAMPTZ
+    )
+    ON CONFLICT ON CONSTRAINT memory_chunks_content_key
+    DO UPDATE SET metadata = EXCLUDED.metadata, created_at = EXCLUDED.created_at;
+
+    -- 3. 임베딩 upsert (축소 컬럼은 halfvec 마이그레이션이 있을 때만 참조)
+    IF v_reduced_dims IS NULL THEN
+        WITH saved AS (
+            INSERT INTO memory_embeddings AS me (
+                user_id, source_type, source_id, content, content_hash, chunk_index, embedding, is_demo, created_at
+            )
+            SELECT
+                p_user_id, 'checkin', e.source_id, e.content, e.content_hash, 0,
+                e.embedding::vector(1536), COALESCE(e.is_demo, FALSE), COALESCE(e.created_at, NOW())
+            FROM jsonb_to_recordset(p_entries) AS e(
+                source_id UUID, content TEXT, content_hash TEXT, is_demo BOOLEAN, created_at TIMESTAMPTZ, embedding TEXT
+            )
+            ON CONFLICT ON CONSTRAINT memory_embeddings_content_key
+            DO UPDATE SET
+                embedding = COALESCE(EXCLUDED.embedding, me.embedding),
+                is_demo = EXCLUDED.is_demo,
+                created_at = EXCLUDED.created_at
+            RETURNING me.id, me.source_type, me.source_id, me.content, me.content_hash, me.is_demo, me.created_at
+        )
+        SELECT COALESCE(jsonb_agg(to_jsonb(saved)), '[]'::JSONB) INTO v_rows FROM saved;
+    ELSE
+        WITH saved AS (
+            INSERT INTO memory_embeddings AS me (
+                user_id, source_type, source_id, content, content_hash, chunk_index,
+                embedding, embedding_768, embedding_512, is_demo, created_at
+            )
+            SELECT
+                p_user_id, 'checkin', e.source_id, e.content, e.content_hash, 0,
+                e.embedding::vector(1536),
+                CASE WHEN v_reduced_dims = 768 THEN e.embedding_reduced::halfvec(768) END,
+                CASE WHEN v_reduced_dims = 512 THEN e.embedding_reduced::halfvec(512) END,
+                COALESCE(e.is_demo, FALSE), COALESCE(e.created_at, NOW())
+            FROM jsonb_to_recordset(p_entries) AS e(
+                source_id UUID, content TEXT, content_hash TEXT, is_demo BOOLEAN, created_at TIMESTAMPTZ,
+                embedding TEXT, embedding_reduced TEXT
+            )
+            ON CONFLICT ON CONSTRAINT memory_embeddings_content_key
+            DO UPDATE SET
+                embedding = COALESCE(EXCLUDED.embedding, me.embedding),
+                embedding_768 = COALESCE(EXCLUDED.embedding_768, me.embedding_768),
+                embedding_512 = COALESCE(EXCLUDED.embedding_512, me.embedding_512),
+                is_demo = EXCLUDED.is_demo,
+                created_at = EXCLUDED.created_at
+            RETURNING me.id, me.source_type, me.source_id, me.content, me.content_hash, me.is_demo, me.created_at
+        )
+        SELECT COALESCE(jsonb_agg(to_jsonb(saved)), '[]'::JSONB) INTO v_rows FROM saved;
+    END IF;
+
+    RETURN v_rows;
+END;
+$$;
+
+-- PostgREST가 새 함수를 인식하도록 스키마 캐시 리로드
+NOTIFY pgrst, 'reload schema';
+
+-- 적용 확인
+SELECT
+    'upsert_checkin_memory_bulk 함수 생성 완료' AS status,
+    EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'upsert_checkin_memory_bulk') AS function_exists;
@@ -0,0 +1,52 @@
+"""
+lib.cache — provider별 캐시 키 분리
+offline provider의 결과가 openai provider의 캐시 적중으로 재사용되지 않는지 확인
+"""
+import pytest
+
+from lib import cache
+from lib.llm_providers import OfflineProvider
+
+OFFLINE = {"provider": "offline", "offline_seed": "reflectos"}
+OPENAI = {"provider": "openai", "offline_seed": "reflectos"}
+
+
+@pytest.fixture
+def provider(monkeypatch, tmp_path):
+    """캐시 디렉토리를 임시 경로로, provider 설정은 테스트에서 전환"""
+    monkeypatch.setattr(cache, "get_cache_config", lambda: {"dir": str(tmp_path), "enabled": True})
+    cache._get_embedding_cache.clear()
+    current = {"config": OFFLINE}
+    monkeypatch.setattr(cache, "get_llm_provider_config", lambda: current["config"])
+    yield current
+    cache._get_embedding_cache.clear()
+
+
+def test_offline_embedding_is_not_served_to_openai(provider):
+    text = "오늘 회고를 작성했다"
+    model = "text-embedding-3-small"
+
+    # offline 임베딩 → 캐시 저장
+    offline = OfflineProvider().embeddings.create(model=model, input=text).data[0].embedding
+    cache.put_cached_embedding(text, model, offline)
+    assert cache.get_cached_embedding(text, model) is not None
+
+    # openai로 전환하면 같은 텍스트/모델도 미스 (메모리 LRU, 디스크 모두)
+    provider["config"] = OPENAI
+    misses_before = cache.get_embedding_cache_stats()["misses"]
+    assert cache.get_cached_embedding(text, model) is None
+    assert cache.get_embedding_cache_stats()["misses"] == misses_before + 1
+
+
+def test_llm_and_media_keys_include_provider(provider):
+    messages = [{"role": "user", "content": "hi"}]
+    offline_llm = cache.llm_cache_key("gpt-4o-mini", messages)
+    offline_media = cache.media_cache_key("vision", b"img", model="gpt-4o-mini")
+
+    provider["config"] = OPENAI
+    assert cache.llm_cache_key("gpt-4o-mini", messages) != offline_llm
+    assert cache.media_cache_key("vision", b"img", model="gpt-4o-mini") != offline_media
+
+    # 시드가 다른 offline 결과끼리도 분리
+    provider["config"] = {"provider": "offline", "offline_seed": "other"}
+    assert cache.llm_cache_key("gpt-4o-mini", messages) != offline_llm